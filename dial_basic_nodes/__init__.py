@@ -4,183 +4,197 @@
 
 From editing datasets to compiling models, this nodes should satisfy most of the needs
 when working with classical Deep Learning problems.
+
+The node modules (And TensorFlow, the Qt widgets...) aren't imported until they're
+used: `load_plugin` registers a `LazyNodeFactory` for each node, and the classes
+exported by this package are imported on their first access.
 """
 
+import importlib
+import sys
+from typing import Any, Dict, List
+
+import dependency_injector.providers as providers
 from dial_core.node_editor import NodeRegistrySingleton
 from dial_core.notebook import NodeCellsRegistrySingleton
 
-from .data_augmentation import (
-    DataAugmentationNode,
-    DataAugmentationNodeCells,
-    DataAugmentationNodeFactory,
-)
-from .hyperparameters_config import (
-    HyperparametersConfigNode,
-    HyperparametersConfigNodeCells,
-    HyperparametersConfigNodeFactory,
-    HyperparametersConfigNodeGuiFactory,
-)
-from .model_checkpoint import (
-    ModelCheckpointNode,
-    ModelCheckpointNodeCells,
-    ModelCheckpointNodeFactory,
-)
-from .layers_editor import (
-    LayersEditorNode,
-    LayersEditorNodeCells,
-    LayersEditorNodeFactory,
-)
-from .predefined_models import (
-    PredefinedModelsNode,
-    PredefinedModelsNodeCells,
-    PredefinedModelsNodeFactory,
-)
-from .predefined_ttv import (
-    PredefinedTTVSetsNode,
-    PredefinedTTVSetsNodeCells,
-    PredefinedTTVSetsNodeFactory,
-)
-from .test_model import TestModelNode, TestModelNodeCells, TestModelNodeFactory
-from .training_console import (
-    TrainingConsoleNode,
-    TrainingConsoleNodeCells,
-    TrainingConsoleNodeFactory,
-)
-from .ttv_editor import (
-    TTVSetsEditorNode,
-    TTVSetsEditorNodeCells,
-    TTVSetsEditorNodeFactory,
-)
-from .ttv_exporter import (
-    TTVSetsExporterNode,
-    TTVSetsExporterNodeCells,
-    TTVSetsExporterNodeFactory,
-)
-from .ttv_importer import (
-    TTVSetsImporterNode,
-    TTVSetsImporterNodeCells,
-    TTVSetsImporterNodeFactory,
-)
-from .ttv_merger import (
-    TTVSetsMergerNode,
-    TTVSetsMergerNodeCells,
-    TTVSetsMergerNodeFactory,
-)
-from .ttv_splitter import (
-    TTVSetsSplitterNode,
-    TTVSetsSplitterNodeCells,
-    TTVSetsSplitterNodeFactory,
+from .utils.lazy_nodes import LazyNodeFactory
+
+# Name on the node registry, package, node factory, node class and notebook cells
+# class (None if the node can't be exported to a notebook)
+NODES = (
+    (
+        "Datasets/TTV Editor",
+        "ttv_editor",
+        "TTVSetsEditorNodeFactory",
+        "TTVSetsEditorNode",
+        "TTVSetsEditorNodeCells",
+    ),
+    (
+        "Datasets/TTV Importer",
+        "ttv_importer",
+        "TTVSetsImporterNodeFactory",
+        "TTVSetsImporterNode",
+        "TTVSetsImporterNodeCells",
+    ),
+    (
+        "Datasets/TTV Exporter",
+        "ttv_exporter",
+        "TTVSetsExporterNodeFactory",
+        "TTVSetsExporterNode",
+        "TTVSetsExporterNodeCells",
+    ),
+    (
+        "Datasets/Split TTV",
+        "ttv_splitter",
+        "TTVSetsSplitterNodeFactory",
+        "TTVSetsSplitterNode",
+        "TTVSetsSplitterNodeCells",
+    ),
+    (
+        "Datasets/Merge TTV",
+        "ttv_merger",
+        "TTVSetsMergerNodeFactory",
+        "TTVSetsMergerNode",
+        "TTVSetsMergerNodeCells",
+    ),
+    (
+        "Datasets/Data Augmentation",
+        "data_augmentation",
+        "DataAugmentationNodeFactory",
+        "DataAugmentationNode",
+        "DataAugmentationNodeCells",
+    ),
+    (
+        "Datasets/Predefined TTVs",
+        "predefined_ttv",
+        "PredefinedTTVSetsNodeFactory",
+        "PredefinedTTVSetsNode",
+        "PredefinedTTVSetsNodeCells",
+    ),
+    (
+        "Models/Layers Editor",
+        "layers_editor",
+        "LayersEditorNodeFactory",
+        "LayersEditorNode",
+        "LayersEditorNodeCells",
+    ),
+    (
+        "Models/Predefined Models",
+        "predefined_models",
+        "PredefinedModelsNodeFactory",
+        "PredefinedModelsNode",
+        "PredefinedModelsNodeCells",
+    ),
+    (
+        "Models/Model Loader",
+        "model_loader",
+        "ModelLoaderNodeFactory",
+        "ModelLoaderNode",
+        None,
+    ),
+    (
+        "Training/Hyperparameters Config",
+        "hyperparameters_config",
+        "HyperparametersConfigNodeGuiFactory",
+        "HyperparametersConfigNode",
+        "HyperparametersConfigNodeCells",
+    ),
+    (
+        "Training/Training Console",
+        "training_console",
+        "TrainingConsoleNodeFactory",
+        "TrainingConsoleNode",
+        "TrainingConsoleNodeCells",
+    ),
+    (
+        "Training/Test Model",
+        "test_model",
+        "TestModelNodeFactory",
+        "TestModelNode",
+        "TestModelNodeCells",
+    ),
+    (
+        "Training/ModelCheckpoint Callback",
+        "model_checkpoint",
+        "ModelCheckpointNodeFactory",
+        "ModelCheckpointNode",
+        "ModelCheckpointNodeCells",
+    ),
 )
 
-from .model_loader import (
-    ModelLoaderNode,
-    ModelLoaderNodeFactory
-)
+# Classes exported by this package, and the package they're imported from
+_EXPORTS: Dict[str, str] = {
+    **{
+        name: package
+        for _, package, factory, node, cells in NODES
+        for name in (factory, node, cells)
+        if name is not None
+    },
+    "HyperparametersConfigNodeFactory": "hyperparameters_config",
+}
+
+# Node factories registered by `load_plugin`, by their name on the node registry
+_lazy_factories: Dict[str, "LazyNodeFactory"] = {}
 
 
 def load_plugin():
     node_registry = NodeRegistrySingleton()
-
-    # Register Node
-    node_registry.register_node("Datasets/TTV Editor", TTVSetsEditorNodeFactory)
-    node_registry.register_node("Datasets/TTV Importer", TTVSetsImporterNodeFactory)
-    node_registry.register_node("Datasets/TTV Exporter", TTVSetsExporterNodeFactory)
-    node_registry.register_node("Datasets/Split TTV", TTVSetsSplitterNodeFactory)
-    node_registry.register_node("Datasets/Merge TTV", TTVSetsMergerNodeFactory)
-    node_registry.register_node(
-        "Datasets/Data Augmentation", DataAugmentationNodeFactory
-    )
-    node_registry.register_node(
-        "Datasets/Predefined TTVs", PredefinedTTVSetsNodeFactory
-    )
-    node_registry.register_node("Models/Layers Editor", LayersEditorNodeFactory)
-    node_registry.register_node("Models/Predefined Models", PredefinedModelsNodeFactory)
-    node_registry.register_node("Models/Model Loader", ModelLoaderNodeFactory)
-    node_registry.register_node(
-        "Training/Hyperparameters Config", HyperparametersConfigNodeGuiFactory
-    )
-    node_registry.register_node("Training/Training Console", TrainingConsoleNodeFactory)
-    node_registry.register_node("Training/Test Model", TestModelNodeFactory)
-    node_registry.register_node(
-        "Training/ModelCheckpoint Callback", ModelCheckpointNodeFactory
-    )
-
-    # Register Notebook Transformers
     node_cells_registry = NodeCellsRegistrySingleton()
-    node_cells_registry.register_transformer(TTVSetsEditorNode, TTVSetsEditorNodeCells)
-    node_cells_registry.register_transformer(
-        TTVSetsImporterNode, TTVSetsImporterNodeCells
-    )
-    node_cells_registry.register_transformer(
-        TTVSetsExporterNode, TTVSetsExporterNodeCells
-    )
-    node_cells_registry.register_transformer(
-        TTVSetsSplitterNode, TTVSetsSplitterNodeCells
-    )
-    node_cells_registry.register_transformer(TTVSetsMergerNode, TTVSetsMergerNodeCells)
-    node_cells_registry.register_transformer(
-        DataAugmentationNode, DataAugmentationNodeCells
-    )
-    node_cells_registry.register_transformer(
-        HyperparametersConfigNode, HyperparametersConfigNodeCells
-    )
-    node_cells_registry.register_transformer(TestModelNode, TestModelNodeCells)
-    node_cells_registry.register_transformer(
-        ModelCheckpointNode, ModelCheckpointNodeCells
-    )
-    node_cells_registry.register_transformer(LayersEditorNode, LayersEditorNodeCells)
-    node_cells_registry.register_transformer(
-        TrainingConsoleNode, TrainingConsoleNodeCells
-    )
-    node_cells_registry.register_transformer(
-        PredefinedModelsNode, PredefinedModelsNodeCells
-    )
-    node_cells_registry.register_transformer(
-        PredefinedTTVSetsNode, PredefinedTTVSetsNodeCells
-    )
+
+    for name, package, factory, node, cells in NODES:
+        lazy_factory = LazyNodeFactory(f"{__name__}.{package}", factory)
+        _lazy_factories[name] = lazy_factory
+
+        # Register Node
+        node_registry.register_node(name, providers.Factory(lazy_factory))
+
+        # Each node package registers its notebook cells when it's imported (So nodes
+        # created without the factory, e.g. unpickled, have them too). The packages
+        # imported before a previous `unload_plugin` have to register them again.
+        module = sys.modules.get(lazy_factory.module_name)
+
+        if module is not None and cells is not None:
+            node_cells_registry.register_transformer(
+                getattr(module, node), getattr(module, cells)
+            )
 
 
 def unload_plugin():
     node_registry = NodeRegistrySingleton()
-
-    # Unregister Nodes
-    node_registry.unregister_node("Datasets/TTV Editor")
-    node_registry.unregister_node("Datasets/TTV Importer")
-    node_registry.unregister_node("Datasets/TTV Exporter")
-    node_registry.unregister_node("Datasets/Split TTV")
-    node_registry.unregister_node("Datasets/Merge TTV")
-    node_registry.unregister_node("Datasets/Data Augmentation")
-    node_registry.unregister_node("Datasets/Predefined TTVs")
-    node_registry.unregister_node("Models/Layers Editor")
-    node_registry.unregister_node("Models/Predefined Models")
-    node_registry.unregister_node("Models/Model Loader")
-    node_registry.unregister_node("Training/Hyperparameters Config")
-    node_registry.unregister_node("Training/Training Console")
-    node_registry.unregister_node("Training/Test Model")
-    node_registry.unregister_node(
-        "Training/ModelCheckpoint Callback", ModelCheckpointNodeFactory
-    )
-    node_registry.unregister_node("Debugging/Dummy")
-
-    # Unregister Notebook Transformers
     node_cells_registry = NodeCellsRegistrySingleton()
-    node_cells_registry.unregister_transformer(TTVSetsEditorNode)
-    node_cells_registry.unregister_transformer(TTVSetsImporterNodeCells)
-    node_cells_registry.unregister_transformer(TTVSetsExporterNodeCells)
-    node_cells_registry.unregister_transformer(TTVSetsSplitterNodeCells)
-    node_cells_registry.unregister_transformer(TTVSetsMergerNodeCells)
-    node_cells_registry.unregister_transformer(DataAugmentationNodeCells)
-    node_cells_registry.unregister_transformer(PredefinedTTVSetsNodeCells)
-    node_cells_registry.unregister_transformer(HyperparametersConfigNodeCells)
-    node_cells_registry.unregister_transformer(LayersEditorNodeCells)
-    node_cells_registry.unregister_transformer(PredefinedModelsNodeCells)
-    node_cells_registry.unregister_transformer(TrainingConsoleNodeCells)
-    node_cells_registry.unregister_transformer(TestModelNodeCells)
-    node_registry.unregister_node(ModelCheckpointNodeCells)
-    #node_registry.unregister_node(DummyNodeCells)
-
-
-#load_plugin()
+
+    for name, package, _, node, cells in NODES:
+        _lazy_factories.pop(name, None)
+
+        # Unregister Node
+        node_registry.unregister_node(name)
+
+        # Unregister Notebook Transformers (Only registered for the imported nodes)
+        module = sys.modules.get(f"{__name__}.{package}")
+
+        if module is not None and cells is not None:
+            node_cells_registry.unregister_transformer(getattr(module, node))
+
+
+def __getattr__(name: str) -> Any:
+    """Imports the exported classes on their first access (PEP 562)."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+# Python 3.6 doesn't support `__getattr__` on modules, so the classes are imported now
+if sys.version_info < (3, 7):
+    globals().update({name: __getattr__(name) for name in _EXPORTS})
 
 __all__ = [
     "load_plugin",
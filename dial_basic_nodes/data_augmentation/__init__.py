@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .data_augmentation_node import (
     DataAugmentationNode,
     DataAugmentationNodeFactory,
@@ -10,6 +12,10 @@ from .data_augmentation_widget import (
     DataAugmentationWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    DataAugmentationNode, DataAugmentationNodeCells
+)
+
 __all__ = [
     "DataAugmentationNode",
     "DataAugmentationNodeFactory",
@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .hyperparameters_config_node import (
     HyperparametersConfigNode,
     HyperparametersConfigNodeFactory,
@@ -17,6 +19,10 @@ from .hyperparameters_config_widget_gui import (
     HyperparametersConfigWidgetGuiFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    HyperparametersConfigNode, HyperparametersConfigNodeCells
+)
+
 __all__ = [
     "HyperparametersConfigNode",
     "HyperparametersConfigNodeFactory",
@@ -0,0 +1,252 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Search of the batch size with the best training throughput.
+
+Short training bursts are run on a copy of the model with growing batch sizes (powers
+of two). The search stops when the memory taken by a burst goes over the budget, when
+an out-of-memory error is raised, or when the throughput has decreased for two
+consecutive sizes.
+
+The memory budget is per batch size: It limits the memory added by each burst over the
+memory in use before it. On GPU, that's the peak memory allocated on the device during
+the burst. On CPU, it's the increase of the resident memory of the process, which can
+only be measured where /proc is available (Otherwise, the budget isn't checked).
+"""
+
+import gc
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import tensorflow as tf
+from dial_core.utils import log
+from PySide2.QtCore import QThread, Signal
+from tensorflow import keras
+
+from dial_basic_nodes.utils.input_pipeline import build_input_pipeline, count_samples
+from dial_basic_nodes.utils.lazy_weights import ensure_weights_loaded
+from dial_basic_nodes.utils.memory import current_rss
+
+if TYPE_CHECKING:
+    from dial_core.datasets import Dataset
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+
+def default_memory_budget() -> int:
+    """Returns 75% of the available physical memory of the machine (Or of the total
+    physical memory, if the available one isn't known), in bytes. 0 if none is known."""
+    for pages_name in ("SC_AVPHYS_PAGES", "SC_PHYS_PAGES"):
+        try:
+            return int(os.sysconf(pages_name) * os.sysconf("SC_PAGE_SIZE") * 0.75)
+        except (AttributeError, ValueError, OSError):
+            continue
+
+    return 0
+
+
+class BatchSizeTuner:
+    """The BatchSizeTuner class measures the training throughput (samples/s) of a model
+    on a dataset with different batch sizes.
+
+    The model isn't modified, as the bursts are run on a copy of it. The copy is made
+    when the tuner is created, so a tuner created on the GUI thread can be run on a
+    worker thread without touching a model the GUI may be using.
+    """
+
+    def __init__(
+        self,
+        model: "Model",
+        dataset: "Dataset",
+        optimizer: str,
+        loss_function: str,
+        memory_budget: int = 0,
+        min_batch_size: int = 8,
+        max_batch_size: int = 4096,
+        steps: int = 10,
+    ):
+        """
+        Args:
+            model: The model to train.
+            dataset: The dataset the model is trained on.
+            optimizer: Name of the optimizer used for training.
+            loss_function: Name of the loss function used for training.
+            memory_budget: Maximum memory a single batch size can take (Over the memory
+                in use before trying it), in bytes (0 for no limit).
+            min_batch_size: First batch size tried.
+            max_batch_size: Last batch size tried (Also limited by the dataset size).
+            steps: Number of timed training steps for each batch size.
+        """
+        # Lazy weights are loaded here, before copying them
+        ensure_weights_loaded(model)
+
+        self._model = keras.models.clone_model(model)
+        self._model.set_weights(model.get_weights())
+        self._dataset = dataset
+        self._optimizer = optimizer
+        self._loss_function = loss_function
+
+        self.memory_budget = memory_budget
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.steps = steps
+
+        self._stop_requested = False
+
+        # Device whose memory is measured (None for the process memory)
+        self._gpu_device: Optional[str] = None
+
+    def stop(self):
+        """Stops the search after the current burst."""
+        self._stop_requested = True
+
+    def tune(
+        self, on_measure: Optional[Callable[[int, float], None]] = None
+    ) -> Tuple[Optional[int], Dict[int, float]]:
+        """Searches the batch size with the best throughput.
+
+        Args:
+            on_measure: Function called with each batch size and its throughput.
+
+        Returns:
+            The best batch size (None if none could be measured), and the throughput
+            measured for each batch size.
+        """
+        self._stop_requested = False
+
+        samples_count = count_samples(self._dataset)
+        max_batch_size = min(self.max_batch_size, samples_count)
+
+        model = self._model
+        model.compile(optimizer=self._optimizer, loss=self._loss_function)
+
+        self._gpu_device = "GPU:0" if tf.config.list_logical_devices("GPU") else None
+
+        if self.memory_budget and self._gpu_device is None and current_rss() is None:
+            LOGGER.warning(
+                "The process memory can't be measured, the memory budget is ignored"
+            )
+
+        throughputs: Dict[int, float] = {}
+        decreases = 0
+        batch_size = self.min_batch_size
+
+        while batch_size <= max_batch_size and not self._stop_requested:
+            try:
+                throughput = self._measure(model, batch_size)
+
+            except (tf.errors.ResourceExhaustedError, MemoryError) as err:
+                LOGGER.warning("Out of memory with batch size %s: %s", batch_size, err)
+                break
+
+            if throughput is None:
+                LOGGER.info("Memory budget exceeded with batch size %s", batch_size)
+                break
+
+            LOGGER.info("Batch size %s: %.1f samples/s", batch_size, throughput)
+
+            if throughputs and throughput < max(throughputs.values()):
+                decreases += 1
+            else:
+                decreases = 0
+
+            throughputs[batch_size] = throughput
+
+            if on_measure:
+                on_measure(batch_size, throughput)
+
+            if decreases >= 2:
+                break
+
+            batch_size *= 2
+            gc.collect()
+
+        best_batch_size = max(throughputs, key=throughputs.__getitem__, default=None)
+
+        return best_batch_size, throughputs
+
+    def _measure(self, model: "Model", batch_size: int) -> Optional[float]:
+        """Returns the throughput (samples/s) of training with `batch_size`, or None if
+        the memory budget was exceeded."""
+        baseline = self._memory_baseline()
+
+        # The first step also traces the train function for the new batch size
+        pipeline = build_input_pipeline(self._dataset, batch_size).repeat()
+        batches = iter(pipeline)
+
+        x, y = next(batches)
+        model.train_on_batch(x, y)
+
+        samples = 0
+        elapsed = 0.0
+
+        for _ in range(self.steps):
+            x, y = next(batches)
+
+            start = time.perf_counter()
+            model.train_on_batch(x, y)
+            elapsed += time.perf_counter() - start
+
+            samples += int(x.shape[0])
+
+            if self.memory_budget and baseline is not None:
+                if self._memory_increase(baseline) > self.memory_budget:
+                    return None
+
+        return samples / elapsed if elapsed else None
+
+    def _memory_baseline(self) -> Optional[int]:
+        """Returns the memory in use before a burst, in bytes (None if it can't be
+        measured)."""
+        if self._gpu_device is not None:
+            tf.config.experimental.reset_memory_stats(self._gpu_device)
+
+            return tf.config.experimental.get_memory_info(self._gpu_device)["current"]
+
+        return current_rss()
+
+    def _memory_increase(self, baseline: int) -> int:
+        """Returns the memory taken since `baseline` was measured, in bytes (On GPU,
+        the peak memory allocated since then)."""
+        if self._gpu_device is not None:
+            memory_info = tf.config.experimental.get_memory_info(self._gpu_device)
+
+            return memory_info["peak"] - baseline
+
+        return (current_rss() or baseline) - baseline
+
+
+class BatchSizeTunerWorker(QThread):
+    """Runs a `BatchSizeTuner` on a separate thread."""
+
+    measured = Signal(int, float)
+    tuned = Signal(object)
+
+    def __init__(self, tuner: "BatchSizeTuner"):
+        super().__init__()
+
+        self._tuner = tuner
+        self.throughputs: Dict[int, float] = {}
+
+    def run(self):
+        try:
+            best_batch_size, self.throughputs = self._tuner.tune(
+                on_measure=self.measured.emit
+            )
+        except Exception as err:
+            LOGGER.exception("Batch size tuning failed: %s", err)
+            best_batch_size = None
+
+        self.tuned.emit(best_batch_size)
+
+    def stop(self):
+        self._tuner.stop()
+
+
+def describe_throughputs(throughputs: Dict[int, float]) -> List[str]:
+    """Returns a line of text for each measured batch size."""
+    return [
+        f"{batch_size}: {throughput:.1f} samples/s"
+        for batch_size, throughput in sorted(throughputs.items())
+    ]
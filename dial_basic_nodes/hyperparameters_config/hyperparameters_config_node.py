@@ -3,7 +3,9 @@
 from typing import TYPE_CHECKING
 
 import dependency_injector.providers as providers
+from dial_core.datasets import TTVSets
 from dial_core.node_editor import Node
+from tensorflow.keras import Model
 
 from .hyperparameters_config_widget_gui import HyperparametersConfigWidgetGuiFactory
 
@@ -21,6 +23,13 @@ class HyperparametersConfigNode(Node):
             title="Hyperparameters Config", inner_widget=hyperparameters_config_widget,
         )
 
+        # Optional, used for tuning the hyperparameters
+        self.add_input_port("Model", port_type=Model)
+        self.add_input_port("TTV Sets", port_type=TTVSets)
+
+        self.inputs["Model"].set_processor_function(self.inner_widget.set_model)
+        self.inputs["TTV Sets"].set_processor_function(self.inner_widget.set_ttv)
+
         self.add_output_port("Hyperparameters", port_type=dict)
         self.outputs["Hyperparameters"].set_generator_function(self.get_hyperparameters)
 
@@ -3,7 +3,7 @@
 import dependency_injector.providers as providers
 
 from enum import Enum
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 
 class HyperparametersConfigWidget:
@@ -12,6 +12,7 @@ class HyperparametersConfigWidget:
         LossFunction = "loss_function"
         Optimizer = "optimizer"
         BatchSize = "batch_size"
+        Sweep = "sweep"
 
     def __init__(self):
 
@@ -44,6 +45,10 @@ class HyperparametersConfigWidget:
             "is_categorical_crossentropy",
         ]
 
+        # Optional inputs, used for tuning the hyperparameters
+        self._model = None
+        self._ttv = None
+
         self._hyperparameters = {
             self.Parameters.Epochs.value: 1,
             self.Parameters.LossFunction.value: self._available_loss_functions[0],
@@ -54,11 +59,20 @@ class HyperparametersConfigWidget:
     def get_hyperparameters(self):
         return self._hyperparameters
 
+    def set_model(self, model):
+        """Sets the model used for tuning the hyperparameters."""
+        self._model = model
+
+    def set_ttv(self, ttv):
+        """Sets the TTVSets used for tuning the hyperparameters."""
+        self._ttv = ttv
+
     def set_hyperparameters(self, hyperparameters: Dict[str, Any]):
         self.set_epochs(hyperparameters[self.Parameters.Epochs.value])
         self.set_loss_function(hyperparameters[self.Parameters.LossFunction.value])
         self.set_optimizer(hyperparameters[self.Parameters.Optimizer.value])
-        self.set_batch_size(hyperparameters[self.Parameters.batch_size.value])
+        self.set_batch_size(hyperparameters[self.Parameters.BatchSize.value])
+        self.set_sweep(hyperparameters.get(self.Parameters.Sweep.value))
 
     def get_epochs(self) -> int:
         return self._hyperparameters[self.Parameters.Epochs.value]
@@ -96,5 +110,47 @@ class HyperparametersConfigWidget:
     def set_batch_size(self, batch_size: int):
         self._hyperparameters[self.Parameters.BatchSize.value] = batch_size
 
+    def get_sweep(self) -> Optional[Dict[str, Any]]:
+        return self._hyperparameters.get(self.Parameters.Sweep.value)
+
+    def set_sweep(self, sweep: Optional[Dict[str, Any]]):
+        """Sets the hyperparameters sweep (Or disables it, if `sweep` is None).
+
+        The sweep is a dictionary with:
+            search_space: Values to try for each hyperparameter.
+            mode: How trials are chosen ("grid" or "random").
+            max_trials: Maximum number of trials on "random" mode.
+            concurrency: Number of trials trained at the same time.
+            monitor: Metric used for ranking the trials ("val_accuracy" by default).
+            monitor_mode: Whether the best trials have the lowest ("min") or highest
+                ("max", by default) value of `monitor`.
+        """
+        if not sweep:
+            self._hyperparameters.pop(self.Parameters.Sweep.value, None)
+            return
+
+        search_space = sweep["search_space"]
+
+        for optimizer in search_space.get(self.Parameters.Optimizer.value, []):
+            if optimizer not in self._available_optimizers:
+                raise ValueError(f"`{optimizer}` is an invalid optimizer!")
+
+        for loss_function in search_space.get(self.Parameters.LossFunction.value, []):
+            if loss_function not in self._available_loss_functions:
+                raise ValueError(f"`{loss_function}` is an invalid loss function!")
+
+        # Losses of different loss functions aren't comparable
+        monitor = sweep.get("monitor", "val_accuracy")
+
+        if (
+            monitor.endswith("loss")
+            and len(search_space.get(self.Parameters.LossFunction.value, [])) > 1
+        ):
+            raise ValueError(
+                f"Sweeps over the loss function can't be ranked by {monitor}"
+            )
+
+        self._hyperparameters[self.Parameters.Sweep.value] = sweep
+
 
 HyperparametersConfigWidgetFactory = providers.Factory(HyperparametersConfigWidget)
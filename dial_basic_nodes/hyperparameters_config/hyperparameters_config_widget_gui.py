@@ -1,12 +1,34 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
-from typing import List
+import os
+from typing import Any, Dict, Optional
 
 import dependency_injector.providers as providers
+from dial_core.utils import log
 from PySide2.QtCore import QSize
-from PySide2.QtWidgets import QComboBox, QFormLayout, QSpinBox, QWidget
+from PySide2.QtWidgets import (
+    QComboBox,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSpinBox,
+    QVBoxLayout,
+    QWidget,
+)
 
+from .batch_size_tuner import (
+    BatchSizeTuner,
+    BatchSizeTunerWorker,
+    default_memory_budget,
+    describe_throughputs,
+)
 from .hyperparameters_config_widget import HyperparametersConfigWidget
+from .search_space import SearchMode, parse_values
+
+LOGGER = log.get_logger(__name__)
 
 
 class HyperparametersConfigWidgetGui(QWidget, HyperparametersConfigWidget):
@@ -32,20 +54,117 @@ class HyperparametersConfigWidgetGui(QWidget, HyperparametersConfigWidget):
         self._batch_size_spinbox.setMinimum(1)
         self._batch_size_spinbox.setMaximum(999999)
 
+        self._tune_batch_size_button = QPushButton("Tune")
+        self._tune_batch_size_button.setToolTip(
+            "Find the batch size with the best training throughput for the connected "
+            "model and TTV Sets"
+        )
+
+        batch_size_layout = QHBoxLayout()
+        batch_size_layout.addWidget(self._batch_size_spinbox)
+        batch_size_layout.addWidget(self._tune_batch_size_button)
+
+        self._memory_budget_spinbox = QSpinBox(parent=self)
+        self._memory_budget_spinbox.setRange(0, 1024 * 1024)
+        self._memory_budget_spinbox.setSuffix(" MB")
+        self._memory_budget_spinbox.setSpecialValueText("No limit")
+        self._memory_budget_spinbox.setValue(default_memory_budget() // 2 ** 20)
+
+        self._tuning_label = QLabel()
+        self._tuning_label.setWordWrap(True)
+
+        # Sweep widgets (Each textbox holds a comma separated list of values)
+        self._sweep_epochs_textbox = QLineEdit()
+        self._sweep_epochs_textbox.setPlaceholderText("e.g. 5, 10, 20")
+
+        self._sweep_optimizers_textbox = QLineEdit()
+        self._sweep_optimizers_textbox.setPlaceholderText("e.g. Adam, SGD")
+
+        self._sweep_loss_functions_textbox = QLineEdit()
+        self._sweep_loss_functions_textbox.setPlaceholderText(
+            "e.g. mean_squared_error, huber_loss"
+        )
+
+        self._sweep_batch_sizes_textbox = QLineEdit()
+        self._sweep_batch_sizes_textbox.setPlaceholderText("e.g. 16, 32, 64")
+
+        self._sweep_mode_combobox = QComboBox()
+        self._sweep_mode_combobox.addItem("Grid", SearchMode.Grid.value)
+        self._sweep_mode_combobox.addItem("Random", SearchMode.Random.value)
+
+        self._sweep_max_trials_spinbox = QSpinBox()
+        self._sweep_max_trials_spinbox.setRange(1, 10000)
+        self._sweep_max_trials_spinbox.setValue(8)
+
+        self._sweep_concurrency_spinbox = QSpinBox()
+        self._sweep_concurrency_spinbox.setRange(1, os.cpu_count() or 1)
+        self._sweep_concurrency_spinbox.setValue(
+            min(2, self._sweep_concurrency_spinbox.maximum())
+        )
+
+        self._sweep_error_label = QLabel()
+        self._sweep_error_label.setWordWrap(True)
+
+        self._sweep_textboxes = {
+            self.Parameters.Epochs.value: (self._sweep_epochs_textbox, int),
+            self.Parameters.Optimizer.value: (self._sweep_optimizers_textbox, str),
+            self.Parameters.LossFunction.value: (
+                self._sweep_loss_functions_textbox,
+                str,
+            ),
+            self.Parameters.BatchSize.value: (self._sweep_batch_sizes_textbox, int),
+        }
+
         # Layouts
-        self._main_layout = QFormLayout()
-        self._main_layout.addRow("Epochs", self._epoch_spinbox)
-        self._main_layout.addRow("Optimizer", self._optimizer_combobox)
-        self._main_layout.addRow("Loss function", self._loss_function_combobox)
-        self._main_layout.addRow("Batch size", self._batch_size_spinbox)
+        self._parameters_layout = QFormLayout()
+        self._parameters_layout.addRow("Epochs", self._epoch_spinbox)
+        self._parameters_layout.addRow("Optimizer", self._optimizer_combobox)
+        self._parameters_layout.addRow("Loss function", self._loss_function_combobox)
+        self._parameters_layout.addRow("Batch size", batch_size_layout)
+        self._parameters_layout.addRow(
+            "Tuning memory budget (per batch)", self._memory_budget_spinbox
+        )
+        self._parameters_layout.addRow(self._tuning_label)
+
+        self._sweep_layout = QFormLayout()
+        self._sweep_layout.addRow("Epochs", self._sweep_epochs_textbox)
+        self._sweep_layout.addRow("Optimizers", self._sweep_optimizers_textbox)
+        self._sweep_layout.addRow(
+            "Loss functions", self._sweep_loss_functions_textbox
+        )
+        self._sweep_layout.addRow("Batch sizes", self._sweep_batch_sizes_textbox)
+        self._sweep_layout.addRow("Search", self._sweep_mode_combobox)
+        self._sweep_layout.addRow("Max trials", self._sweep_max_trials_spinbox)
+        self._sweep_layout.addRow("Concurrency", self._sweep_concurrency_spinbox)
+        self._sweep_layout.addRow(self._sweep_error_label)
+
+        self._sweep_group = QGroupBox("Sweep")
+        self._sweep_group.setCheckable(True)
+        self._sweep_group.setChecked(False)
+        self._sweep_group.setLayout(self._sweep_layout)
+
+        self._main_layout = QVBoxLayout()
+        self._main_layout.addLayout(self._parameters_layout)
+        self._main_layout.addWidget(self._sweep_group)
         self.setLayout(self._main_layout)
 
+        self._tuner_worker: Optional[BatchSizeTunerWorker] = None
+
         # Hyperparameters dictionary
         self._epoch_spinbox.valueChanged.connect(self.set_epochs)
         self._loss_function_combobox.currentTextChanged.connect(self.set_loss_function)
         self._optimizer_combobox.currentTextChanged.connect(self.set_optimizer)
         self._batch_size_spinbox.valueChanged.connect(self.set_batch_size)
 
+        self._tune_batch_size_button.clicked.connect(self.tune_batch_size)
+
+        self._sweep_group.toggled.connect(self._update_sweep)
+        for textbox, _ in self._sweep_textboxes.values():
+            textbox.editingFinished.connect(self._update_sweep)
+        self._sweep_mode_combobox.currentIndexChanged.connect(self._update_sweep)
+        self._sweep_max_trials_spinbox.valueChanged.connect(self._update_sweep)
+        self._sweep_concurrency_spinbox.valueChanged.connect(self._update_sweep)
+
     def set_epochs(self, epochs: int):
         super().set_epochs(epochs)
 
@@ -66,6 +185,121 @@ class HyperparametersConfigWidgetGui(QWidget, HyperparametersConfigWidget):
 
         self._batch_size_spinbox.setValue(batch_size)
 
+    def tune_batch_size(self):
+        """Starts searching the batch size with the best throughput on the connected
+        model and TTV Sets. The batch size is updated when the search finishes.
+
+        If a search is already running, it's stopped instead.
+        """
+        if self._tuner_worker and self._tuner_worker.isRunning():
+            self._tuner_worker.stop()
+            return
+
+        if self._model is None or self._ttv is None or not self._ttv.train:
+            self._tuning_label.setText(
+                "Connect a Model and a TTV Sets to tune the batch size."
+            )
+            return
+
+        # Created on the GUI thread, as it loads the lazy weights and copies the model
+        tuner = BatchSizeTuner(
+            self._model,
+            self._ttv.train,
+            self.get_optimizer(),
+            self.get_loss_function(),
+            memory_budget=self._memory_budget_spinbox.value() * 2 ** 20,
+        )
+
+        self._tuner_worker = BatchSizeTunerWorker(tuner)
+        self._tuner_worker.measured.connect(
+            lambda batch_size, throughput: self._tuning_label.setText(
+                f"Batch size {batch_size}: {throughput:.1f} samples/s"
+            )
+        )
+        self._tuner_worker.tuned.connect(self._batch_size_tuned)
+
+        self._tune_batch_size_button.setText("Stop")
+        self._tuning_label.setText("Tuning batch size...")
+
+        self._tuner_worker.start()
+
+    def _batch_size_tuned(self, best_batch_size: Optional[int]):
+        self._tune_batch_size_button.setText("Tune")
+
+        if best_batch_size is None or self._tuner_worker is None:
+            self._tuning_label.setText("Couldn't measure any batch size.")
+            return
+
+        throughputs = self._tuner_worker.throughputs
+
+        self.set_batch_size(best_batch_size)
+
+        self._tuning_label.setText(
+            f"Best batch size: {best_batch_size} "
+            f"({throughputs[best_batch_size]:.1f} samples/s)"
+        )
+        self._tuning_label.setToolTip("\n".join(describe_throughputs(throughputs)))
+
+    def set_sweep(self, sweep: Optional[Dict[str, Any]]):
+        super().set_sweep(sweep)
+
+        widgets = [
+            self._sweep_group,
+            self._sweep_mode_combobox,
+            self._sweep_max_trials_spinbox,
+            self._sweep_concurrency_spinbox,
+        ] + [textbox for textbox, _ in self._sweep_textboxes.values()]
+
+        # Avoid updating the sweep again while its widgets are changed
+        for widget in widgets:
+            widget.blockSignals(True)
+
+        self._sweep_group.setChecked(bool(sweep))
+
+        if sweep:
+            for name, (textbox, _) in self._sweep_textboxes.items():
+                values = sweep["search_space"].get(name, [])
+                textbox.setText(", ".join(str(value) for value in values))
+
+            self._sweep_mode_combobox.setCurrentIndex(
+                self._sweep_mode_combobox.findData(sweep["mode"])
+            )
+            self._sweep_max_trials_spinbox.setValue(sweep["max_trials"])
+            self._sweep_concurrency_spinbox.setValue(sweep["concurrency"])
+
+        for widget in widgets:
+            widget.blockSignals(False)
+
+    def _update_sweep(self):
+        """Sets the sweep described by the widgets of the "Sweep" group."""
+        if not self._sweep_group.isChecked():
+            super().set_sweep(None)
+            return
+
+        try:
+            search_space = {}
+
+            for name, (textbox, cast) in self._sweep_textboxes.items():
+                values = parse_values(textbox.text(), cast)
+
+                if values:
+                    search_space[name] = values
+
+            super().set_sweep(
+                {
+                    "search_space": search_space,
+                    "mode": self._sweep_mode_combobox.currentData(),
+                    "max_trials": self._sweep_max_trials_spinbox.value(),
+                    "concurrency": self._sweep_concurrency_spinbox.value(),
+                }
+            )
+
+            self._sweep_error_label.clear()
+
+        except ValueError as err:
+            LOGGER.warning("Invalid sweep: %s", err)
+            self._sweep_error_label.setText(f"Invalid sweep: {err}")
+
     def sizeHint(self) -> "QSize":
         return QSize(350, 200)
 
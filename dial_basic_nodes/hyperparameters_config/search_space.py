@@ -0,0 +1,76 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Search spaces for hyperparameter sweeps.
+
+A search space maps each hyperparameter name to the list of values to try. The
+hyperparameters without a search space keep their single value on every trial.
+"""
+
+import itertools
+import random
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SearchMode(Enum):
+    Grid = "grid"
+    Random = "random"
+
+
+def parse_values(text: str, cast: Callable[[str], Any] = str) -> List[Any]:
+    """Parses a comma separated list of values (e.g. "16, 32, 64").
+
+    Raises:
+        ValueError: If any of the values can't be casted with `cast`.
+    """
+    return [cast(value.strip()) for value in text.split(",") if value.strip()]
+
+
+def expand_search_space(
+    search_space: Dict[str, List[Any]],
+    mode: "SearchMode" = SearchMode.Grid,
+    max_trials: int = 8,
+    seed: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Returns the combinations of values to try.
+
+    Args:
+        search_space: Values to try for each hyperparameter.
+        mode: Grid returns every combination. Random returns `max_trials` different
+            combinations chosen at random (Or all of them, if there aren't enough).
+        max_trials: Number of combinations returned on Random mode.
+        seed: Seed used for choosing the random combinations.
+    """
+    names = list(search_space)
+    combinations = [
+        dict(zip(names, values))
+        for values in itertools.product(*(search_space[name] for name in names))
+    ]
+
+    if mode == SearchMode.Random and len(combinations) > max_trials:
+        return random.Random(seed).sample(combinations, max_trials)
+
+    return combinations
+
+
+def sweep_trials(hyperparameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Returns the hyperparameters of each trial of the sweep described on
+    `hyperparameters["sweep"]` (Or an empty list if there isn't a sweep)."""
+    sweep = hyperparameters.get("sweep")
+
+    if not sweep:
+        return []
+
+    base_hyperparameters = {
+        name: value for name, value in hyperparameters.items() if name != "sweep"
+    }
+
+    return [
+        {**base_hyperparameters, **combination}
+        for combination in expand_search_space(
+            sweep["search_space"],
+            SearchMode(sweep.get("mode", SearchMode.Grid.value)),
+            sweep.get("max_trials", 8),
+            sweep.get("seed"),
+        )
+    ]
@@ -1,9 +1,15 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .layers_editor_node import LayersEditorNode, LayersEditorNodeFactory
 from .layers_editor_node_cells import LayersEditorNodeCells
 from .layers_editor_widget import LayersEditorWidget, LayersEditorWidgetFactory
 
+NodeCellsRegistrySingleton().register_transformer(
+    LayersEditorNode, LayersEditorNodeCells
+)
+
 __all__ = [
     "LayersEditorNode",
     "LayersEditorNodeFactory",
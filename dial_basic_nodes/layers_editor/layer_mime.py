@@ -0,0 +1,188 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Serialization of Keras layers for drag and drop operations.
+
+Layers are encoded as a compact JSON payload with the class name and config of each
+layer, and decoded into new layer objects on the drop. As only the configs are sent, the
+payload can be dropped on another editor window (Or another process).
+
+The payloads can come from other processes, so only the built-in `keras.layers` classes
+(Which include all the layers of the palette) are accepted. Layers that run code from
+their config (e.g. `Lambda`) are always rejected, even when nested on another layer.
+
+Optionally, each layer can carry a reference to the layer it was encoded from. When
+the payload is decoded on the same process, the new layers remember their source layer
+(See `weights_source`), so their weights can be copied from it when the model is
+rebuilt (e.g. when a layer is moved to another row).
+"""
+
+import functools
+import inspect
+import json
+import os
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Optional
+
+from dial_core.utils import Dial
+from tensorflow import keras
+
+if TYPE_CHECKING:
+    from tensorflow.keras.layers import Layer
+
+MIME_TYPE = Dial.KerasLayerListMIME.value
+
+PAYLOAD_VERSION = 1
+
+_WEIGHTS_SOURCE_ATTRIBUTE = "_dial_weights_source"
+
+# Layers whose config has code (Python functions or TensorFlow operations) to run
+UNSAFE_LAYERS = frozenset({"Lambda", "TFOpLambda", "SlicingOpLambda"})
+
+# Layers referenced by the encoded payloads of this process
+_referenced_layers: "weakref.WeakValueDictionary[int, Layer]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def encode_layers(
+    layers: Iterable["Layer"], with_weights_references: bool = False
+) -> bytes:
+    """Returns the payload of `layers`.
+
+    Args:
+        layers: The layers to encode.
+        with_weights_references: If True, the payload references the encoded layers,
+            so their weights can be reused when decoding it on this process.
+    """
+    entries = []
+
+    for layer in layers:
+        entry = {"class_name": type(layer).__name__, "config": layer.get_config()}
+
+        if with_weights_references:
+            _referenced_layers[id(layer)] = layer
+            entry["weights"] = {"process": os.getpid(), "layer": id(layer)}
+
+        entries.append(entry)
+
+    return encode_configs(entries)
+
+
+def encode_configs(entries: List[Dict[str, Any]]) -> bytes:
+    """Returns the payload of a list of serialized layers (Dictionaries with the
+    `class_name` and `config` of each layer)."""
+    return json.dumps(
+        {"version": PAYLOAD_VERSION, "layers": entries},
+        separators=(",", ":"),
+        default=_json_default,
+    ).encode("utf-8")
+
+
+def decode_layers(payload: bytes) -> List["Layer"]:
+    """Creates new layers from a payload.
+
+    Raises:
+        ValueError: If the payload isn't valid.
+    """
+    try:
+        entries = json.loads(bytes(payload).decode("utf-8"))["layers"]
+
+        # All the entries are read before creating any layer
+        serialized_layers = [
+            (
+                {"class_name": entry["class_name"], "config": entry["config"]},
+                entry.get("weights"),
+            )
+            for entry in entries
+        ]
+    except (KeyError, TypeError, UnicodeDecodeError) as err:
+        raise ValueError(f"Invalid layers payload: {err}") from err
+
+    for serialized_layer, _ in serialized_layers:
+        _check_allowed(serialized_layer)
+
+    layers = []
+
+    for serialized_layer, reference in serialized_layers:
+        try:
+            layer = keras.layers.deserialize(serialized_layer)
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"Invalid layer on the payload: {err}") from err
+
+        # Some Keras versions return unknown class names as they are
+        if not isinstance(layer, keras.layers.Layer):
+            raise ValueError(f"Unknown layer on the payload: {serialized_layer}")
+
+        source = _resolve_reference(reference)
+        if source is not None:
+            setattr(layer, _WEIGHTS_SOURCE_ATTRIBUTE, source)
+
+        layers.append(layer)
+
+    return layers
+
+
+def weights_source(layer: "Layer") -> Optional["Layer"]:
+    """Returns the layer that `layer` was decoded from, if it was on this process."""
+    return getattr(layer, _WEIGHTS_SOURCE_ATTRIBUTE, None)
+
+
+def forget_weights_source(layer: "Layer"):
+    """Releases the source layer of `layer` (Once its weights aren't needed)."""
+    if weights_source(layer) is not None:
+        delattr(layer, _WEIGHTS_SOURCE_ATTRIBUTE)
+
+
+@functools.lru_cache(maxsize=None)
+def allowed_layers() -> FrozenSet[str]:
+    """Returns the class names of the layers that can be decoded from a payload."""
+    return frozenset(
+        name
+        for name, value in vars(keras.layers).items()
+        if inspect.isclass(value) and issubclass(value, keras.layers.Layer)
+    ) - UNSAFE_LAYERS
+
+
+def _check_allowed(serialized_layer: Dict[str, Any]):
+    """Raises ValueError if the layer isn't allowed, or if it has an unsafe layer
+    nested on its config (e.g. a `Lambda` wrapped by a `TimeDistributed` layer)."""
+    class_name = serialized_layer["class_name"]
+
+    if not isinstance(class_name, str) or class_name not in allowed_layers():
+        raise ValueError(f"Layer not allowed on the payload: {class_name}")
+
+    pending_values = [serialized_layer["config"]]
+
+    while pending_values:
+        value = pending_values.pop()
+
+        if isinstance(value, dict):
+            nested_name = value.get("class_name")
+
+            if isinstance(nested_name, str) and nested_name in UNSAFE_LAYERS:
+                raise ValueError(f"Layer not allowed on the payload: {nested_name}")
+
+            pending_values.extend(value.values())
+
+        elif isinstance(value, list):
+            pending_values.extend(value)
+
+
+def _resolve_reference(reference: Any) -> Optional["Layer"]:
+    if not isinstance(reference, dict) or reference.get("process") != os.getpid():
+        return None
+
+    layer_id = reference.get("layer")
+
+    if not isinstance(layer_id, int):
+        return None
+
+    return _referenced_layers.get(layer_id)
+
+
+def _json_default(value: Any) -> Any:
+    """Converts the numpy values found on some configs."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+
+    return str(value)
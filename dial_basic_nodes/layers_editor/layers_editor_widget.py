@@ -3,21 +3,37 @@
 from typing import TYPE_CHECKING
 
 import dependency_injector.providers as providers
-from PySide2.QtCore import QSize, Signal
+from dial_core.utils import log
+from PySide2.QtCore import QSize, QTimer, Signal
 from PySide2.QtWidgets import QHBoxLayout, QSizePolicy, QWidget
-from tensorflow.keras.models import Sequential
+
+from dial_basic_nodes.utils.model_registry import ModelRegistrySingleton
 
 from .layers_tree import LayersTreeWidgetFactory
+from .model_graph import ModelGraph
+from .model_rebuilder import ModelBuildError, ModelRebuilder
 from .model_table import ModelTableWidgetFactory
 
 if TYPE_CHECKING:
     from .layers_tree import LayersTreeWidget
     from .model_table import ModelTableWidget
 
+LOGGER = log.get_logger(__name__)
+
 
 class LayersEditorWidget(QWidget):
     """
     Window for all the model related operations (Create/Modify NN architectures)
+
+    Models that aren't a chain of layers (e.g. with skip connections) keep their
+    topology while edited (See `ModelGraph`). The rest are rebuilt as `Sequential`
+    models.
+
+    Bursts of edits on the layers are coalesced: `layers_modified` is emitted once,
+    after `edit_debounce_interval` milliseconds without new edits.
+
+    If the edited layers can't be built into a model (e.g. halfway through rearranging
+    them), the last model built is kept as the output model.
     """
 
     layers_modified = Signal()
@@ -26,6 +42,7 @@ class LayersEditorWidget(QWidget):
         self,
         layers_tree: "LayersTreeWidget",
         model_table: "ModelTableWidget",
+        edit_debounce_interval: int = 300,
         parent: "QWidget" = None,
     ):
         super().__init__(parent)
@@ -37,6 +54,23 @@ class LayersEditorWidget(QWidget):
         self._model_table = model_table
         self._model_table.setParent(self)
 
+        # Keeps the weights of the unchanged layers between output models
+        self._model_rebuilder = ModelRebuilder()
+
+        # Topology of the input model, if it isn't a chain of layers
+        self._model_graph = None
+
+        # The output model is only rebuilt when the layers change (Each change is a new
+        # revision of the model)
+        self._layers_revision = 0
+        self._output_model = None
+        self._output_model_revision = -1
+
+        self._edit_debounce_timer = QTimer(self)
+        self._edit_debounce_timer.setInterval(edit_debounce_interval)
+        self._edit_debounce_timer.setSingleShot(True)
+        self._edit_debounce_timer.timeout.connect(lambda: self.layers_modified.emit())
+
         # Configure Layout
         self._main_layout = QHBoxLayout()
         self._main_layout.setContentsMargins(0, 0, 0, 0)
@@ -56,18 +90,55 @@ class LayersEditorWidget(QWidget):
         self.setLayout(self._main_layout)
 
         # Setup connections
-        self._model_table.layers_modified.connect(lambda: self.layers_modified.emit())
+        self._model_table.layers_modified.connect(self._on_layers_modified)
 
     def set_input_model(self, model):
+        self._model_graph = ModelGraph.from_model(model)
+
+        if self._model_graph is None:
+            self._model_rebuilder.reset(model)
+
         self._model_table.set_layers(model.layers)
+        self._model_table.set_topology(
+            self._model_graph.inbound_rows if self._model_graph is not None else None
+        )
+
+        try:
+            # Input layers of models that aren't sequential set their own shapes
+            input_shape = model.input_shape if self._model_graph is None else None
+        except (AttributeError, RuntimeError):  # Model not built yet
+            input_shape = None
+
+        self._model_table.set_input_shape(input_shape)
+
+        self._layers_revision += 1
 
     def get_output_model(self):
-        model = Sequential()
+        if self._output_model_revision != self._layers_revision:
+            layers = self._model_table.layers
+            self._output_model_revision = self._layers_revision
+
+            try:
+                if self._model_graph is not None:
+                    output_model = self._model_graph.build(layers)
+                else:
+                    output_model = self._model_rebuilder.rebuild(layers)
+
+            except ModelBuildError as err:
+                LOGGER.warning("Keeping the last output model. %s", err)
+                return self._output_model
+
+            self._output_model = output_model
+
+            # The previous output model is released
+            ModelRegistrySingleton().register(self, self._output_model, "output_model")
 
-        for layer in self._model_table.layers:
-            model.add(layer)
+        return self._output_model
 
-        return model
+    def _on_layers_modified(self):
+        """Restarts the debounce timer, so the edit is notified with the next ones."""
+        self._layers_revision += 1
+        self._edit_debounce_timer.start()
 
     def sizeHint(self) -> "QSize":
         return QSize(600, 300)
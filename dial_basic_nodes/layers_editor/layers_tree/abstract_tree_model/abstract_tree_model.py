@@ -37,6 +37,9 @@ class AbstractTreeNode:
         self.parent = parent
         self.leaves: List["AbstractTreeNode"] = []
 
+        # Position on the parent leaves, kept up to date by `append`
+        self._row = 0
+
     @property
     def row(self) -> int:
         """ Returns the position of this node with respect to its parent children.
@@ -49,13 +52,21 @@ class AbstractTreeNode:
                 |- nodeB    (row() -> 1)
                 |- nodeC    (row() -> 2)
 
+        The position is stored on the node, so it's found in constant time. If the
+        leaves of the parent were modified directly, it's searched again.
+
         Returns:
             Position of the current node.
         """
-        if self.parent:
-            return self.parent.leaves.index(self)
+        if not self.parent:
+            return 0
+
+        leaves = self.parent.leaves
+
+        if self._row >= len(leaves) or leaves[self._row] is not self:
+            self._row = leaves.index(self)
 
-        return 0
+        return self._row
 
     def __getitem__(self, position: int) -> Optional["AbstractTreeNode"]:
         """Gets the child node at position `position`.
@@ -78,6 +89,7 @@ class AbstractTreeNode:
             node: The new `AbstractTreeNode` object to append.
         """
         node.parent = self
+        node._row = len(self.leaves)
         self.leaves.append(node)
 
     def column_value(self, column: int) -> Optional[Any]:
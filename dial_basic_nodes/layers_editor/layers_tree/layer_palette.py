@@ -0,0 +1,257 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Palette of the layers that can be added to a model.
+
+The palette is generated by introspecting `keras.layers`, and it only stores the class
+and constructor arguments of each layer (A `LayerDescriptor`). The real layer objects
+are only created when they're dropped on a model (See `layer_mime`).
+
+The palette is created once and shared by all the Layers Editor nodes.
+"""
+
+import functools
+import inspect
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from tensorflow import keras
+
+# Values for the constructor arguments without a default value
+DEFAULT_ARGUMENTS: Dict[str, Any] = {
+    "units": 10,
+    "filters": 32,
+    "kernel_size": 3,
+    "rate": 0.5,
+    "activation": "relu",
+    "target_shape": (-1,),
+    "dims": (2, 1),
+    "n": 2,
+    "size": 2,
+    "axis": -1,
+    "input_dim": 1000,
+    "output_dim": 64,
+    "pool_size": 2,
+    "cropping": 1,
+    "padding": 1,
+    "stddev": 0.1,
+}
+
+# Layers that can't be used on the editor: Base classes, layers that need other layers
+# or functions as arguments, and layers with several inputs (A new layer only takes the
+# output of the previous row). `Activation` is added through `ACTIVATION_PRESETS`.
+EXCLUDED_LAYERS = {
+    "Layer",
+    "InputLayer",
+    "InputSpec",
+    "Wrapper",
+    "Bidirectional",
+    "TimeDistributed",
+    "RNN",
+    "StackedRNNCells",
+    "Lambda",
+    "AbstractRNNCell",
+    "DenseFeatures",
+    "Attention",
+    "AdditiveAttention",
+    "MultiHeadAttention",
+    "Add",
+    "Subtract",
+    "Multiply",
+    "Average",
+    "Maximum",
+    "Minimum",
+    "Concatenate",
+    "Dot",
+    "Activation",
+}
+
+DEFAULT_CATEGORY = "Core Layers"
+
+# Category of each layer, by the words found on its class name
+CATEGORIES = (
+    ("Convolutional Layers", ("Conv",)),
+    ("Pooling Layers", ("Pool",)),
+    ("Normalization Layers", ("Normalization",)),
+    ("Regularization Layers", ("Dropout", "Noise", "Regularization")),
+    ("Recurrent Layers", ("RNN", "LSTM", "GRU")),
+    ("Activation Layers", ("ReLU", "ELU", "Softmax")),
+    (
+        "Reshaping Layers",
+        ("Reshape", "Flatten", "Permute", "Repeat", "Cropping", "UpSampling"),
+    ),
+)
+
+CATEGORIES_ORDER = [DEFAULT_CATEGORY] + [category for category, _ in CATEGORIES]
+
+# Activation functions shown as layers of their own
+ACTIVATION_PRESETS = ("linear", "elu", "relu", "sigmoid", "softmax", "tanh")
+
+
+class LayerDescriptor:
+    """Description of a layer of the palette: Its class and constructor arguments.
+
+    Attributes:
+        display_name: The name shown on the palette.
+        class_name: The name of the layer class (on `keras.layers`).
+        category: The palette category of the layer.
+        arguments: The arguments passed to the layer constructor.
+    """
+
+    def __init__(
+        self,
+        display_name: str,
+        class_name: str,
+        category: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        layer_name: Optional[str] = None,
+    ):
+        self.display_name = display_name
+        self.class_name = class_name
+        self.category = category
+        self.arguments = arguments or {}
+
+        # Default name of the created layers (e.g. "max_pooling2d")
+        self.layer_name = layer_name or _to_snake_case(class_name)
+
+    @property
+    def search_key(self) -> str:
+        """Text used for searching the layer on the palette."""
+        return f"{self.display_name} {self.class_name} {self.category}".lower()
+
+    def serialize(self) -> Dict[str, Any]:
+        """Returns the layer serialized as by `keras.layers.serialize`, without
+        creating it."""
+        return {
+            "class_name": self.class_name,
+            "config": {"name": self.layer_name, **self.arguments},
+        }
+
+
+class LayerPalette:
+    """The LayerPalette class keeps the layer descriptors, and an index of trigrams for
+    searching them without scanning all their names.
+    """
+
+    def __init__(self, descriptors: Iterable["LayerDescriptor"]):
+        self.descriptors: List["LayerDescriptor"] = list(descriptors)
+
+        self.__trigrams_index: Dict[str, Set[int]] = {}
+
+        for position, descriptor in enumerate(self.descriptors):
+            for trigram in _trigrams(descriptor.search_key):
+                self.__trigrams_index.setdefault(trigram, set()).add(position)
+
+    def categories(self) -> List[str]:
+        """Returns the categories of the palette, in order of appearance."""
+        return list(dict.fromkeys(d.category for d in self.descriptors))
+
+    def search(self, text: str) -> List["LayerDescriptor"]:
+        """Returns the descriptors that contain `text` (case insensitive) on their
+        name, class or category. An empty text matches all the descriptors."""
+        text = text.strip().lower()
+
+        if not text:
+            return list(self.descriptors)
+
+        candidates: Iterable[int] = range(len(self.descriptors))
+
+        # Only the descriptors containing all the trigrams of the text can match
+        if len(text) >= 3:
+            trigram_sets = [
+                self.__trigrams_index.get(trigram, set()) for trigram in _trigrams(text)
+            ]
+            candidates = sorted(set.intersection(*trigram_sets))
+
+        return [
+            self.descriptors[position]
+            for position in candidates
+            if text in self.descriptors[position].search_key
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def layer_palette() -> "LayerPalette":
+    """Returns the palette of layers, introspected from `keras.layers` on the first
+    call."""
+    descriptors = [
+        LayerDescriptor(
+            f"Activation ({activation})",
+            "Activation",
+            "Activation Layers",
+            {"activation": activation},
+            layer_name=activation,
+        )
+        for activation in ACTIVATION_PRESETS
+    ]
+
+    seen_classes = set()
+
+    for name, layer_class in sorted(vars(keras.layers).items()):
+        if (
+            not inspect.isclass(layer_class)
+            or not issubclass(layer_class, keras.layers.Layer)
+            or name != layer_class.__name__  # Aliases (e.g. Convolution2D)
+            or name in EXCLUDED_LAYERS
+            or name.endswith("Cell")
+            or name.startswith("_")
+            or layer_class in seen_classes
+        ):
+            continue
+
+        arguments = _required_arguments(layer_class)
+
+        if arguments is None:
+            continue
+
+        seen_classes.add(layer_class)
+        descriptors.append(LayerDescriptor(name, name, _category(name), arguments))
+
+    descriptors.sort(
+        key=lambda d: (CATEGORIES_ORDER.index(d.category), d.display_name)
+    )
+
+    return LayerPalette(descriptors)
+
+
+def _required_arguments(layer_class: type) -> Optional[Dict[str, Any]]:
+    """Returns the values for the constructor arguments of `layer_class` without a
+    default value, or None if some of them have no known value."""
+    try:
+        parameters = inspect.signature(layer_class).parameters.values()
+    except (TypeError, ValueError):
+        return None
+
+    arguments = {}
+
+    for parameter in parameters:
+        if (
+            parameter.name == "self"
+            or parameter.default is not inspect.Parameter.empty
+            or parameter.kind
+            in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+        ):
+            continue
+
+        if parameter.name not in DEFAULT_ARGUMENTS:
+            return None
+
+        arguments[parameter.name] = DEFAULT_ARGUMENTS[parameter.name]
+
+    return arguments
+
+
+def _category(class_name: str) -> str:
+    for category, words in CATEGORIES:
+        if any(word in class_name for word in words):
+            return category
+
+    return DEFAULT_CATEGORY
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _to_snake_case(name: str) -> str:
+    name = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
+    return re.sub(r"([a-z])([A-Z])", r"\1_\2", name).lower()
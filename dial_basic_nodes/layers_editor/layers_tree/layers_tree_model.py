@@ -1,46 +1,34 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
-from typing import TYPE_CHECKING, List, Optional
-
-from dial_core.utils import Dial
-from PySide2.QtCore import (
-    QByteArray,
-    QDataStream,
-    QIODevice,
-    QMimeData,
-    QModelIndex,
-    Qt,
-)
-from tensorflow import keras
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from PySide2.QtCore import QByteArray, QMimeData, QModelIndex, Qt
+
+from dial_basic_nodes.layers_editor.layer_mime import MIME_TYPE, encode_configs
 
 from .abstract_tree_model import AbstractTreeModel, AbstractTreeNode
+from .layer_palette import layer_palette
 
 if TYPE_CHECKING:
     from PySide2.QtWidgets import QWidget
 
+    from .layer_palette import LayerDescriptor
+
 
 class LayerNode(AbstractTreeNode):
     def __init__(
-        self,
-        display_name: str,
-        layer: "keras.layers.Layer",
-        layer_name: str = None,
-        parent: "AbstractTreeNode" = None,
+        self, descriptor: "LayerDescriptor", parent: "AbstractTreeNode" = None,
     ):
         super().__init__(
-            [display_name, layer], parent,
+            [descriptor.display_name, descriptor], parent,
         )
 
-        # Set an specific name for the layer
-        if layer_name:
-            layer._name = layer_name
-
     @property
     def name(self) -> Optional[str]:
         return self.values[0]
 
     @property
-    def layer(self) -> "keras.layers.Layer":
+    def descriptor(self) -> "LayerDescriptor":
         return self.values[1]
 
 
@@ -54,99 +42,50 @@ class TitleNode(AbstractTreeNode):
 
 
 class LayersTreeModel(AbstractTreeModel):
+    """
+    Model with the palette of layers that can be added to a model, grouped by category.
+
+    The palette only has layer descriptors (See `layer_palette`), the layer objects are
+    created when the layers are dropped on a model.
+    """
+
     def __init__(self, parent: "QWidget" = None):
         super().__init__(parent)
 
-        self.setup_model_data()
-
-    def columnCount(self, parent=QModelIndex()) -> int:
-        return 1
+        self.__filter_text = ""
 
-    def setup_model_data(self):
-        core_layers = TitleNode("Core Layers")
-        core_layers.append(
-            LayerNode("Dense", keras.layers.Dense(10), layer_name="dense")
-        )
+        self.setup_model_data()
 
-        core_layers.append(
-            LayerNode("Flatten", keras.layers.Flatten(), layer_name="flatten")
-        )
+    @property
+    def filter_text(self) -> str:
+        return self.__filter_text
 
-        core_layers.append(
-            LayerNode("Dropout", keras.layers.Dropout(0.5), layer_name="dropout")
-        )
+    def set_filter(self, text: str):
+        """
+        Only shows the layers that contain `text` on their name, class or category.
+        """
+        if text == self.__filter_text:
+            return
 
-        activation_layers = TitleNode("Activation Layers")
+        self.__filter_text = text
 
-        activation_layers.append(
-            LayerNode("Linear", keras.layers.Activation("linear"), layer_name="linear")
-        )
-        activation_layers.append(
-            LayerNode("ELU", keras.layers.Activation("elu"), layer_name="elu")
-        )
-        activation_layers.append(
-            LayerNode("ReLU", keras.layers.Activation("relu"), layer_name="relu")
-        )
-        activation_layers.append(
-            LayerNode(
-                "Sigmoid", keras.layers.Activation("sigmoid"), layer_name="sigmoid"
-            )
-        )
-        activation_layers.append(
-            LayerNode(
-                "Softmax", keras.layers.Activation("softmax"), layer_name="softmx"
-            )
-        )
+        self.beginResetModel()
+        self.root_node = AbstractTreeNode(["Root"])
+        self.setup_model_data()
+        self.endResetModel()
 
-        convolutional_layers = TitleNode("Convolutional Layers")
-        convolutional_layers.append(
-            LayerNode("Conv1D", keras.layers.Conv1D(32, 3), layer_name="conv1d")
-        )
-        convolutional_layers.append(
-            LayerNode("Conv2D", keras.layers.Conv2D(32, 3), layer_name="conv2d")
-        )
-        convolutional_layers.append(
-            LayerNode("Conv3D", keras.layers.Conv3D(32, 3), layer_name="conv3d")
-        )
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 1
 
-        pooling_layers = TitleNode("Pooling Layers")
-        pooling_layers.append(
-            LayerNode(
-                "MaxPooling1D", keras.layers.MaxPooling1D(), layer_name="max_pool_1d"
-            )
-        )
-        pooling_layers.append(
-            LayerNode(
-                "MaxPooling2D", keras.layers.MaxPooling2D(), layer_name="max_pool_2d"
-            )
-        )
-        pooling_layers.append(
-            LayerNode(
-                "MaxPooling3D", keras.layers.MaxPooling3D(), layer_name="max_pool_3d"
-            )
-        )
+    def setup_model_data(self):
+        title_nodes: Dict[str, "TitleNode"] = {}
 
-        normalization_layers = TitleNode("Normalization Layers")
-        normalization_layers.append(
-            LayerNode(
-                "BatchNormalization",
-                keras.layers.BatchNormalization(),
-                layer_name="batch_norm",
-            )
-        )
-        normalization_layers.append(
-            LayerNode(
-                "LayerNormalization",
-                keras.layers.LayerNormalization(),
-                layer_name="layer_norm",
-            )
-        )
+        for descriptor in layer_palette().search(self.__filter_text):
+            if descriptor.category not in title_nodes:
+                title_nodes[descriptor.category] = TitleNode(descriptor.category)
+                self.root_node.append(title_nodes[descriptor.category])
 
-        self.root_node.append(core_layers)
-        self.root_node.append(activation_layers)
-        self.root_node.append(convolutional_layers)
-        self.root_node.append(pooling_layers)
-        self.root_node.append(normalization_layers)
+            title_nodes[descriptor.category].append(LayerNode(descriptor))
 
     def headerData(
         self, section: int, orientation: "Qt.Orientation", role=Qt.DisplayRole
@@ -184,26 +123,21 @@ class LayersTreeModel(AbstractTreeModel):
         MIME Types supported by this model. In this case, the only supported MIME type
         is the one representing a list of Keras Layer.
         """
-        return [Dial.KerasLayerListMIME.value]
+        return [MIME_TYPE]
 
     def mimeData(self, indexes: List["QModelIndex"]) -> "QMimeData":
         """
-        Returns a serialized object representing a List of Keras Layer. Used for
-        drag/drop operations, for example.
+        Returns the serialized configs of the layers on `indexes` (See `layer_mime`).
+        The layers are created when the payload is dropped.
         """
         mime_data = QMimeData()
 
-        # Serializer
-        encoded_data = QByteArray()
-        stream = QDataStream(encoded_data, QIODevice.WriteOnly)
-
-        # Write all the layers corresponding to the indexes
-        for index in indexes:
-            if index.isValid():
-                layer = index.internalPointer().layer
-                stream.writeQVariant(layer)
+        serialized_layers = [
+            index.internalPointer().descriptor.serialize()
+            for index in indexes
+            if index.isValid() and isinstance(index.internalPointer(), LayerNode)
+        ]
 
-        # Store the serialized data on the MIME data
-        mime_data.setData(Dial.KerasLayerListMIME.value, encoded_data)
+        mime_data.setData(MIME_TYPE, QByteArray(encode_configs(serialized_layers)))
 
         return mime_data
@@ -1,7 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
 import dependency_injector.providers as providers
-from PySide2.QtWidgets import QVBoxLayout, QWidget
+from PySide2.QtWidgets import QLineEdit, QVBoxLayout, QWidget
 
 from .containers import LayersTreeMVFactory
 
@@ -9,6 +9,8 @@ from .containers import LayersTreeMVFactory
 class LayersTreeWidget(QWidget):
     """
     Widget for displaying the list of avaliable layers for constructing models.
+
+    The layers can be filtered by name with the search box on top.
     """
 
     def __init__(self, layerstree_mv_factory: "LayersTreeMVFactory", parent=None):
@@ -18,15 +20,28 @@ class LayersTreeWidget(QWidget):
         self.__view = layerstree_mv_factory.View(parent=self)
         self.__view.setModel(self.__model)
 
+        self.__search_textbox = QLineEdit(parent=self)
+        self.__search_textbox.setPlaceholderText("Search layers...")
+        self.__search_textbox.setClearButtonEnabled(True)
+        self.__search_textbox.textChanged.connect(self.__filter_layers)
+
         self.__main_layout = QVBoxLayout()
 
         self.__setup_ui()
 
     def __setup_ui(self):
+        self.__main_layout.addWidget(self.__search_textbox)
         self.__main_layout.addWidget(self.__view)
 
         self.setLayout(self.__main_layout)
 
+    def __filter_layers(self, text: str):
+        self.__model.set_filter(text)
+
+        # The matching layers are shown without having to expand their categories
+        if text:
+            self.__view.expandAll()
+
     def __reduce__(self):
         return (LayersTreeWidget, (LayersTreeMVFactory(),))
 
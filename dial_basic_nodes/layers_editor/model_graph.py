@@ -0,0 +1,422 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Editing of models that aren't a chain of layers (e.g. with skip connections).
+
+The topology of a functional model is kept as a graph of `GraphNode`, one for each
+layer on the editor table, with the nodes connected to its input as edges. The table
+only shows the layers (In topological order), so its edits are applied to the graph:
+
+    * A removed layer is bypassed: Its consumers take its inputs instead.
+    * A new layer is inserted after the layer on the previous row, taking its output,
+      and the next row takes the output of the new layer instead.
+
+Each build creates new layers from the configs on the table, as `ModelRebuilder` does,
+so the built models never share variables with the input model or with each other.
+Each node remembers the layer created on the last build and its signature (Its config
+and input shape). The weights of the layers whose signature hasn't changed are copied
+to the new layers, so only the subgraph affected by the edits starts from new weights.
+"""
+
+import heapq
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from dial_core.utils import log
+from tensorflow import keras
+
+from dial_basic_nodes.utils.lazy_weights import defer_weights, pending_weights_path
+
+from .layer_mime import forget_weights_source, weights_source
+from .model_rebuilder import ModelBuildError, built_input_shape, layer_signature
+
+if TYPE_CHECKING:
+    import numpy as np
+    import tensorflow as tf
+    from tensorflow.keras.layers import Layer
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+
+class GraphNode:
+    """A layer of a `ModelGraph`.
+
+    Attributes:
+        layer: The layer shown on the editor table.
+        inbound: The nodes whose outputs are the inputs of the layer, in order.
+        built_layer: The layer created on the last build, which holds the weights.
+        signature: The signature of `built_layer` (See `layer_signature`).
+        model: The model `built_layer` belongs to.
+    """
+
+    def __init__(self, layer: "Layer", inbound: Optional[List["GraphNode"]] = None):
+        self.layer = layer
+        self.inbound: List["GraphNode"] = list(inbound or [])
+
+        self.built_layer: Optional["Layer"] = None
+        self.signature: Optional[str] = None
+        self.model: Optional["Model"] = None
+
+    @property
+    def is_input(self) -> bool:
+        return isinstance(self.layer, keras.layers.InputLayer)
+
+
+class ModelGraph:
+    """The ModelGraph class keeps the topology of a functional model while its layers
+    are edited, and builds a new model from it."""
+
+    def __init__(self, nodes: List["GraphNode"], outputs: List["GraphNode"]):
+        # Nodes on the same order as the table rows
+        self._nodes = nodes
+        self._outputs = outputs
+
+        # Topological order of the nodes. None when it must be computed again
+        self._order: Optional[List["GraphNode"]] = None
+
+        # Nodes removed since the last build, by the id of their table layer (Their
+        # weights can be reused by the layers moved with drag and drop)
+        self._removed: Dict[int, "GraphNode"] = {}
+
+    @classmethod
+    def from_model(cls, model: "Model") -> Optional["ModelGraph"]:
+        """Returns the graph of a functional model.
+
+        Returns None if the model is a chain of layers (Edited as a `Sequential` model,
+        see `ModelRebuilder`), or if its topology isn't supported (e.g. shared layers
+        or layers with several outputs).
+        """
+        if isinstance(model, keras.models.Sequential):
+            return None
+
+        try:
+            config = model.get_config()
+            layers = {layer.name: layer for layer in model.layers}
+            nodes: Dict[str, "GraphNode"] = {}
+
+            for layer_config in config["layers"]:
+                inbound_nodes = layer_config["inbound_nodes"]
+
+                if len(inbound_nodes) > 1:
+                    LOGGER.info("Shared layer %s, not a graph", layer_config["name"])
+                    return None
+
+                inbound = []
+                for entry in inbound_nodes[0] if inbound_nodes else []:
+                    if entry[2] != 0:  # Tensor index
+                        return None
+
+                    inbound.append(nodes[entry[0]])
+
+                name = layer_config["name"]
+                nodes[name] = GraphNode(layers[name], inbound)
+
+            outputs = [nodes[entry[0]] for entry in config["output_layers"]]
+        except (AttributeError, IndexError, KeyError, NotImplementedError, TypeError):
+            return None
+
+        graph = cls(list(nodes.values()), outputs)
+
+        if graph.is_chain():
+            return None
+
+        # The layers of the input model hold the initial weights
+        for node in graph._nodes:
+            node.built_layer = node.layer
+            node.signature = layer_signature(node.layer, built_input_shape(node.layer))
+            node.model = model
+
+        return graph
+
+    @property
+    def nodes(self) -> List["GraphNode"]:
+        return list(self._nodes)
+
+    @property
+    def outputs(self) -> List["GraphNode"]:
+        return list(self._outputs)
+
+    def is_chain(self) -> bool:
+        """True if each layer only takes the output of the previous one."""
+        consumers = self._consumers()
+
+        return (
+            len(self._outputs) == 1
+            and sum(1 for node in self._nodes if not node.inbound) == 1
+            and all(len(node.inbound) <= 1 for node in self._nodes)
+            and all(len(nodes) <= 1 for nodes in consumers.values())
+        )
+
+    def sync(self, layers: Sequence["Layer"]):
+        """Updates the graph with the layers on the table (See the module docs)."""
+        if len(layers) == len(self._nodes) and all(
+            layer is node.layer for layer, node in zip(layers, self._nodes)
+        ):
+            return
+
+        present = {id(layer) for layer in layers}
+
+        for node in self._nodes:
+            if id(node.layer) not in present:
+                self._bypass(node)
+                self._removed[id(node.layer)] = node
+
+        nodes_by_layer = {
+            id(node.layer): node for node in self._nodes if id(node.layer) in present
+        }
+        nodes: List["GraphNode"] = []
+
+        for row, layer in enumerate(layers):
+            existing_node = nodes_by_layer.get(id(layer))
+
+            if existing_node is not None:
+                nodes.append(existing_node)
+                continue
+
+            next_node = next(
+                (
+                    nodes_by_layer[id(next_layer)]
+                    for next_layer in layers[row + 1 :]
+                    if id(next_layer) in nodes_by_layer
+                ),
+                None,
+            )
+            new_node = self._insert(layer, nodes[-1] if nodes else None, next_node)
+            nodes_by_layer[id(layer)] = new_node
+
+            nodes.append(new_node)
+
+        self._nodes = nodes
+        self._order = None
+
+    def inbound_rows(self, layers: Sequence["Layer"]) -> List[List[int]]:
+        """Returns the rows connected to the input of each layer of the table."""
+        self.sync(layers)
+
+        rows = {id(node): row for row, node in enumerate(self._nodes)}
+
+        return [[rows[id(inbound)] for inbound in node.inbound] for node in self._nodes]
+
+    def topological_order(self) -> List["GraphNode"]:
+        """Returns the nodes sorted so each node comes after its inputs. Independent
+        nodes keep the order of the table.
+
+        Raises:
+            ValueError: If the graph has a cycle.
+        """
+        if self._order is not None:
+            return self._order
+
+        rows = {id(node): row for row, node in enumerate(self._nodes)}
+        consumers = self._consumers()
+        pending_inputs = {id(node): len(node.inbound) for node in self._nodes}
+
+        ready = [rows[id(node)] for node in self._nodes if not node.inbound]
+        heapq.heapify(ready)
+
+        order = []
+        while ready:
+            node = self._nodes[heapq.heappop(ready)]
+            order.append(node)
+
+            for consumer in consumers[id(node)]:
+                pending_inputs[id(consumer)] -= 1
+
+                if not pending_inputs[id(consumer)]:
+                    heapq.heappush(ready, rows[id(consumer)])
+
+        if len(order) != len(self._nodes):
+            raise ValueError("The layers of the model form a cycle")
+
+        self._order = order
+        return order
+
+    def build(self, layers: Sequence["Layer"]) -> "Model":
+        """Returns a new model with the topology of the graph and the given table
+        layers.
+
+        The graph only remembers the built layers if the whole model is built, so a
+        failed build doesn't change the weights used on the next one.
+
+        Raises:
+            ModelBuildError: If a layer has no inputs, the graph has a cycle, or the
+                layers can't be connected (e.g. halfway through an edit).
+        """
+        self.sync(layers)
+
+        try:
+            model, built_layers = self._build()
+        except (
+            IndexError,
+            KeyError,
+            NotImplementedError,
+            TypeError,
+            ValueError,
+        ) as err:
+            raise ModelBuildError(f"Can't build the model: {err}") from err
+
+        for node in self._nodes:
+            if id(node) in built_layers:
+                node.built_layer, node.signature = built_layers[id(node)]
+
+            node.model = model
+            forget_weights_source(node.layer)
+
+        self._removed = {}
+
+        return model
+
+    def _build(self) -> Tuple["Model", Dict[int, Tuple["Layer", Optional[str]]]]:
+        """Builds the model. Returns it with the new layer and signature of each node
+        (By node id)."""
+        tensors: Dict[int, Any] = {}
+        inputs = []
+        built_layers: Dict[int, Tuple["Layer", Optional[str]]] = {}
+        assignments: List[Tuple["tf.Variable", "np.ndarray"]] = []
+        copied = 0
+        lazy_weights_path = None
+
+        for node in self.topological_order():
+            if node.is_input:
+                tensor = _input_tensor(node.layer)
+                inputs.append(tensor)
+
+                tensors[id(node)] = tensor
+                continue
+
+            if not node.inbound:
+                raise ValueError(f"The layer {node.layer.name} has no inputs")
+
+            node_inputs = [tensors[id(inbound)] for inbound in node.inbound]
+            input_shapes = [keras.backend.int_shape(tensor) for tensor in node_inputs]
+            signature = layer_signature(
+                node.layer,
+                input_shapes[0] if len(input_shapes) == 1 else tuple(input_shapes),
+            )
+
+            layer = type(node.layer).from_config(node.layer.get_config())
+            tensors[id(node)] = layer(
+                node_inputs if len(node_inputs) > 1 else node_inputs[0]
+            )
+            built_layers[id(node)] = (layer, signature)
+
+            source = self._weights_source(node, signature)
+
+            if source is None or source.built_layer is None:
+                continue
+
+            # Models with lazy weights (See `ModelLoaderWidget`) can't be copied until
+            # their weights are loaded, so the new model loads them by name instead
+            source_weights_path = pending_weights_path(source.model)
+
+            if source_weights_path is not None:
+                lazy_weights_path = source_weights_path
+                continue
+
+            source_weights = source.built_layer.get_weights()
+
+            if [w.shape for w in source_weights] == [
+                tuple(w.shape) for w in layer.weights
+            ]:
+                assignments.extend(zip(layer.weights, source_weights))
+                copied += 1
+
+        outputs = [tensors[id(node)] for node in self._outputs]
+
+        if not inputs or not outputs:
+            raise ValueError("The model has no inputs or outputs")
+
+        model = keras.Model(
+            inputs=inputs if len(inputs) > 1 else inputs[0],
+            outputs=outputs if len(outputs) > 1 else outputs[0],
+            name="layers_editor_model",
+        )
+
+        keras.backend.batch_set_value(assignments)
+
+        if lazy_weights_path is not None:
+            defer_weights(model, lazy_weights_path, by_name=True)
+
+        LOGGER.debug(
+            "Model graph built: %s of %s layers kept their weights",
+            copied,
+            len(built_layers),
+        )
+
+        return model, built_layers
+
+    def _weights_source(
+        self, node: "GraphNode", signature: Optional[str]
+    ) -> Optional["GraphNode"]:
+        """Returns the node whose built layer has the weights for `node` (Itself, or
+        the node of the layer it was moved from), or None if the weights changed."""
+        candidates = [node, self._removed.get(id(weights_source(node.layer)))]
+
+        for candidate in candidates:
+            if (
+                candidate is not None
+                and candidate.built_layer is not None
+                and signature is not None
+                and candidate.signature == signature
+            ):
+                return candidate
+
+        return None
+
+    def _consumers(self) -> Dict[int, List["GraphNode"]]:
+        """Returns the nodes that take the output of each node (By node id)."""
+        consumers: Dict[int, List["GraphNode"]] = {id(node): [] for node in self._nodes}
+
+        for node in self._nodes:
+            for inbound in node.inbound:
+                consumers.setdefault(id(inbound), []).append(node)
+
+        return consumers
+
+    def _bypass(self, removed: "GraphNode"):
+        """Connects the consumers of a removed node to its inputs."""
+        for node in self._nodes:
+            while removed in node.inbound:
+                position = node.inbound.index(removed)
+                node.inbound[position : position + 1] = removed.inbound
+
+        if removed in self._outputs:
+            position = self._outputs.index(removed)
+            self._outputs[position : position + 1] = [
+                node for node in removed.inbound if node not in self._outputs
+            ]
+
+    def _insert(
+        self,
+        layer: "Layer",
+        previous: Optional["GraphNode"],
+        next_node: Optional["GraphNode"],
+    ) -> "GraphNode":
+        """Creates the node of a new layer, placed between `previous` and
+        `next_node`."""
+        node = GraphNode(layer, [previous] if previous is not None else [])
+
+        if previous is None:
+            return node
+
+        if next_node is not None and previous in next_node.inbound:
+            position = next_node.inbound.index(previous)
+            next_node.inbound[position] = node
+        elif previous in self._outputs:
+            self._outputs[self._outputs.index(previous)] = node
+        else:
+            # A new branch, kept as an output so it isn't dropped from the model
+            LOGGER.info("Layer %s added as a new output of the model", layer.name)
+            self._outputs.append(node)
+
+        return node
+
+
+def _input_tensor(layer: "keras.layers.InputLayer"):
+    config = layer.get_config()
+
+    return keras.Input(
+        batch_shape=config["batch_input_shape"],
+        dtype=config.get("dtype"),
+        sparse=config.get("sparse", False),
+        name=layer.name,
+    )
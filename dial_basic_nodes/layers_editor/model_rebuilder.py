@@ -0,0 +1,210 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Rebuilding of the Layers Editor model after its layers are edited.
+
+The layers on the editor table are edited in place (units, activation...), so their
+variables can't be reused: Each build creates new layers from their current config.
+The weights of the previous build are transplanted to every new layer whose config and
+input shape haven't changed, and only the edited layers (or the ones after them whose
+input shape changed) start from new weights.
+"""
+
+import json
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from dial_core.utils import log
+from tensorflow import keras
+
+from dial_basic_nodes.utils.lazy_weights import defer_weights, pending_weights_path
+
+from .layer_mime import forget_weights_source, weights_source
+
+if TYPE_CHECKING:
+    import numpy as np
+    import tensorflow as tf
+    from tensorflow.keras.layers import Layer
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+# Attributes that don't change the weights a layer creates
+_IGNORED_CONFIG_KEYS = ("name", "trainable")
+
+
+class ModelBuildError(ValueError):
+    """The layers on the table can't be built into a model (e.g. a layer doesn't
+    accept the output of the previous one while the layers are being edited)."""
+
+
+def layer_signature(layer: "Layer", input_shape: Optional[Tuple]) -> Optional[str]:
+    """Returns a string that only changes when the weights created by `layer` could
+    change (its class, config and input shape). None if it can't be computed."""
+    try:
+        config = {
+            key: value
+            for key, value in layer.get_config().items()
+            if key not in _IGNORED_CONFIG_KEYS
+        }
+    except NotImplementedError:
+        return None
+
+    return json.dumps(
+        [type(layer).__name__, config, input_shape], sort_keys=True, default=str
+    )
+
+
+def built_input_shape(layer: "Layer") -> Optional[Tuple]:
+    """Returns the input shape `layer` was built with (None if it isn't built)."""
+    try:
+        return layer.input_shape
+    except (AttributeError, RuntimeError):
+        return None
+
+
+class ModelRebuilder:
+    """The ModelRebuilder class builds a new `Sequential` model from a list of layers,
+    keeping the weights of the unchanged layers from the previous build.
+
+    The weights of each layer are tracked by the layer object shown on the table, so
+    renaming a layer still keeps its weights. Layers moved by drag and drop are new
+    objects, but they keep the weights of the layer they were created from (See
+    `weights_source`).
+    """
+
+    def __init__(self):
+        self._input_shape: Optional[Tuple] = None
+
+        # Table layer (by id) -> (signature, layer holding its weights, model of it)
+        self._sources: Dict[int, Tuple[Optional[str], "Layer", "Model"]] = {}
+
+        # Keeps the table layers alive, so their ids aren't reused
+        self._tracked_layers: List["Layer"] = []
+
+    def reset(self, model: "Model"):
+        """Starts tracking the layers of a new input model, which hold the initial
+        weights."""
+        try:
+            self._input_shape = model.input_shape
+        except (AttributeError, RuntimeError):
+            self._input_shape = None
+
+        self._sources = {}
+        self._tracked_layers = list(model.layers)
+
+        for layer in model.layers:
+            self._sources[id(layer)] = (
+                layer_signature(layer, built_input_shape(layer)),
+                layer,
+                model,
+            )
+
+    def rebuild(self, layers: List["Layer"]) -> "Model":
+        """Returns a new model with fresh copies of `layers`.
+
+        Raises:
+            ModelBuildError: If a layer can't be copied (e.g. custom layers without
+                `get_config`), or the layers can't be connected.
+        """
+        table_layers = [
+            layer for layer in layers if not isinstance(layer, keras.layers.InputLayer)
+        ]
+
+        try:
+            new_layers = [
+                type(layer).from_config(layer.get_config()) for layer in table_layers
+            ]
+
+            model = keras.models.Sequential(name="layers_editor_model")
+
+            if self._input_shape is not None:
+                model.add(keras.Input(shape=self._input_shape[1:]))
+
+            for new_layer in new_layers:
+                model.add(new_layer)
+
+        except (NotImplementedError, TypeError, ValueError) as err:
+            raise ModelBuildError(f"Can't build the model: {err}") from err
+
+        if self._input_shape is None:
+            # Without an input shape there are no weights to transplant yet
+            self._track(table_layers, new_layers, model)
+            return model
+
+        transplanted, lazy_source = self._transplant(table_layers, new_layers)
+        lazy_weights_path = pending_weights_path(lazy_source)
+
+        # Models with lazy weights (See `ModelLoaderWidget`) can't be transplanted
+        # until their weights are loaded, so the new model loads them by name instead
+        if lazy_weights_path is not None:
+            defer_weights(model, lazy_weights_path, by_name=True)
+
+        LOGGER.debug(
+            "Model rebuilt: %s of %s layers kept their weights",
+            transplanted,
+            len(new_layers),
+        )
+
+        self._track(table_layers, new_layers, model)
+
+        return model
+
+    def _transplant(
+        self, table_layers: List["Layer"], new_layers: List["Layer"]
+    ) -> Tuple[int, Optional["Model"]]:
+        """Copies the weights of the unchanged layers. Returns the number of layers
+        copied, and the source model with lazy weights (if any)."""
+        assignments: List[Tuple["tf.Variable", "np.ndarray"]] = []
+        transplanted = 0
+        lazy_source = None
+
+        for table_layer, new_layer in zip(table_layers, new_layers):
+            source = self._sources.get(id(table_layer)) or self._sources.get(
+                id(weights_source(table_layer))
+            )
+
+            if source is None or not new_layer.weights:
+                continue
+
+            signature, source_layer, source_model = source
+
+            if signature is None or signature != layer_signature(
+                new_layer, built_input_shape(new_layer)
+            ):
+                continue
+
+            if pending_weights_path(source_model) is not None:
+                lazy_source = source_model
+                continue
+
+            source_weights = source_layer.get_weights()
+
+            if [w.shape for w in source_weights] != [
+                tuple(w.shape) for w in new_layer.weights
+            ]:
+                continue
+
+            assignments.extend(zip(new_layer.weights, source_weights))
+            transplanted += 1
+
+        keras.backend.batch_set_value(assignments)
+
+        return transplanted, lazy_source
+
+    def _track(
+        self, table_layers: List["Layer"], new_layers: List["Layer"], model: "Model"
+    ):
+        """The new layers hold the weights used on the next build."""
+        for table_layer in table_layers:
+            forget_weights_source(table_layer)
+
+        self._tracked_layers = list(table_layers)
+        self._sources = {
+            id(table_layer): (
+                layer_signature(new_layer, built_input_shape(new_layer))
+                if new_layer.built
+                else None,
+                new_layer,
+                model,
+            )
+            for table_layer, new_layer in zip(table_layers, new_layers)
+        }
@@ -1,20 +1,28 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+import contextlib
 from enum import IntEnum
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
 
-from dial_core.utils import Dial, log
+from dial_core.utils import log
 from PySide2.QtCore import (
     QAbstractTableModel,
     QByteArray,
-    QDataStream,
-    QIODevice,
     QMimeData,
     QModelIndex,
     Qt,
     Signal,
 )
 
+from dial_basic_nodes.layers_editor.layer_mime import (
+    MIME_TYPE,
+    decode_layers,
+    encode_layers,
+)
+from dial_basic_nodes.utils.memory import format_bytes
+
+from .shape_engine import LayerCost, Shape, format_count, propagate_shapes
+
 if TYPE_CHECKING:
     from PySide2.QtWidgets import QObject
     from tensorflow import keras
@@ -28,8 +36,18 @@ class ModelTableModel(QAbstractTableModel):
     Model used for composing the layers that form a Neural Network Model.
 
     Layer attributes (units, activations...) can be modified from this model. It also
-    allows adding layers through a drop event (layers must have "Dial.KerasLayerMIME"
-    MIME type)
+    allows adding layers through a drop event (layers must be serialized with
+    `layer_mime`, with the "Dial.KerasLayerListMIME" MIME type)
+
+    Several edits can be grouped with `edit_transaction`, so `layers_modified` is only
+    emitted once for all of them.
+
+    The shape, parameters, FLOPs and activation memory columns are computed
+    symbolically from the layer configs (See `propagate_shapes`), and cached until the
+    layers change.
+
+    The text shown on each cell is cached too, so repainting (e.g. scrolling a model
+    with hundreds of layers) doesn't compute it again until the layers are edited.
     """
 
     layers_modified = Signal(object)
@@ -44,6 +62,9 @@ class ModelTableModel(QAbstractTableModel):
         Filters = 6
         KernelSize = 7
         PoolSize = 8
+        Params = 9
+        FLOPs = 10
+        ActivationMemory = 11
 
     def __init__(self, parent: "QObject" = None):
         super().__init__(parent)
@@ -53,6 +74,27 @@ class ModelTableModel(QAbstractTableModel):
         # Count the nº of occurencies of a layer name (To avoid name duplications)
         self.__layer_name_occurencies: Dict[str, int] = {}
 
+        # Nesting level of the open edit transactions, and whether the layers have been
+        # modified inside them
+        self.__transaction_depth = 0
+        self.__modified_on_transaction = False
+
+        # Input shape of the model, and batch size used for the activation memory
+        self.__input_shape: Optional["Shape"] = None
+        self.__batch_size = 32
+
+        # Returns the rows connected to the input of each layer, for models that
+        # aren't sequential
+        self.__topology: Optional[
+            Callable[[List["keras.layers.Layer"]], List[List[int]]]
+        ] = None
+
+        # Cost of each layer. None when it must be computed again
+        self.__costs: Optional[List[Optional["LayerCost"]]] = None
+
+        # Text of the cells already displayed, by row and column
+        self.__display_cache: Dict[int, Dict[int, Optional[str]]] = {}
+
         self.__role_map = {
             Qt.DisplayRole: self.__display_role,
             Qt.CheckStateRole: self.__checkstate_role,
@@ -67,10 +109,68 @@ class ModelTableModel(QAbstractTableModel):
         Set a new `layers` array.
         """
         self.__layers = layers
+        self.__costs = None
+        self.__display_cache.clear()
 
         # Model has been reset, redraw view
         self.modelReset.emit()
 
+    def set_input_shape(self, input_shape: Optional["Shape"]):
+        """
+        Sets the input shape of the model, used for computing the shapes of the layers.
+        """
+        self.__input_shape = input_shape
+        self.__invalidate_costs()
+
+    def set_topology(
+        self,
+        topology: Optional[Callable[[List["keras.layers.Layer"]], List[List[int]]]],
+    ):
+        """
+        Sets the function that returns the rows connected to the input of each layer
+        (e.g. `ModelGraph.inbound_rows`). If None, the layers are sequential.
+        """
+        self.__topology = topology
+        self.__invalidate_costs()
+
+    def set_batch_size(self, batch_size: int):
+        """
+        Sets the batch size used for computing the activation memory.
+        """
+        self.__batch_size = batch_size
+        self.__invalidate_costs()
+
+    def layer_cost(self, row: int) -> Optional["LayerCost"]:
+        """
+        Returns the output shape and costs of the layer on `row` (None if unknown).
+        """
+        if self.__costs is None:
+            self.__costs = propagate_shapes(
+                self.__layers,
+                self.__input_shape,
+                self.__topology(self.__layers) if self.__topology else None,
+            )
+
+        return self.__costs[row]
+
+    @contextlib.contextmanager
+    def edit_transaction(self) -> Iterator[None]:
+        """
+        Groups the edits done inside the context. `layers_modified` is emitted once
+        when the outermost transaction ends, and only if the layers were modified.
+        """
+        self.__transaction_depth += 1
+
+        try:
+            yield
+
+        finally:
+            self.__transaction_depth -= 1
+
+            if self.__transaction_depth == 0 and self.__modified_on_transaction:
+                self.__modified_on_transaction = False
+                self.layers_modified.emit(self.__layers)
+
     def rowCount(self, parent=QModelIndex()) -> int:
         """
         Return the number of rows.
@@ -177,26 +277,20 @@ class ModelTableModel(QAbstractTableModel):
 
         if role == Qt.CheckStateRole:
             if index.column() == self.Column.Trainable:
-                layer.trainable = bool(value)
-                self.layers_modified.emit(self.__layers)
+                self.__set_layer_attribute(layer, "trainable", bool(value))
 
         if role == Qt.EditRole:
             if index.column() == self.Column.Name:
-                layer._name = str(value)
-                self.layers_modified.emit(self.__layers)
+                self.__set_layer_attribute(layer, "_name", str(value))
 
             if index.column() == self.Column.Units:
-                layer.units = int(value)
-                self.layers_modified.emit(self.__layers)
+                self.__set_layer_attribute(layer, "units", int(value))
 
             if index.column() == self.Column.Activation:
-                layer.activation = str(value)
-                self.layers_modified.emit(self.__layers)
+                self.__set_layer_attribute(layer, "activation", str(value))
 
             if index.column() == self.Column.Filters:
-                layer.filters = int(value)
-                self.layers_modified.emit(self.__layers)
-
+                self.__set_layer_attribute(layer, "filters", int(value))
 
         LOGGER.debug("New layer config: %s", layer.get_config())
 
@@ -222,27 +316,30 @@ class ModelTableModel(QAbstractTableModel):
         MIME Types supported by this model. In this case, the only supported MIME type
         is the one representing a list of Keras Layer.
         """
-        return [Dial.KerasLayerListMIME.value]
+        return [MIME_TYPE]
 
     def mimeData(self, indexes: List["QModelIndex"]) -> "QMimeData":
         """
-        Returns a serialized object representing a List of Keras Layer. Used for
-        drag/drop operations, for example.
+        Returns the serialized configs of the layers on `indexes` (See `layer_mime`).
+        Used for drag/drop operations, for example.
+
+        The payload references the dragged layers, so moving a layer keeps its weights.
         """
         mime_data = QMimeData()
 
-        # Serializer
-        encoded_data = QByteArray()
-        stream = QDataStream(encoded_data, QIODevice.WriteOnly)
-
-        # Write all the layers corresponding to the indexes
-        for index in indexes:
-            if index.isValid():
-                layer = index.internalPointer()
-                stream.writeQVariant(layer)
+        # There is an index for each column, but each layer is serialized once
+        layers = list(
+            {
+                index.row(): index.internalPointer()
+                for index in indexes
+                if index.isValid()
+            }.values()
+        )
 
-        # Store the serialized data on the MIME data
-        mime_data.setData(Dial.KerasLayerListMIME.value, encoded_data)
+        mime_data.setData(
+            MIME_TYPE,
+            QByteArray(encode_layers(layers, with_weights_references=True)),
+        )
 
         return mime_data
 
@@ -260,7 +357,7 @@ class ModelTableModel(QAbstractTableModel):
         if action == Qt.IgnoreAction:
             return True
 
-        if not mime_data.hasFormat(Dial.KerasLayerListMIME.value):
+        if not mime_data.hasFormat(MIME_TYPE):
             return False
 
         # Get the row number where the layers will be inserted
@@ -272,15 +369,12 @@ class ModelTableModel(QAbstractTableModel):
         LOGGER.debug("Drop action type: %s", action)
         LOGGER.debug("Adding a new row at index %s...", begin_row)
 
-        # Get the serilalized data from the MIME data and prepare for decoding
-        encoded_data: QByteArray = mime_data.data(Dial.KerasLayerListMIME.value)
-        stream = QDataStream(encoded_data, QIODevice.ReadOnly)
-
-        # Unserialize binary data
-        layers = []
-        while not stream.atEnd():
-            layer = stream.readQVariant()
-            layers.append(layer)
+        # New layers are created from the serialized configs
+        try:
+            layers = decode_layers(mime_data.data(MIME_TYPE).data())
+        except ValueError as err:
+            LOGGER.warning("Couldn't decode the dropped layers: %s", err)
+            return False
 
         LOGGER.debug("Values to insert: %s", len(layers))
         LOGGER.debug(layers)
@@ -290,7 +384,10 @@ class ModelTableModel(QAbstractTableModel):
             self.__set_unique_layer_names(layers)
 
         # Insert the decoded layers on the model
-        self.insertRows(begin_row, len(layers), self.createIndex(begin_row, 0, layers))
+        with self.edit_transaction():
+            self.insertRows(
+                begin_row, len(layers), self.createIndex(begin_row, 0, layers)
+            )
 
         return True
 
@@ -316,7 +413,7 @@ class ModelTableModel(QAbstractTableModel):
         LOGGER.debug("Insert rows END")
         LOGGER.debug("New model size: %s", self.rowCount())
 
-        self.layers_modified.emit(self.layers)
+        self.__notify_layers_modified()
 
         return True
 
@@ -342,7 +439,7 @@ class ModelTableModel(QAbstractTableModel):
         LOGGER.debug("Remove rows END")
         LOGGER.debug("New model size: %s", self.rowCount())
 
-        self.layers_modified.emit(self.layers)
+        self.__notify_layers_modified()
 
         return True
 
@@ -371,17 +468,65 @@ class ModelTableModel(QAbstractTableModel):
 
         self.endMoveRows()
 
-        self.layers_modified.emit(self.layers)
+        self.__notify_layers_modified()
 
         return True
 
+    def __set_layer_attribute(self, layer: "keras.layers.Layer", name: str, value: Any):
+        """
+        Sets an attribute of a layer. Setting the value it already has isn't an edit.
+        """
+        if getattr(layer, name, None) == value:
+            return
+
+        setattr(layer, name, value)
+        self.__notify_layers_modified()
+
+    def __invalidate_costs(self):
+        """
+        Forgets the cached costs and cell texts, and redraws the columns computed from
+        the costs.
+        """
+        self.__costs = None
+        self.__display_cache.clear()
+
+        if self.__layers:
+            self.dataChanged.emit(
+                self.index(0, self.Column.Shape, QModelIndex()),
+                self.index(
+                    len(self.__layers) - 1, self.Column.ActivationMemory, QModelIndex()
+                ),
+            )
+
+    def __notify_layers_modified(self):
+        # Any edit can change the shapes of the following layers
+        self.__invalidate_costs()
+
+        if self.__transaction_depth:
+            self.__modified_on_transaction = True
+            return
+
+        self.layers_modified.emit(self.__layers)
+
     def __display_role(self, index: "QModelIndex") -> Optional[str]:
         """
-        Returns the text representation of the index value.
+        Returns the text representation of the index value (Cached until the layers
+        are modified).
         """
         if not index.isValid():
             return None
 
+        row_cache = self.__display_cache.setdefault(index.row(), {})
+
+        if index.column() not in row_cache:
+            row_cache[index.column()] = self.__display_text(index)
+
+        return row_cache[index.column()]
+
+    def __display_text(self, index: "QModelIndex") -> Optional[str]:
+        """
+        Computes the text representation of the index value.
+        """
         layer = index.internalPointer()
 
         try:
@@ -398,7 +543,24 @@ class ModelTableModel(QAbstractTableModel):
                 return str(layer.activation.__name__)
 
             if index.column() == self.Column.Shape:
-                return str(layer.output_shape)
+                cost = self.layer_cost(index.row())
+                return str(cost.output_shape if cost else layer.output_shape)
+
+            # Layers with an unknown cost (e.g. unsupported layers) show nothing
+            if index.column() == self.Column.Params:
+                cost = self.layer_cost(index.row())
+                return f"{cost.params:,}" if cost is not None else None
+
+            if index.column() == self.Column.FLOPs:
+                cost = self.layer_cost(index.row())
+                return format_count(cost.flops) if cost is not None else None
+
+            if index.column() == self.Column.ActivationMemory:
+                cost = self.layer_cost(index.row())
+                if cost is None:
+                    return None
+
+                return format_bytes(cost.activation_bytes(self.__batch_size))
 
             if index.column() == self.Column.Filters:
                 return str(layer.filters)
@@ -47,10 +47,12 @@ class ModelTableView(QTableView):
         self.setDragEnabled(True)
 
     def dropEvent(self, event: "QDropEvent"):
-        if event.dropAction() == Qt.MoveAction:
-            self.deleteSelectedRows()
+        # Moving a layer removes and inserts it, but it's a single edit
+        with self.model().edit_transaction():
+            if event.dropAction() == Qt.MoveAction:
+                self.deleteSelectedRows()
 
-        super().dropEvent(event)
+            super().dropEvent(event)
 
     def setModel(self, model):
         # Assign model to view by calling the parent method
@@ -90,8 +92,9 @@ class ModelTableView(QTableView):
         # When a row is deleted, the new row index is the last row index - 1
         # That's why we have an i variable on this loop, which represents the amount of
         # rows that have been deleted
-        for i, row_index in enumerate(self.selectedIndexes()):
-            self.model().removeRow(row_index.row() - i, row_index)
+        with self.model().edit_transaction():
+            for i, row_index in enumerate(self.selectedIndexes()):
+                self.model().removeRow(row_index.row() - i, row_index)
 
     def __show_header_context_menu(self, point: "QPoint"):
         """
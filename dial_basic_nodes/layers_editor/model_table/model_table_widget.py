@@ -40,6 +40,12 @@ class ModelTableWidget(QWidget):
     def set_layers(self, layers):
         self.__model.load_layers(layers)
 
+    def set_input_shape(self, input_shape):
+        self.__model.set_input_shape(input_shape)
+
+    def set_topology(self, topology):
+        self.__model.set_topology(topology)
+
     def __getstate__(self):
         return {"layers": self.__model.layers}
 
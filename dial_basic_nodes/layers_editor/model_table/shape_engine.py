@@ -0,0 +1,375 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Symbolic shape and cost propagation through a list of layers.
+
+Shapes are computed from the layer configs, without building the layers (no weights
+are created), so the size and cost of an architecture can be known before creating the
+model. For each layer, the engine computes:
+
+    * The output shape (Batch dimension included, as `None`).
+    * The number of parameters (trainable and non-trainable).
+    * The FLOPs needed for a single sample (A multiply-add counts as two FLOPs).
+    * The memory taken by its output activations for a batch.
+
+Only the most common layers are supported. The shapes after an unsupported layer are
+unknown (`None`). Models that aren't sequential are supported too, by giving the layers
+connected to each layer (See `ModelGraph`).
+"""
+
+import math
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from tensorflow import keras
+
+Shape = Tuple[Optional[int], ...]
+
+FLOAT_BYTES = 4
+
+
+class LayerCost:
+    """Output shape and costs of a layer, as computed by `propagate_shapes`."""
+
+    def __init__(self, output_shape: "Shape", params: int, flops: int):
+        self.output_shape = output_shape
+        self.params = params
+        self.flops = flops
+
+    @property
+    def output_size(self) -> int:
+        """Number of values of the output, for a single sample."""
+        return _product(self.output_shape[1:])
+
+    def activation_bytes(self, batch_size: int) -> int:
+        """Memory taken by the output of the layer for a batch."""
+        return self.output_size * batch_size * FLOAT_BYTES
+
+
+def propagate_shapes(
+    layers: Sequence["keras.layers.Layer"],
+    input_shape: Optional["Shape"],
+    inbound_rows: Optional[Sequence[Sequence[int]]] = None,
+) -> List[Optional["LayerCost"]]:
+    """Returns the cost of each layer (None for the layers with an unknown input
+    shape).
+
+    Args:
+        layers: The layers, from the input to the output of the model.
+        input_shape: The input shape of the model (Batch dimension included). Layers
+            with a `batch_input_shape` on their config (e.g. `InputLayer`) set it too.
+        inbound_rows: The positions of the layers connected to the input of each layer
+            (For models that aren't sequential, see `ModelGraph`). If None, each layer
+            takes the output of the previous one.
+    """
+    costs: List[Optional[LayerCost]] = []
+    shape = _as_shape(input_shape)
+
+    for position, layer in enumerate(layers):
+        try:
+            config = layer.get_config()
+        except (NotImplementedError, TypeError, ValueError):
+            config = {}
+
+        if inbound_rows is None:
+            input_shapes = [shape]
+        else:
+            inbound_costs = [
+                costs[row] if row < position else None
+                for row in inbound_rows[position]
+            ]
+            input_shapes = [
+                inbound_cost.output_shape if inbound_cost is not None else None
+                for inbound_cost in inbound_costs
+            ]
+
+        if config.get("batch_input_shape"):
+            input_shapes = [_as_shape(config["batch_input_shape"])]
+
+        cost = _layer_cost(type(layer).__name__, config, input_shapes)
+
+        costs.append(cost)
+        shape = cost.output_shape if cost else None
+
+    return costs
+
+
+def format_count(value: float) -> str:
+    """Returns a short representation of a big number (e.g. "1.5M")."""
+    if abs(value) < 1000:
+        return str(int(value))
+
+    for unit in ("K", "M", "G"):
+        value /= 1000
+
+        if abs(value) < 1000:
+            return f"{value:.1f}{unit}"
+
+    return f"{value / 1000:.1f}T"
+
+
+def _layer_cost(
+    class_name: str, config: Dict, input_shapes: List[Optional["Shape"]]
+) -> Optional["LayerCost"]:
+    shapes = [shape for shape in input_shapes if shape is not None]
+
+    if (
+        not shapes
+        or len(shapes) != len(input_shapes)
+        or not all(_is_defined(shape[1:]) for shape in shapes)
+    ):
+        return None
+
+    # Configs that don't fit the input (e.g. a BatchNormalization axis out of range)
+    # leave the cost unknown, as they would fail when building the model
+    try:
+        if class_name in _MERGE_RULES:
+            return _MERGE_RULES[class_name](config, shapes)
+
+        if class_name in _RULES and len(shapes) == 1:
+            return _RULES[class_name](config, shapes[0])
+    except (IndexError, KeyError, TypeError, ValueError, ZeroDivisionError):
+        pass
+
+    return None
+
+
+def _dense(config: Dict, shape: "Shape") -> "LayerCost":
+    units = config["units"]
+    inputs = _dimension(shape, -1)
+    positions = _product(shape[1:-1])
+
+    params = inputs * units + (units if config.get("use_bias", True) else 0)
+    flops = 2 * inputs * units * positions
+
+    return LayerCost(shape[:-1] + (units,), params, flops)
+
+
+def _conv(rank: int) -> Callable[[Dict, "Shape"], "LayerCost"]:
+    def rule(config: Dict, shape: "Shape") -> "LayerCost":
+        spatial, channels = _split_channels(shape, config, rank)
+
+        kernel_size = _tuple(config["kernel_size"], rank)
+        strides = _tuple(config.get("strides", 1), rank)
+        dilation = _tuple(config.get("dilation_rate", 1), rank)
+        filters = config["filters"]
+
+        output_spatial = tuple(
+            _conv_length(size, kernel, stride, rate, config.get("padding", "valid"))
+            for size, kernel, stride, rate in zip(
+                spatial, kernel_size, strides, dilation
+            )
+        )
+
+        kernel_values = _product(kernel_size) * channels
+        params = kernel_values * filters
+        if config.get("use_bias", True):
+            params += filters
+
+        flops = 2 * kernel_values * filters * _product(output_spatial)
+
+        return LayerCost(
+            _join_channels(output_spatial, filters, config), params, flops
+        )
+
+    return rule
+
+
+def _pooling(rank: int) -> Callable[[Dict, "Shape"], "LayerCost"]:
+    def rule(config: Dict, shape: "Shape") -> "LayerCost":
+        spatial, channels = _split_channels(shape, config, rank)
+
+        pool_size = _tuple(config["pool_size"], rank)
+        strides = _tuple(config.get("strides") or pool_size, rank)
+
+        output_spatial = tuple(
+            _conv_length(size, pool, stride, 1, config.get("padding", "valid"))
+            for size, pool, stride in zip(spatial, pool_size, strides)
+        )
+
+        flops = _product(pool_size) * _product(output_spatial) * channels
+
+        return LayerCost(_join_channels(output_spatial, channels, config), 0, flops)
+
+    return rule
+
+
+def _global_pooling(rank: int) -> Callable[[Dict, "Shape"], "LayerCost"]:
+    def rule(config: Dict, shape: "Shape") -> "LayerCost":
+        spatial, channels = _split_channels(shape, config, rank)
+
+        flops = _product(spatial) * channels
+
+        return LayerCost((None, channels), 0, flops)
+
+    return rule
+
+
+def _flatten(config: Dict, shape: "Shape") -> "LayerCost":
+    return LayerCost((None, _product(shape[1:])), 0, 0)
+
+
+def _reshape(config: Dict, shape: "Shape") -> "LayerCost":
+    target = list(config["target_shape"])
+    size = _product(shape[1:])
+
+    # A single -1 takes the size needed to keep the number of values
+    if -1 in target:
+        known = _product(dim for dim in target if dim != -1)
+        target[target.index(-1)] = size // known
+
+    return LayerCost((None,) + tuple(target), 0, 0)
+
+
+def _elementwise(flops_per_value: int) -> Callable[[Dict, "Shape"], "LayerCost"]:
+    def rule(config: Dict, shape: "Shape") -> "LayerCost":
+        return LayerCost(shape, 0, flops_per_value * _product(shape[1:]))
+
+    return rule
+
+
+def _batch_normalization(config: Dict, shape: "Shape") -> "LayerCost":
+    axis = config.get("axis", -1)
+    axes = axis if isinstance(axis, (list, tuple)) else [axis]
+    features = _product(shape[a] for a in axes)
+
+    # Gamma and beta (if enabled), moving mean and moving variance
+    weights_count = int(config.get("scale", True)) + int(config.get("center", True))
+    params = (weights_count + 2) * features
+
+    return LayerCost(shape, params, 2 * _product(shape[1:]))
+
+
+def _embedding(config: Dict, shape: "Shape") -> "LayerCost":
+    output_dim = config["output_dim"]
+
+    return LayerCost(shape + (output_dim,), config["input_dim"] * output_dim, 0)
+
+
+_RULES: Dict[str, Callable[[Dict, "Shape"], "LayerCost"]] = {
+    "InputLayer": _elementwise(0),
+    "Dense": _dense,
+    "Conv1D": _conv(1),
+    "Conv2D": _conv(2),
+    "Conv3D": _conv(3),
+    "MaxPooling1D": _pooling(1),
+    "MaxPooling2D": _pooling(2),
+    "MaxPooling3D": _pooling(3),
+    "AveragePooling1D": _pooling(1),
+    "AveragePooling2D": _pooling(2),
+    "AveragePooling3D": _pooling(3),
+    "GlobalMaxPooling1D": _global_pooling(1),
+    "GlobalMaxPooling2D": _global_pooling(2),
+    "GlobalAveragePooling1D": _global_pooling(1),
+    "GlobalAveragePooling2D": _global_pooling(2),
+    "Flatten": _flatten,
+    "Reshape": _reshape,
+    "Dropout": _elementwise(0),
+    "Activation": _elementwise(1),
+    "ReLU": _elementwise(1),
+    "LeakyReLU": _elementwise(1),
+    "Softmax": _elementwise(3),
+    "BatchNormalization": _batch_normalization,
+    "Embedding": _embedding,
+}
+
+
+def _merge(config: Dict, shapes: List["Shape"]) -> "LayerCost":
+    if len(set(shapes)) != 1:
+        raise ValueError(f"Inputs with different shapes: {shapes}")
+
+    return LayerCost(shapes[0], 0, (len(shapes) - 1) * _product(shapes[0][1:]))
+
+
+def _concatenate(config: Dict, shapes: List["Shape"]) -> "LayerCost":
+    axis = config.get("axis", -1) % len(shapes[0])
+
+    if axis == 0 or any(
+        len(shape) != len(shapes[0])
+        or shape[:axis] + shape[axis + 1 :] != shapes[0][:axis] + shapes[0][axis + 1 :]
+        for shape in shapes
+    ):
+        raise ValueError(f"Inputs can't be concatenated: {shapes}")
+
+    output_shape = list(shapes[0])
+    output_shape[axis] = sum(shape[axis] for shape in shapes)
+
+    return LayerCost(tuple(output_shape), 0, 0)
+
+
+# Layers with several inputs
+_MERGE_RULES: Dict[str, Callable[[Dict, List["Shape"]], "LayerCost"]] = {
+    "Add": _merge,
+    "Subtract": _merge,
+    "Multiply": _merge,
+    "Average": _merge,
+    "Maximum": _merge,
+    "Minimum": _merge,
+    "Concatenate": _concatenate,
+}
+
+
+def _as_shape(shape: Optional[Sequence]) -> Optional["Shape"]:
+    if shape is None:
+        return None
+
+    return (None,) + tuple(shape[1:])
+
+
+def _is_defined(dimensions: Sequence[Optional[int]]) -> bool:
+    return all(dimension is not None for dimension in dimensions)
+
+
+def _product(values) -> int:
+    result = 1
+    for value in values:
+        result *= value
+
+    return result
+
+
+def _tuple(value, rank: int) -> Tuple[int, ...]:
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+
+    return (value,) * rank
+
+
+def _split_channels(
+    shape: "Shape", config: Dict, rank: int
+) -> Tuple[Tuple[int, ...], int]:
+    """Returns the spatial dimensions and the number of channels of a shape."""
+    if len(shape) != rank + 2:
+        raise ValueError(f"Expected an input of rank {rank + 2}, got {shape}")
+
+    dimensions = tuple(_dimension(shape, axis) for axis in range(1, len(shape)))
+
+    if config.get("data_format") == "channels_first":
+        return dimensions[1:], dimensions[0]
+
+    return dimensions[:-1], dimensions[-1]
+
+
+def _dimension(shape: "Shape", axis: int) -> int:
+    """Returns a dimension of a shape, which must be known."""
+    dimension = shape[axis]
+
+    if dimension is None:
+        raise ValueError(f"Unknown dimension {axis} on {shape}")
+
+    return dimension
+
+
+def _join_channels(spatial: Tuple[int, ...], channels: int, config: Dict) -> "Shape":
+    if config.get("data_format") == "channels_first":
+        return (None, channels) + spatial
+
+    return (None,) + spatial + (channels,)
+
+
+def _conv_length(size: int, kernel: int, stride: int, rate: int, padding: str) -> int:
+    if padding in ("same", "causal"):
+        return math.ceil(size / stride)
+
+    effective_kernel = (kernel - 1) * rate + 1
+
+    return max(0, math.ceil((size - effective_kernel + 1) / stride))
@@ -1,5 +1,8 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
+from .async_model_checkpoint import AsyncModelCheckpoint, MonitorMode
 from .model_checkpoint_node import (
     ModelCheckpointNode,
     ModelCheckpointNodeFactory,
@@ -10,7 +13,13 @@ from .model_checkpoint_widget import (
     ModelCheckpointWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    ModelCheckpointNode, ModelCheckpointNodeCells
+)
+
 __all__ = [
+    "AsyncModelCheckpoint",
+    "MonitorMode",
     "ModelCheckpointNode",
     "ModelCheckpointNodeFactory",
     "ModelCheckpointNodeCells",
@@ -0,0 +1,225 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import math
+import os
+import queue
+import threading
+from enum import Enum
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from dial_core.utils import log
+from tensorflow import keras
+
+from dial_basic_nodes.utils.checkpoint_files import (
+    atomic_write,
+    is_single_file_format,
+    remove_from_manifest,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+
+class MonitorMode(Enum):
+    Min = "min"
+    Max = "max"
+
+
+class _FormatValues(dict):
+    """Values used for formatting the file names. Missing metrics are formatted as NaN
+    (e.g. `val_loss` when there isn't a validation set)."""
+
+    def __missing__(self, key: str) -> float:
+        return math.nan
+
+
+def format_checkpoint_filename(template: str, epoch: int, logs: Dict) -> str:
+    """Returns the file name of the checkpoint of `epoch` (Counting from 1).
+
+    The template uses the `str.format` syntax, with `epoch` and the metrics on `logs`
+    as fields (e.g. "model.{epoch:02d}--{val_loss:.2f}.h5").
+
+    If the values can't be formatted with the template (e.g. "{val_loss:d}", as the
+    metrics are floats), the name is "checkpoint.{epoch:02d}" with the extension of the
+    template.
+    """
+    try:
+        return template.format_map(_FormatValues(logs or {}, epoch=epoch))
+    except (AttributeError, IndexError, TypeError, ValueError) as err:
+        LOGGER.warning("Can't format the checkpoint name %r: %s", template, err)
+
+    return f"checkpoint.{epoch:02d}{os.path.splitext(template)[1]}"
+
+
+class AsyncModelCheckpoint(keras.callbacks.Callback):
+    """Keras callback that saves the model after each epoch, without stopping the
+    training while the file is written.
+
+    The weights are copied on the training thread (A fast memory copy), and written to
+    disk from a background thread, through a copy of the model that isn't trained.
+
+    Full model saves don't include the optimizer state, as the model copy isn't
+    compiled.
+
+    Attributes:
+        keep_last: Number of most recent checkpoints kept.
+        keep_best: Number of checkpoints with the best `monitor` value kept.
+
+        A checkpoint is removed only if none of the enabled policies keeps it. A policy
+        is disabled with a 0, and if both are disabled all the checkpoints are kept.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        filename_template: str,
+        weights_only: bool = False,
+        keep_last: int = 0,
+        keep_best: int = 0,
+        monitor: str = "val_loss",
+        mode: "MonitorMode" = MonitorMode.Min,
+        max_pending_saves: int = 2,
+    ):
+        super().__init__()
+
+        self.directory = directory
+        self.filename_template = filename_template
+        self.weights_only = weights_only
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.monitor = monitor
+        self.mode = mode
+
+        # If the writer is slower than the training, the training waits for it instead
+        # of accumulating weights copies on memory
+        self._pending_saves: queue.Queue = queue.Queue(maxsize=max_pending_saves)
+        self._writer_thread: Optional[threading.Thread] = None
+        self._shadow_model: Optional["Model"] = None
+
+        # Saved files (path, monitored value), from oldest to newest
+        self._saved_files: List[Tuple[str, float]] = []
+
+    def on_train_begin(self, logs=None):
+        os.makedirs(self.directory, exist_ok=True)
+
+        # The copy is created on the training thread, before starting the writer
+        self._shadow_model = keras.models.clone_model(self.model)
+
+        self._writer_thread = threading.Thread(
+            target=self._write_pending_saves,
+            args=(self._shadow_model,),
+            name="AsyncModelCheckpoint",
+            daemon=True,
+        )
+        self._writer_thread.start()
+
+    def on_epoch_end(self, epoch: int, logs=None):
+        logs = logs or {}
+
+        file_path = os.path.join(
+            self.directory,
+            format_checkpoint_filename(self.filename_template, epoch + 1, logs),
+        )
+
+        self._pending_saves.put(
+            (file_path, self.model.get_weights(), logs.get(self.monitor, math.nan))
+        )
+
+    def on_train_end(self, logs=None):
+        self.flush()
+
+    def flush(self):
+        """Waits until all the pending checkpoints are written."""
+        if self._writer_thread is None:
+            return
+
+        self._pending_saves.put(None)
+        self._writer_thread.join()
+
+        self._writer_thread = None
+        self._shadow_model = None
+
+    def _write_pending_saves(self, shadow_model: "Model"):
+        while True:
+            pending_save = self._pending_saves.get()
+
+            if pending_save is None:
+                return
+
+            file_path, weights, monitor_value = pending_save
+
+            try:
+                self._write(shadow_model, file_path, weights)
+            except Exception as err:
+                LOGGER.exception("Couldn't save the checkpoint %s: %s", file_path, err)
+                continue
+
+            # A file overwritten by a later epoch only counts as the later one
+            self._saved_files = [
+                (path, value) for path, value in self._saved_files if path != file_path
+            ] + [(file_path, monitor_value)]
+            self._apply_retention()
+
+    def _write(
+        self, shadow_model: "Model", file_path: str, weights: List["np.ndarray"]
+    ):
+        shadow_model.set_weights(weights)
+
+        # The TensorFlow formats write several files (or a directory), so only HDF5
+        # files can be written atomically and listed on the manifest
+        if not is_single_file_format(file_path):
+            self._save(shadow_model, file_path)
+            LOGGER.debug("Checkpoint saved on %s", file_path)
+            return
+
+        with atomic_write(file_path, listed=True) as temp_path:
+            self._save(shadow_model, temp_path)
+
+        LOGGER.debug("Checkpoint saved on %s", file_path)
+
+    def _save(self, shadow_model: "Model", file_path: str):
+        if self.weights_only:
+            shadow_model.save_weights(file_path)
+        else:
+            shadow_model.save(file_path)
+
+    def _apply_retention(self):
+        """Removes the checkpoints not kept by any of the retention policies."""
+        if not self.keep_last and not self.keep_best:
+            return
+
+        kept_files = set()
+
+        if self.keep_last:
+            kept_files.update(path for path, _ in self._saved_files[-self.keep_last :])
+
+        if self.keep_best:
+            sign = -1 if self.mode == MonitorMode.Max else 1
+
+            # Files without the monitored value are ranked last
+            ranked_files = sorted(
+                self._saved_files,
+                key=lambda saved_file: (
+                    math.isnan(saved_file[1]),
+                    sign * saved_file[1],
+                ),
+            )
+            kept_files.update(path for path, _ in ranked_files[: self.keep_best])
+
+        for path, _ in self._saved_files:
+            if path not in kept_files:
+                try:
+                    os.remove(path)
+
+                    if is_single_file_format(path):
+                        remove_from_manifest(path)
+
+                except OSError as err:
+                    LOGGER.warning("Couldn't remove the checkpoint %s: %s", path, err)
+
+        self._saved_files = [
+            (path, value) for path, value in self._saved_files if path in kept_files
+        ]
@@ -7,17 +7,21 @@ from dial_core.utils import log
 from PySide2.QtCore import QSize
 from PySide2.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QFileDialog,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
     QLineEdit,
     QPushButton,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 from tensorflow.keras.callbacks import Callback
 
+from .async_model_checkpoint import AsyncModelCheckpoint, MonitorMode
+
 LOGGER = log.get_logger(__name__)
 
 
@@ -38,11 +42,33 @@ class ModelCheckpointWidget(QWidget):
 
         self._weights_only_checkbox = QCheckBox("Weights only")
 
+        self._keep_last_spinbox = QSpinBox()
+        self._keep_last_spinbox.setRange(0, 10000)
+        self._keep_last_spinbox.setSpecialValueText("Disabled")
+
+        self._keep_best_spinbox = QSpinBox()
+        self._keep_best_spinbox.setRange(0, 10000)
+        self._keep_best_spinbox.setSpecialValueText("Disabled")
+
+        self._monitor_combobox = QComboBox()
+        self._monitor_combobox.setEditable(True)
+        self._monitor_combobox.addItems(
+            ["val_loss", "loss", "val_accuracy", "accuracy"]
+        )
+
+        self._mode_combobox = QComboBox()
+        self._mode_combobox.addItem("Lower is better", MonitorMode.Min.value)
+        self._mode_combobox.addItem("Higher is better", MonitorMode.Max.value)
+
         # Layouts
         self._settings_layout = QFormLayout()
         self._settings_layout.addRow("Save directory:", self._save_path_layout)
         self._settings_layout.addRow("File name:", self._filename_textbox)
         self._settings_layout.addRow("Save weights only?", self._weights_only_checkbox)
+        self._settings_layout.addRow("Keep last:", self._keep_last_spinbox)
+        self._settings_layout.addRow("Keep best:", self._keep_best_spinbox)
+        self._settings_layout.addRow("Monitored metric:", self._monitor_combobox)
+        self._settings_layout.addRow("", self._mode_combobox)
 
         self._settings_group = QGroupBox("Model Checkpoint export settings")
         self._settings_group.setLayout(self._settings_layout)
@@ -52,8 +78,35 @@ class ModelCheckpointWidget(QWidget):
 
         self.setLayout(self._main_layout)
 
+        self._monitor_combobox.currentTextChanged.connect(self._update_monitor_mode)
+
     def get_callbacks(self) -> List[Callback]:
-        return []
+        """Returns a checkpoint callback with the current settings (Or an empty list if
+        no save directory has been selected)."""
+        save_dir = self._save_path_textbox.text().strip()
+
+        if not save_dir:
+            LOGGER.debug("No save directory selected. Checkpoints disabled.")
+            return []
+
+        return [
+            AsyncModelCheckpoint(
+                save_dir,
+                self._filename_textbox.text(),
+                weights_only=self._weights_only_checkbox.isChecked(),
+                keep_last=self._keep_last_spinbox.value(),
+                keep_best=self._keep_best_spinbox.value(),
+                monitor=self._monitor_combobox.currentText(),
+                mode=MonitorMode(self._mode_combobox.currentData()),
+            )
+        ]
+
+    def _update_monitor_mode(self, monitor: str):
+        """Selects the usual mode of the monitored metric (Higher is better for
+        accuracies, lower for the rest)."""
+        mode = MonitorMode.Max if "acc" in monitor else MonitorMode.Min
+
+        self._mode_combobox.setCurrentIndex(self._mode_combobox.findData(mode.value))
 
     def _pick_save_directory(self):
         save_dir = QFileDialog.getExistingDirectory(self, "Save directory...")
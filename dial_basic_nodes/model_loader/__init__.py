@@ -4,6 +4,12 @@ from .model_loader_node import (
     ModelLoaderNode,
     ModelLoaderNodeFactory,
 )
+from .model_file_loader import (
+    FileCheckWorker,
+    ModelFileCache,
+    ModelFileCacheSingleton,
+    ModelLoadWorker,
+)
 #from .conv_debugger_node_cells import ConvDebuggerNodeCells
 from .model_loader_widget import (
     ModelLoaderWidget,
@@ -11,6 +17,10 @@ from .model_loader_widget import (
 )
 
 __all__ = [
+    "FileCheckWorker",
+    "ModelFileCache",
+    "ModelFileCacheSingleton",
+    "ModelLoadWorker",
     "ModelLoaderNode",
     "ModelLoaderNodeFactory",
     "ModelLoaderWidget",
@@ -0,0 +1,235 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Loading of Keras model files outside of the GUI thread.
+
+Parsed files are kept on a small in-memory cache, keyed by their path, modification
+time and size, so loading the same file again (e.g. when reopening a project) only
+costs a copy of the cached model.
+
+Besides HDF5 and JSON files, TensorFlow SavedModel directories can be loaded too.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import dependency_injector.providers as providers
+from dial_core.utils import log
+from PySide2.QtCore import QThread, Signal
+from tensorflow import keras
+
+from dial_basic_nodes.utils.checkpoint_files import FileStatus, verify_file
+from dial_basic_nodes.utils.lazy_weights import (
+    defer_weights,
+    load_architecture,
+    pending_weights_path,
+)
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+SAVED_MODEL_FILENAME = "saved_model.pb"
+
+
+class CorruptedFileError(ValueError):
+    """The file doesn't match the size or checksum listed on its manifest."""
+
+
+class ModelFileCache:
+    """The ModelFileCache class keeps the last loaded models, by file.
+
+    Cached models are never handed out directly: `get` returns a copy, so the nodes
+    modifying (or training) their model don't change the cached one.
+    """
+
+    def __init__(self, max_size: int = 2):
+        self.max_size = max_size
+
+        self._models: "OrderedDict[Tuple, Model]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, lazy_weights: bool = False) -> Tuple[str, int, int, bool]:
+        """Returns the cache key of a file. A file modified on disk gets a new key.
+
+        SavedModel directories are keyed by their `saved_model.pb` file.
+        """
+        stat = os.stat(
+            os.path.join(path, SAVED_MODEL_FILENAME) if os.path.isdir(path) else path
+        )
+
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, lazy_weights)
+
+    def get(self, path: str, lazy_weights: bool = False) -> Optional["Model"]:
+        """Returns a copy of the cached model of `path`, or None if it isn't cached."""
+        key = self.key(path, lazy_weights)
+
+        with self._lock:
+            model = self._models.get(key)
+
+            if model is None:
+                return None
+
+            self._models.move_to_end(key)
+
+        return copy_model(model)
+
+    def put(self, path: str, model: "Model", lazy_weights: bool = False):
+        """Caches `model` as the contents of `path`. The cached object is a copy."""
+        if self.max_size <= 0:
+            return
+
+        key = self.key(path, lazy_weights)
+        cached_model = copy_model(model)
+
+        with self._lock:
+            # Older versions of the same file won't be requested again
+            for stale_key in [
+                k for k in self._models if k[0] == key[0] and k[1:3] != key[1:3]
+            ]:
+                del self._models[stale_key]
+
+            self._models[key] = cached_model
+
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+def copy_model(model: "Model") -> "Model":
+    """Returns a new model with the same architecture and weights as `model`.
+
+    The weights of a model with lazy weights aren't copied, the copy loads them from
+    the same file when needed.
+    """
+    model_copy = keras.models.clone_model(model)
+
+    weights_path = pending_weights_path(model)
+
+    if weights_path is not None:
+        defer_weights(model_copy, weights_path)
+    else:
+        model_copy.set_weights(model.get_weights())
+
+    return model_copy
+
+
+def load_model_file(path: str, lazy_weights: bool = False) -> "Model":
+    """Loads a model from a file: Only the architecture from a JSON file, or the
+    architecture and weights from a HDF5 file or a SavedModel directory.
+
+    Args:
+        path: The file (or SavedModel directory) to load.
+        lazy_weights: If True, the weights of a HDF5 file aren't loaded until they're
+            needed (See `ensure_weights_loaded`).
+
+    Raises:
+        CorruptedFileError: If the file doesn't match its checkpoints manifest.
+        ValueError: If the file isn't a valid model.
+    """
+    if os.path.isdir(path):
+        if lazy_weights:
+            LOGGER.info("SavedModel directories can't load their weights lazily")
+
+        return keras.models.load_model(path)
+
+    if path.endswith(".json"):
+        with open(path) as json_file:
+            return keras.models.model_from_json(json_file.read())
+
+    if verify_file(path, check_contents=not lazy_weights) in (
+        FileStatus.SizeMismatch,
+        FileStatus.ChecksumMismatch,
+    ):
+        raise CorruptedFileError(f"{path} doesn't match its checkpoints manifest")
+
+    if lazy_weights:
+        return load_architecture(path)
+
+    return keras.models.load_model(path)
+
+
+class ModelLoadWorker(QThread):
+    """Loads a model file on a separate thread, going through a `ModelFileCache`.
+
+    Loading can't be interrupted, so a cancelled worker still finishes (and caches the
+    model), but doesn't emit its result.
+
+    Signals:
+        loaded: Emitted with the loaded model.
+        failed: Emitted with the error raised while loading.
+    """
+
+    loaded = Signal(object)
+    failed = Signal(object)
+
+    def __init__(
+        self, path: str, cache: "ModelFileCache", lazy_weights: bool = False
+    ):
+        super().__init__()
+
+        self.path = path
+        self.lazy_weights = lazy_weights
+
+        self._cache = cache
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self):
+        try:
+            model = self._cache.get(self.path, self.lazy_weights)
+
+            if model is not None:
+                LOGGER.debug("Model file %s loaded from the cache", self.path)
+            else:
+                model = load_model_file(self.path, self.lazy_weights)
+                self._cache.put(self.path, model, self.lazy_weights)
+
+        except Exception as err:
+            LOGGER.exception("Couldn't load the model file %s: %s", self.path, err)
+
+            if not self._cancelled:
+                self.failed.emit(err)
+            return
+
+        if not self._cancelled:
+            self.loaded.emit(model)
+
+
+class FileCheckWorker(QThread):
+    """Checks a file against its checkpoints manifest on a separate thread, as the
+    checksum reads the whole file.
+
+    Signals:
+        checked: Emitted with the `FileStatus` of the file.
+    """
+
+    checked = Signal(object)
+
+    def __init__(self, path: str):
+        super().__init__()
+
+        self.path = path
+
+    def run(self):
+        try:
+            status = verify_file(self.path)
+        except OSError as err:
+            LOGGER.warning("Couldn't check the file %s: %s", self.path, err)
+            status = FileStatus.Missing
+
+        self.checked.emit(status)
+
+
+ModelFileCacheSingleton = providers.Singleton(ModelFileCache)
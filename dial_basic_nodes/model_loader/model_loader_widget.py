@@ -1,7 +1,29 @@
 
 import os
+from typing import Set
+
 import PySide2
 import dependency_injector.providers as providers
+from PySide2.QtCore import QThread
+
+from dial_basic_nodes.utils.checkpoint_files import (
+    FileStatus,
+    is_single_file_format,
+    verify_file,
+)
+from dial_basic_nodes.utils.lazy_weights import (
+    discard_pending_weights,
+    ensure_weights_loaded,
+)
+from dial_basic_nodes.utils.model_registry import ModelRegistrySingleton
+from dial_basic_nodes.utils.partial_weights import load_weights_by_name
+
+from .model_file_loader import (
+    CorruptedFileError,
+    FileCheckWorker,
+    ModelFileCacheSingleton,
+    ModelLoadWorker,
+)
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 from PySide2.QtUiTools import loadUiType
@@ -14,12 +36,21 @@ class ModelLoaderWidget(Form, Base):
         
 
         self.loadModelButton.clicked.connect(self.onLoadModelClick)
+        self.loadSavedModelButton.clicked.connect(self.onLoadSavedModelClick)
 
         self.loadWeightsButton.setEnabled(False)
         self.loadWeightsButton.clicked.connect(self.onLoadWeightsClick)
 
         self.loadWeightsInput.setEnabled(False)
 
+        self.cancelLoadButton.clicked.connect(self.cancelLoad)
+        self.setLoadingVisible(False)
+
+        self.modelFileCache = ModelFileCacheSingleton()
+        self.loadWorker = None
+        self.checkWorker = None
+        self.runningWorkers: Set[QThread] = set()
+
         self.model = None
         return
 
@@ -27,40 +58,165 @@ class ModelLoaderWidget(Form, Base):
         
         return self.model
 
+    def checkFile(self, path, status=None):
+        # Checks the file against the manifest written with the checkpoints (if any).
+        # Without a status, only the size is checked, as it doesn't read the file
+        if status is None:
+            status = verify_file(str(path), check_contents=False)
+        if status in (FileStatus.SizeMismatch, FileStatus.ChecksumMismatch):
+            msgBox = PySide2.QtWidgets.QMessageBox()
+            msgBox.setText(
+                "El fichero esta incompleto o corrupto "
+                "(no coincide con el manifiesto de checkpoints)"
+            )
+            msgBox.exec()
+            return False
+        return True
+
     def onLoadModelClick(self,event):
+        modelPath, _ = PySide2.QtWidgets.QFileDialog.getOpenFileName(self,"Open Model file", "", "Keras Model Files(*.h5 *.json)", options=PySide2.QtWidgets.QFileDialog.Options())
+        if modelPath != '':
+            self.loadModelFile(modelPath)
+        return
+
+    def onLoadSavedModelClick(self,event):
+        modelPath = PySide2.QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Open SavedModel directory", ""
+        )
+        if modelPath != '':
+            self.loadModelFile(modelPath)
+        return
+
+    def loadModelFile(self, modelPath):
+        # The file is parsed on a worker thread (or copied from the cache), so the
+        # editor doesn't freeze while loading big models
+        self.cancelLoad()
+        self.checkWorker = None
         self.loadWeightsButton.setEnabled(False)
         self.loadWeightsInput.setEnabled(False)
         self.loadModelInput.clear()
         self.loadWeightsInput.clear()
-        #options = PySide2.QtWidgets.QFileDialog.Options()
-        
-        modelPath, _ = PySide2.QtWidgets.QFileDialog.getOpenFileName(self,"Open Model file", "", "Keras Model Files(*.h5 *.json)", options=PySide2.QtWidgets.QFileDialog.Options())
-        if modelPath != '':
-            from pathlib import Path 
-            modelPath = Path(modelPath)
-            try:
-                if modelPath.suffix == ".json": #Solo la arquitectura
-                    from tensorflow.keras.models import model_from_json
-                    with open(modelPath) as json_file:
-                        self.model = model_from_json(json_file.read())
-                else: #modelPath.suffix == ".h5" #La arquitectura y los pesos
-                    from tensorflow.keras.models import load_model
-                    self.model = load_model(modelPath)
-                self.loadModelInput.insert(str(modelPath))
-                self.loadWeightsButton.setEnabled(True)
-                self.loadWeightsInput.setEnabled(True)
-            except ValueError:
-                msgBox = PySide2.QtWidgets.QMessageBox();
-                msgBox.setText("El fichero esta corrupto o corresponde a los pesos del modelo");
-                msgBox.exec();
+
+        worker = ModelLoadWorker(
+            str(modelPath), self.modelFileCache, self.lazyWeightsCheckbox.isChecked()
+        )
+        worker.loaded.connect(lambda model: self.onModelLoaded(worker, model))
+        worker.failed.connect(lambda error: self.onModelLoadFailed(worker, error))
+        worker.finished.connect(lambda: self.onLoadWorkerFinished(worker))
+        self.loadWorker = worker
+        self.runningWorkers.add(worker)
+
+        self.loadModelButton.setEnabled(False)
+        self.loadSavedModelButton.setEnabled(False)
+        self.setLoadingVisible(True)
+        worker.start()
+        return
+
+    def cancelLoad(self):
+        if self.loadWorker is not None:
+            self.loadWorker.cancel()
+            self.loadWorker = None
+        self.loadModelButton.setEnabled(True)
+        self.loadSavedModelButton.setEnabled(True)
+        self.setLoadingVisible(False)
+        return
+
+    def setLoadingVisible(self, visible):
+        self.loadProgressBar.setVisible(visible)
+        self.cancelLoadButton.setVisible(visible)
+        return
+
+    def onModelLoaded(self, worker, model):
+        if worker is not self.loadWorker:
+            return
+        self.loadWorker = None
+        self.loadModelButton.setEnabled(True)
+        self.loadSavedModelButton.setEnabled(True)
+        self.setLoadingVisible(False)
+
+        self.model = model
+        # Releases the previous model
+        ModelRegistrySingleton().register(self, self.model)
+        self.loadModelInput.insert(worker.path)
+        self.loadWeightsButton.setEnabled(True)
+        self.loadWeightsInput.setEnabled(True)
+        return
+
+    def onModelLoadFailed(self, worker, error):
+        if worker is not self.loadWorker:
+            return
+        self.loadWorker = None
+        self.loadModelButton.setEnabled(True)
+        self.loadSavedModelButton.setEnabled(True)
+        self.setLoadingVisible(False)
+
+        msgBox = PySide2.QtWidgets.QMessageBox()
+        if isinstance(error, CorruptedFileError):
+            msgBox.setText(
+                "El fichero esta incompleto o corrupto "
+                "(no coincide con el manifiesto de checkpoints)"
+            )
+        elif isinstance(error, ValueError):
+            msgBox.setText(
+                "El fichero esta corrupto o corresponde a los pesos del modelo"
+            )
+        else:
+            msgBox.setText("Error.{}".format(error))
+        msgBox.exec()
+        return
+
+    def onLoadWorkerFinished(self, worker):
+        # Cancelled workers are kept alive until their thread ends
+        self.runningWorkers.discard(worker)
+        worker.deleteLater()
         return
 
     def onLoadWeightsClick(self,event):
         self.loadWeightsInput.clear()
         weightPath, _ = PySide2.QtWidgets.QFileDialog.getOpenFileName(self,"Open Weights file", "", "Keras Weights Files(*.h5)", options=PySide2.QtWidgets.QFileDialog.Options())
         if weightPath != '':
+            if not self.checkFile(weightPath):
+                return
+            # The checksum reads the whole file, so it's checked on a worker thread
+            worker = FileCheckWorker(str(weightPath))
+            worker.checked.connect(
+                lambda status: self.onWeightsFileChecked(worker, status)
+            )
+            worker.finished.connect(lambda: self.onLoadWorkerFinished(worker))
+            self.checkWorker = worker
+            self.runningWorkers.add(worker)
+
+            self.loadWeightsButton.setEnabled(False)
+            worker.start()
+        return
+
+    def onWeightsFileChecked(self, worker, status):
+        if worker is not self.checkWorker:
+            return
+        self.checkWorker = None
+        self.loadWeightsButton.setEnabled(True)
+
+        weightPath = worker.path
+        if self.checkFile(weightPath, status):
             try:
-                self.model.load_weights(weightPath)
+                if is_single_file_format(weightPath):
+                    # Layers are matched by name, so edited models keep the weights
+                    # of the layers that didn't change (the rest keep their own weights)
+                    ensure_weights_loaded(self.model)
+                    report = load_weights_by_name(self.model, weightPath)
+                    if not report.loaded:
+                        raise ValueError(
+                            "Ninguna capa del fichero coincide con el modelo"
+                        )
+                    if not report.is_complete:
+                        msgBox = PySide2.QtWidgets.QMessageBox()
+                        msgBox.setText("Pesos cargados parcialmente")
+                        msgBox.setDetailedText(report.summary())
+                        msgBox.exec()
+                else:
+                    self.model.load_weights(weightPath)
+                    # The lazy weights aren't needed anymore
+                    discard_pending_weights(self.model)
                 self.loadWeightsInput.insert(weightPath)
             except Exception as e:
                 msgBox = PySide2.QtWidgets.QMessageBox();
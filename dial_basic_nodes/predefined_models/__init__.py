@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .predefined_models_node import PredefinedModelsNode, PredefinedModelsNodeFactory
 from .predefined_models_node_cells import PredefinedModelsNodeCells
 from .predefined_models_widget import (
@@ -7,6 +9,10 @@ from .predefined_models_widget import (
     PredefinedModelsWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    PredefinedModelsNode, PredefinedModelsNodeCells
+)
+
 __all__ = [
     "PredefinedModelsNode",
     "PredefinedModelsNodeFactory",
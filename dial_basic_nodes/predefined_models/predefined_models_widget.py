@@ -20,6 +20,8 @@ from PySide2.QtWidgets import (
 )
 from tensorflow.keras.models import Model  # noqa: F401
 
+from dial_basic_nodes.utils.model_registry import ModelRegistrySingleton
+
 from .predefined_models_window import PredefinedModelsWindowFactory
 
 LOGGER = log.get_logger(__name__)
@@ -96,6 +98,15 @@ class PredefinedModelsWidget(QWidget):
         self._update_enabled_widgets()
 
     def get_model(self) -> Optional["Model"]:
+        model = self._load_selected_model()
+
+        # The previously loaded model is released
+        if model is not None:
+            ModelRegistrySingleton().register(self, model)
+
+        return model
+
+    def _load_selected_model(self) -> Optional["Model"]:
         try:
             LOGGER.debug("Include Top: %s", self._include_top.isChecked())
             LOGGER.debug("Classes: %s", self._classes_intbox.value())
@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .predefined_ttv_sets_node import (
     PredefinedTTVSetsNode,
     PredefinedTTVSetsNodeFactory,
@@ -10,6 +12,10 @@ from .predefined_ttv_sets_widget import (
     PredefinedTTVSetsWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    PredefinedTTVSetsNode, PredefinedTTVSetsNodeCells
+)
+
 __all__ = [
     "PredefinedTTVSetsNode",
     "PredefinedTTVSetsNodeFactory",
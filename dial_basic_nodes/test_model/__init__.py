@@ -1,9 +1,13 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .test_model_node import TestModelNode, TestModelNodeFactory
 from .test_model_node_cells import TestModelNodeCells
 from .test_model_widget import TestModelWidget, TestModelWidgetFactory
 
+NodeCellsRegistrySingleton().register_transformer(TestModelNode, TestModelNodeCells)
+
 __all__ = [
     "TestModelNode",
     "TestModelNodeFactory",
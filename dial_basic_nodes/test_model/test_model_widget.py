@@ -9,6 +9,8 @@ from PySide2.QtCore import QSize
 from PySide2.QtWidgets import QPushButton, QVBoxLayout, QWidget
 from tensorflow import keras
 
+from dial_basic_nodes.utils.lazy_weights import ensure_weights_loaded
+
 from .test_dataset_table import TestDatasetTableWidgetFactory
 
 LOGGER = log.get_logger(__name__)
@@ -55,6 +57,8 @@ class TestModelWidget(QWidget):
             LOGGER.debug("No trained model selected.")
             return
 
+        ensure_weights_loaded(self._trained_model)
+
         predicted_data = self._trained_model.predict(self._test_dataset_widget.dataset)
         self._test_dataset_widget.set_predict_values(predicted_data)
 
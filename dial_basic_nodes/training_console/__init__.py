@@ -1,9 +1,15 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .training_console_node import TrainingConsoleNode, TrainingConsoleNodeFactory
 from .training_console_node_cells import TrainingConsoleNodeCells
 from .training_console_widget import TrainingConsoleWidget, TrainingConsoleWidgetFactory
 
+NodeCellsRegistrySingleton().register_transformer(
+    TrainingConsoleNode, TrainingConsoleNodeCells
+)
+
 __all__ = [
     "TrainingConsoleWidget",
     "TrainingConsoleWidgetFactory",
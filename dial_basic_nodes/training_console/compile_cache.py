@@ -0,0 +1,170 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import hashlib
+import json
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import tensorflow as tf
+from dial_core.utils import log
+
+from dial_basic_nodes.utils.model_registry import ModelRegistrySingleton
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+
+def compile_fingerprint(
+    model: "Model",
+    input_shape: Tuple,
+    compile_kwargs: Dict,
+    training_options: Dict,
+) -> str:
+    """Returns a hash that identifies the compiled version of `model`.
+
+    Two models with the same architecture, trained on the same input shape with the
+    same compile arguments and options, have the same fingerprint (Even if they're
+    different objects or have different weights).
+    """
+    description = {
+        "model": model.to_json(),
+        "input_shape": list(input_shape),
+        "compile_kwargs": compile_kwargs,
+        "training_options": training_options,
+    }
+
+    return hashlib.sha1(
+        json.dumps(description, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class CompileCache:
+    """The CompileCache class keeps the last compiled models, so a model whose
+    architecture and hyperparameters didn't change isn't built and compiled again.
+
+    Reusing a compiled model also reuses its traced train function, which is the slower
+    part of starting a training on big models.
+
+    Only the last `max_size` models are kept (Least recently used ones are discarded).
+    The kept models are tracked on the `ModelRegistry`. Source models are only weakly
+    referenced, and the compiled models sharing variables with a source model are
+    discarded once it's superseded on the registry, so the cache doesn't keep the
+    superseded models alive.
+    """
+
+    class Entry:
+        def __init__(
+            self,
+            source_model: "Model",
+            compiled_model: "Model",
+            shares_variables: bool,
+        ):
+            self.source_model_ref = weakref.ref(source_model)
+            self.compiled_model = compiled_model
+            self.shares_variables = shares_variables
+
+    def __init__(self, max_size: int = 3):
+        self.max_size = max_size
+
+        self._entries: "OrderedDict[str, CompileCache.Entry]" = OrderedDict()
+
+        ModelRegistrySingleton().add_superseded_callback(self.release_source)
+
+    def get(self, fingerprint: str, source_model: "Model") -> Optional["Model"]:
+        """Returns the compiled model with this fingerprint, if any.
+
+        The returned model is prepared as if it was just compiled from `source_model`:
+        It has the weights of `source_model`, and the state of its optimizer is reset.
+
+        A compiled model built on top of another model (Sharing its variables) is only
+        returned for that same model, as copying the weights of `source_model` into it
+        would overwrite the weights of the other model.
+        """
+        entry = self._entries.get(fingerprint)
+
+        if entry is None:
+            return None
+
+        if entry.shares_variables and entry.source_model_ref() is not source_model:
+            LOGGER.debug("Compiled model %s belongs to another model", fingerprint)
+            return None
+
+        self._entries.move_to_end(fingerprint)
+
+        # If the compiled model was built on top of `source_model` (Without cloning
+        # it), both already have the same variables
+        if not entry.shares_variables:
+            entry.compiled_model.set_weights(source_model.get_weights())
+            entry.source_model_ref = weakref.ref(source_model)
+
+        _reset_optimizer(entry.compiled_model.optimizer)
+
+        LOGGER.info("Reusing the compiled model %s", fingerprint)
+
+        return entry.compiled_model
+
+    def put(
+        self,
+        fingerprint: str,
+        source_model: "Model",
+        compiled_model: "Model",
+        shares_variables: bool,
+    ):
+        """Stores a compiled model.
+
+        Args:
+            fingerprint: Value returned by `compile_fingerprint` for the model.
+            source_model: The model `compiled_model` was created from.
+            compiled_model: The model after being compiled.
+            shares_variables: If `compiled_model` uses the same variables as
+                `source_model` (instead of a copy of them).
+        """
+        self._entries[fingerprint] = self.Entry(
+            source_model, compiled_model, shares_variables
+        )
+        self._entries.move_to_end(fingerprint)
+
+        ModelRegistrySingleton().register(self, compiled_model, slot=fingerprint)
+
+        while len(self._entries) > self.max_size:
+            discarded_fingerprint, _ = self._entries.popitem(last=False)
+            ModelRegistrySingleton().unregister(self, slot=discarded_fingerprint)
+
+    def release_source(self, source_model: "Model"):
+        """Discards the compiled models that share variables with `source_model` (As
+        they keep it alive, and can't be reused for other models).
+
+        Nothing is discarded while another owner still has `source_model` registered.
+        """
+        if ModelRegistrySingleton().is_registered(source_model, ignored_owner=self):
+            return
+
+        for fingerprint, entry in list(self._entries.items()):
+            if entry.shares_variables and entry.source_model_ref() is source_model:
+                del self._entries[fingerprint]
+                ModelRegistrySingleton().unregister(self, slot=fingerprint)
+
+    def clear(self):
+        """Removes all the compiled models."""
+        fingerprints = list(self._entries)
+        self._entries.clear()
+
+        for fingerprint in fingerprints:
+            ModelRegistrySingleton().unregister(self, slot=fingerprint)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _reset_optimizer(optimizer: "tf.keras.optimizers.Optimizer"):
+    """Sets all the optimizer variables (Iterations, moments...) to zero, as they're on
+    a newly created optimizer."""
+    variables = optimizer.variables
+    if callable(variables):
+        variables = variables()
+
+    for variable in variables:
+        variable.assign(tf.zeros_like(variable))
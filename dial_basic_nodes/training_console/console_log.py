@@ -0,0 +1,70 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+from collections import deque
+from typing import TYPE_CHECKING
+
+from PySide2.QtCore import QObject, QTimer
+
+if TYPE_CHECKING:
+    from PySide2.QtWidgets import QPlainTextEdit
+
+
+class ConsoleLog(QObject):
+    """The ConsoleLog class is a ring-buffered log shown on a `QPlainTextEdit`.
+
+    Appended lines are kept on a pending buffer and written to the text box all at once
+    on every tick of a timer, instead of redrawing it on every line. Only the last
+    `max_lines` lines are kept, both on the pending buffer and on the text box, so long
+    trainings don't make the log grow forever.
+    """
+
+    def __init__(
+        self,
+        textbox: "QPlainTextEdit",
+        max_lines: int = 2000,
+        flush_interval: int = 250,
+        parent: "QObject" = None,
+    ):
+        super().__init__(parent)
+
+        self._textbox = textbox
+        self._textbox.setMaximumBlockCount(max_lines)
+
+        self._pending_lines: deque = deque(maxlen=max_lines)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append(self, line: str):
+        """Adds a new line to the log. It will be shown on the next flush."""
+        self._pending_lines.append(line)
+
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def set_text(self, text: str):
+        """Replaces the contents of the log with `text`, showing it immediately."""
+        self.clear()
+
+        for line in text.splitlines():
+            self._pending_lines.append(line)
+
+        self.flush()
+
+    def clear(self):
+        """Removes all the lines of the log (Including the pending ones)."""
+        self._flush_timer.stop()
+        self._pending_lines.clear()
+        self._textbox.clear()
+
+    def flush(self):
+        """Writes all the pending lines to the text box on a single update."""
+        self._flush_timer.stop()
+
+        if not self._pending_lines:
+            return
+
+        self._textbox.appendPlainText("\n".join(self._pending_lines))
+        self._pending_lines.clear()
@@ -0,0 +1,167 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Creation of the `tf.distribute` strategies used for data-parallel training.
+
+Two strategies are supported:
+    * Mirrored: Replicates the model over several logical CPU devices of a single
+      TensorFlow runtime. The CPU can only be split before the runtime is initialized,
+      so it's always used on a freshly spawned training process.
+    * MultiWorker: Replicates the model over several worker processes (Each one with
+      its own TensorFlow runtime), all of them running on localhost.
+"""
+
+import json
+import os
+import socket
+from enum import Enum
+from typing import Dict, List, Optional
+
+import tensorflow as tf
+from dial_core.utils import log
+from tensorflow import keras
+
+LOGGER = log.get_logger(__name__)
+
+
+class WorkerStartError(RuntimeError):
+    """Raised when a worker can't start its server (e.g. its port was taken)."""
+
+
+class Distribution(Enum):
+    Default = "default"
+    Mirrored = "mirrored"
+    MultiWorker = "multi_worker"
+
+
+def split_cpu_devices(count: int) -> List[str]:
+    """Splits the physical CPU into `count` logical devices.
+
+    This can only be done before the TensorFlow runtime is initialized (For example,
+    on a freshly spawned training process). Otherwise, the current logical devices are
+    kept.
+
+    Returns:
+        The names of the logical CPU devices.
+    """
+    physical_cpu = tf.config.list_physical_devices("CPU")[0]
+
+    try:
+        tf.config.set_logical_device_configuration(
+            physical_cpu,
+            [tf.config.LogicalDeviceConfiguration() for _ in range(count)],
+        )
+    except RuntimeError:
+        LOGGER.warning(
+            "The TensorFlow runtime is already initialized, so the CPU can't be split "
+            "on %s devices. Train on a separate process to split it.",
+            count,
+        )
+
+    return [device.name for device in tf.config.list_logical_devices("CPU")]
+
+
+def free_local_addresses(count: int) -> List[str]:
+    """Returns `count` "localhost:port" addresses with currently unused ports.
+
+    The ports are released before returning, so another process could take them
+    before the workers start (Their servers then fail with `WorkerStartError`, and
+    they must be started again on new addresses).
+    """
+    sockets = []
+
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("localhost", 0))
+            sockets.append(sock)
+
+        return [f"localhost:{sock.getsockname()[1]}" for sock in sockets]
+
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def workers_count(training_options: Dict) -> int:
+    """Returns the number of worker processes needed by the training options."""
+    distribution = Distribution(training_options.get("distribution", "default"))
+
+    if distribution == Distribution.MultiWorker:
+        return training_options.get("replicas", 1)
+
+    return 1
+
+
+def workers_addresses(training_options: Dict) -> Optional[List[str]]:
+    """Returns the addresses for the worker processes needed by the training options.
+
+    The MultiWorker strategy always needs them (Even when there is a single worker),
+    the other strategies don't use them.
+    """
+    distribution = Distribution(training_options.get("distribution", "default"))
+
+    if distribution == Distribution.MultiWorker:
+        return free_local_addresses(workers_count(training_options))
+
+    return None
+
+
+def create_strategy(
+    training_options: Dict,
+    worker_index: int = 0,
+    worker_addresses: Optional[List[str]] = None,
+) -> "tf.distribute.Strategy":
+    """Returns the strategy selected on the training options.
+
+    For the MultiWorker strategy, this must be called on each worker process before
+    running any other TensorFlow operation.
+
+    Args:
+        training_options: The options selected on the Training Console.
+        worker_index: Index of the current worker (MultiWorker only).
+        worker_addresses: Addresses of all the workers (MultiWorker only).
+    """
+    distribution = Distribution(training_options.get("distribution", "default"))
+    replicas = training_options.get("replicas", 1)
+
+    if distribution == Distribution.Mirrored:
+        return tf.distribute.MirroredStrategy(split_cpu_devices(replicas))
+
+    if distribution == Distribution.MultiWorker:
+        if not worker_addresses:
+            raise ValueError("The MultiWorker strategy needs the worker addresses")
+
+        os.environ["TF_CONFIG"] = json.dumps(
+            {
+                "cluster": {"worker": worker_addresses},
+                "task": {"type": "worker", "index": worker_index},
+            }
+        )
+
+        # Share the cores between the workers, instead of each one trying to use all
+        tf.config.threading.set_intra_op_parallelism_threads(
+            max(1, (os.cpu_count() or 1) // len(worker_addresses))
+        )
+
+        try:
+            return tf.distribute.MultiWorkerMirroredStrategy()
+        except tf.errors.UnknownError as err:
+            if "gRPC server" not in str(err):
+                raise
+
+            address = worker_addresses[worker_index]
+            raise WorkerStartError(f"Worker can't listen on {address}") from err
+
+    return tf.distribute.get_strategy()
+
+
+def clone_with_weights(model: "keras.models.Model") -> "keras.models.Model":
+    """Returns a copy of `model` with the same weights.
+
+    Called under a strategy scope, the variables of the copy are created on the
+    strategy devices.
+    """
+    cloned_model = keras.models.clone_model(model)
+    cloned_model.set_weights(model.get_weights())
+
+    return cloned_model
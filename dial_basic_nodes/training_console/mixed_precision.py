@@ -0,0 +1,34 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+from tensorflow import keras
+
+
+def clone_with_policy(
+    model: "keras.models.Model", policy_name: str = "mixed_bfloat16"
+) -> "keras.models.Model":
+    """Returns a copy of `model` (weights included) whose layers use the
+    `policy_name` dtype policy.
+
+    The configs of the layers have their dtype set explicitly (Which takes precedence
+    over the global policy), so each layer is rebuilt with its dtype replaced by
+    `policy_name`. The global policy isn't modified, so the models created by other
+    nodes aren't affected.
+
+    The outputs are cast back to float32, as computing the loss on half precision isn't
+    numerically stable.
+    """
+
+    def clone_layer(layer: "keras.layers.Layer") -> "keras.layers.Layer":
+        config = layer.get_config()
+
+        if "dtype" in config and not isinstance(layer, keras.layers.InputLayer):
+            config["dtype"] = policy_name
+
+        return layer.__class__.from_config(config)
+
+    cloned_model = keras.models.clone_model(model, clone_function=clone_layer)
+    cloned_model.set_weights(model.get_weights())
+
+    outputs = keras.layers.Activation("linear", dtype="float32")(cloned_model.output)
+
+    return keras.models.Model(cloned_model.inputs, outputs)
@@ -0,0 +1,449 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Training backend that runs `model.fit` on child processes.
+
+The model architecture is sent as JSON, while its weights and the dataset arrays are
+placed on shared memory blocks, so nothing big is pickled. The child reports the
+training progress through a pipe, which is drained periodically from the GUI thread
+and re-emitted as Qt signals (The same ones emitted by `SignalsCallback`).
+
+If a session directory is selected, the child saves a checkpoint of the training
+state after each epoch (And restores the last one before training, when resuming).
+
+When the training ends, the child writes the trained weights back on the shared
+weights blocks, and the parent loads them on its own copy of the model.
+
+With the MultiWorker distribution, one child is spawned for each worker. All of them
+train on the same shared arrays, but only the first one (the chief) reports its
+progress and writes the trained weights back.
+"""
+
+import contextlib
+import gc
+import multiprocessing
+import tempfile
+import time
+import traceback
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from dial_core.utils import log
+from PySide2.QtCore import QObject, QTimer, Signal
+from tensorflow import keras
+
+from dial_basic_nodes.utils.input_pipeline import build_array_pipeline
+from dial_basic_nodes.utils.shared_arrays import SharedArrays, attach_arrays
+
+from .distribution import (
+    WorkerStartError,
+    create_strategy,
+    workers_addresses,
+    workers_count,
+)
+from .timing_callbacks import (
+    ProfilerTraceCallback,
+    batch_ready_hook,
+    make_timing_callbacks,
+)
+from .training_session import TrainingSession
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+    import numpy as np
+
+LOGGER = log.get_logger(__name__)
+
+# Times the workers are started (On new addresses) if some of them can't listen
+START_ATTEMPTS = 3
+
+
+class PipeCallback(keras.callbacks.Callback):
+    """Keras callback (Living on the child process) that sends the training events
+    through a pipe, and stops the training (or requests a profiler trace) when the
+    parent asks for it.
+
+    If `report_events` is False, the events aren't sent (Only the commands from the
+    parent are processed).
+    """
+
+    def __init__(
+        self,
+        connection: "Connection",
+        seconds_between_updates: float = 0.5,
+        report_events: bool = True,
+        profiler_callback: Optional["ProfilerTraceCallback"] = None,
+    ):
+        super().__init__()
+
+        self._connection = connection
+        self._report_events = report_events
+        self._profiler_callback = profiler_callback
+
+        self.seconds_between_updates = seconds_between_updates
+        self._last_update_time = float("-inf")
+
+    def on_train_batch_end(self, batch: int, logs=None):
+        self._process_commands()
+
+        if not self._report_events:
+            return
+
+        now = time.monotonic()
+
+        if now - self._last_update_time >= self.seconds_between_updates:
+            self._last_update_time = now
+            self._connection.send(("train_batch_end", batch, dict(logs or {})))
+
+    def on_epoch_begin(self, epoch: int, logs=None):
+        if self._report_events:
+            self._connection.send(("epoch_begin", epoch, dict(logs or {})))
+
+    def on_epoch_end(self, epoch: int, logs=None):
+        if self._report_events:
+            self._connection.send(("epoch_end", epoch, dict(logs or {})))
+
+    def _process_commands(self):
+        while self._connection.poll():
+            command = self._connection.recv()
+
+            if command[0] == "stop":
+                self.model.stop_training = True
+
+            elif command[0] == "trace" and self._profiler_callback:
+                self._profiler_callback.request_trace(*command[1:])
+
+
+def _fit_in_child_process(
+    connection: "Connection",
+    model_json: str,
+    weights_specs: List[Dict],
+    data_specs: List[Dict],
+    compile_kwargs: Dict,
+    fit_kwargs: Dict,
+    training_options: Dict,
+    worker_index: int = 0,
+    worker_addresses: Optional[List[str]] = None,
+):
+    """Entry point of the child process. Rebuilds and compiles the model, trains it
+    and writes the trained weights back on the shared weights blocks."""
+    weights_blocks, shared_weights = attach_arrays(weights_specs)
+    data_blocks, data_arrays = attach_arrays(data_specs)
+
+    try:
+        last_logs = _fit(
+            connection,
+            model_json,
+            shared_weights,
+            data_arrays,
+            compile_kwargs,
+            fit_kwargs,
+            training_options,
+            worker_index,
+            worker_addresses,
+        )
+        connection.send(("train_end", last_logs))
+
+    except WorkerStartError:
+        connection.send(("start_failed", traceback.format_exc()))
+
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+
+    finally:
+        # The blocks can't be closed while there are views on them (The arrays, and
+        # the model and tf.data pipelines built over them, released with `_fit`)
+        del shared_weights, data_arrays
+        gc.collect()
+
+        for block in weights_blocks + data_blocks:
+            try:
+                block.close()
+            except BufferError:
+                LOGGER.warning("Shared block %s still in use", block.name)
+
+        connection.close()
+
+
+def _fit(
+    connection: "Connection",
+    model_json: str,
+    shared_weights: List["np.ndarray"],
+    data_arrays: List["np.ndarray"],
+    compile_kwargs: Dict,
+    fit_kwargs: Dict,
+    training_options: Dict,
+    worker_index: int,
+    worker_addresses: Optional[List[str]],
+) -> Dict:
+    """Trains the model on the child process. Returns the logs of the last epoch."""
+    is_chief = worker_index == 0
+
+    # The strategy must be created before running any other TensorFlow operation
+    strategy = create_strategy(training_options, worker_index, worker_addresses)
+
+    with strategy.scope():
+        model = keras.models.model_from_json(model_json)
+        model.set_weights(shared_weights)
+        model.compile(**compile_kwargs)
+
+    fit_kwargs = dict(fit_kwargs)
+    batch_size = fit_kwargs.pop("batch_size")
+
+    with contextlib.ExitStack() as exit_stack:
+        session_callbacks = []
+        session_directory = training_options.get("session_directory")
+
+        if session_directory:
+            # All the workers take part on saving, but only the chief writes on the
+            # session directory (The others write on throwaway directories)
+            session = TrainingSession(
+                session_directory
+                if is_chief
+                else exit_stack.enter_context(tempfile.TemporaryDirectory()),
+                model,
+            )
+
+            if training_options.get("resume"):
+                fit_kwargs["initial_epoch"] = session.restore(session_directory)
+
+            session_callbacks.append(session.callback())
+
+        train_x, train_y = data_arrays[0], data_arrays[1]
+        validation_data = None
+        if len(data_arrays) == 4:
+            validation_data = build_array_pipeline(
+                data_arrays[2], data_arrays[3], batch_size
+            )
+
+        timing_callbacks = make_timing_callbacks(training_options)
+        profiler_callback = ProfilerTraceCallback()
+
+        history = model.fit(
+            build_array_pipeline(
+                train_x,
+                train_y,
+                batch_size,
+                on_batch_ready=batch_ready_hook(timing_callbacks),
+                shuffle=True,
+            ),
+            validation_data=validation_data,
+            callbacks=timing_callbacks
+            + session_callbacks
+            + [
+                profiler_callback,
+                PipeCallback(
+                    connection,
+                    report_events=is_chief,
+                    profiler_callback=profiler_callback,
+                ),
+            ],
+            verbose=0,
+            **fit_kwargs,
+        )
+
+    if is_chief:
+        for shared_weight, trained_weight in zip(shared_weights, model.get_weights()):
+            shared_weight[...] = trained_weight
+
+    return {key: values[-1] for key, values in history.history.items()}
+
+
+class ProcessFitWorker(QObject):
+    """The ProcessFitWorker class trains a model on child processes.
+
+    Has the same signals as `SignalsCallback`, emitted on the GUI thread.
+
+    The training data is read from `shared_data`, which holds the train arrays (x, y)
+    followed, optionally, by the validation arrays. It's owned by the caller, so it can
+    be shared by several workers (and must be released by the caller too).
+
+    If `update_model` is False, the trained weights aren't loaded back on `model`.
+    """
+
+    epoch_begin = Signal(int, dict)
+    epoch_end = Signal(int, dict)
+    train_batch_end = Signal(int, dict)
+    train_end = Signal(dict)
+
+    def __init__(
+        self,
+        model: "keras.models.Model",
+        shared_data: "SharedArrays",
+        compile_kwargs: Dict,
+        fit_kwargs: Dict,
+        training_options: Dict,
+        update_model: bool = True,
+        poll_interval: int = 50,
+        parent: "QObject" = None,
+    ):
+        super().__init__(parent)
+
+        self._model = model
+        self._compile_kwargs = compile_kwargs
+        self._fit_kwargs = fit_kwargs
+        self._training_options = training_options
+        self._update_model = update_model
+
+        self._shared_weights = SharedArrays(model.get_weights())
+        self._shared_data = shared_data
+
+        # The first connection/process always corresponds to the chief worker
+        self._connections: List["Connection"] = []
+        self._processes: List["multiprocessing.Process"] = []
+        self._finished_workers: Set[int] = set()
+        self._start_attempts = 0
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_interval)
+        self._poll_timer.timeout.connect(self._drain_messages)
+
+    def start(self):
+        """Spawns the child processes and starts training on them."""
+        # Forking a process with a running Qt application (or TensorFlow runtime) isn't
+        # safe, so the children are always spawned as fresh interpreters.
+        context = multiprocessing.get_context("spawn")
+
+        self._start_attempts += 1
+
+        workers = workers_count(self._training_options)
+        worker_addresses = workers_addresses(self._training_options)
+
+        model_json = self._model.to_json()
+
+        for worker_index in range(workers):
+            connection, child_connection = context.Pipe()
+
+            process = context.Process(
+                target=_fit_in_child_process,
+                args=(
+                    child_connection,
+                    model_json,
+                    self._shared_weights.specs,
+                    self._shared_data.specs,
+                    self._compile_kwargs,
+                    self._fit_kwargs,
+                    self._training_options,
+                    worker_index,
+                    worker_addresses,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+
+            self._connections.append(connection)
+            self._processes.append(process)
+
+        self._poll_timer.start()
+
+    def stop_model(self):
+        """Asks the child processes to stop the training after the current batch."""
+        if not self.is_running():
+            return
+
+        for connection in self._connections:
+            try:
+                connection.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+
+    def request_trace(self, first_batch: int, last_batch: int, logdir: str):
+        """Asks the chief process to capture a profiler trace of a range of batches.
+
+        See `ProfilerTraceCallback.request_trace`.
+        """
+        if not self.is_running():
+            return
+
+        try:
+            self._connections[0].send(("trace", first_batch, last_batch, logdir))
+        except (BrokenPipeError, OSError):
+            pass
+
+    def is_running(self) -> bool:
+        return any(process.is_alive() for process in self._processes)
+
+    def _drain_messages(self):
+        """Re-emits all the events sent by the children since the last call."""
+        for worker_index, connection in enumerate(self._connections):
+            if worker_index in self._finished_workers:
+                continue
+
+            try:
+                while connection.poll():
+                    self._handle_message(worker_index, connection.recv())
+
+                    # Finished, or started again
+                    if connection not in self._connections:
+                        return
+
+            except (EOFError, OSError):
+                LOGGER.error(
+                    "Training process %s finished unexpectedly (exit code %s)",
+                    worker_index,
+                    self._processes[worker_index].exitcode,
+                )
+                self._finish({})
+                return
+
+    def _handle_message(self, worker_index: int, message):
+        event = message[0]
+
+        if event == "epoch_begin":
+            self.epoch_begin.emit(message[1], message[2])
+
+        elif event == "epoch_end":
+            self.epoch_end.emit(message[1], message[2])
+
+        elif event == "train_batch_end":
+            self.train_batch_end.emit(message[1], message[2])
+
+        elif event == "train_end":
+            self._finished_workers.add(worker_index)
+
+            if worker_index == 0:
+                if self._update_model:
+                    self._model.set_weights(self._shared_weights.arrays())
+
+                self._finish(message[1])
+
+        elif event == "start_failed" and self._start_attempts < START_ATTEMPTS:
+            LOGGER.warning(
+                "Training process %s couldn't start, starting the workers again:\n%s",
+                worker_index,
+                message[1],
+            )
+            self._stop_processes(timeout=0)
+            self.start()
+
+        elif event in ("error", "start_failed"):
+            LOGGER.error(
+                "Error on the training process %s:\n%s", worker_index, message[1]
+            )
+            self._finish({})
+
+    def _finish(self, logs: Dict):
+        self._poll_timer.stop()
+        self._stop_processes(timeout=5)
+
+        self._shared_weights.release()
+
+        self.train_end.emit(logs)
+
+    def _stop_processes(self, timeout: float):
+        """Waits `timeout` seconds for each child process, and terminates it if it's
+        still running."""
+        # If a worker failed, the others could be blocked waiting for it
+        for process in self._processes:
+            process.join(timeout=timeout)
+
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        for connection in self._connections:
+            connection.close()
+
+        self._processes = []
+        self._connections = []
+        self._finished_workers = set()
@@ -0,0 +1,134 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import math
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, List
+
+from PySide2.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+if TYPE_CHECKING:
+    from PySide2.QtCore import QObject
+
+    from .sweep_scheduler import Trial
+
+
+class SweepResultsModel(QAbstractTableModel):
+    """
+    Model with the hyperparameters and results of each trial of a sweep.
+
+    Besides the displayed text, each cell returns its raw value on `SortRole`, so it
+    can be sorted numerically through a `QSortFilterProxyModel`.
+    """
+
+    SortRole = Qt.UserRole
+
+    class Column(IntEnum):
+        Trial = 0
+        Status = 1
+        Epochs = 2
+        Optimizer = 3
+        LossFunction = 4
+        BatchSize = 5
+        Loss = 6
+        ValLoss = 7
+        Accuracy = 8
+        ValAccuracy = 9
+
+    def __init__(self, parent: "QObject" = None):
+        super().__init__(parent)
+
+        self.__trials: List["Trial"] = []
+
+        self.__headers = {
+            self.Column.Trial: "Trial",
+            self.Column.Status: "Status",
+            self.Column.Epochs: "Epochs",
+            self.Column.Optimizer: "Optimizer",
+            self.Column.LossFunction: "Loss function",
+            self.Column.BatchSize: "Batch size",
+            self.Column.Loss: "loss",
+            self.Column.ValLoss: "val_loss",
+            self.Column.Accuracy: "accuracy",
+            self.Column.ValAccuracy: "val_accuracy",
+        }
+
+    def set_trials(self, trials: List["Trial"]):
+        """Sets the trials shown on the table."""
+        self.beginResetModel()
+        self.__trials = trials
+        self.endResetModel()
+
+    def update_trial(self, row: int):
+        """Redraws the row of a trial after its values have changed."""
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, self.columnCount() - 1)
+        )
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """
+        Return the number of rows.
+        """
+        return len(self.__trials)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """
+        Return the number of columns.
+        """
+        return len(self.Column)
+
+    def headerData(
+        self, section: int, orientation: "Qt.Orientation", role: int = Qt.DisplayRole
+    ) -> Any:
+        """
+        Return the name of the headers.
+        """
+        if role != Qt.DisplayRole:
+            return None
+
+        if orientation == Qt.Horizontal:
+            return self.__headers[self.Column(section)]
+
+        return None
+
+    def data(self, index: "QModelIndex", role: int = Qt.DisplayRole) -> Any:
+        """
+        Return the value of a cell, as text (DisplayRole) or as a raw value (SortRole).
+        """
+        if not index.isValid():
+            return None
+
+        trial = self.__trials[index.row()]
+        column = self.Column(index.column())
+        value = self.__value(trial, column)
+
+        if role == self.SortRole:
+            return value
+
+        if role == Qt.DisplayRole:
+            if column == self.Column.Epochs:
+                return f"{trial.epochs_done}/{trial.max_epochs}"
+
+            if isinstance(value, float):
+                return "" if math.isinf(value) else f"{value:.4f}"
+
+            return str(value)
+
+        return None
+
+    def __value(self, trial: "Trial", column: "Column") -> Any:
+        hyperparameters = trial.hyperparameters
+        logs = trial.logs
+
+        return {
+            self.Column.Trial: trial.index,
+            self.Column.Status: trial.status.value,
+            self.Column.Epochs: trial.epochs_done,
+            self.Column.Optimizer: hyperparameters["optimizer"],
+            self.Column.LossFunction: hyperparameters["loss_function"],
+            self.Column.BatchSize: hyperparameters["batch_size"],
+            # Missing metrics are sorted after the rest
+            self.Column.Loss: logs.get("loss", math.inf),
+            self.Column.ValLoss: logs.get("val_loss", math.inf),
+            self.Column.Accuracy: logs.get("accuracy", -math.inf),
+            self.Column.ValAccuracy: logs.get("val_accuracy", -math.inf),
+        }[column]
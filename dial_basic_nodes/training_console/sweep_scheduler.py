@@ -0,0 +1,349 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Scheduler for hyperparameter sweeps.
+
+Each trial trains its own copy of the model on a child process (See
+`ProcessFitWorker`), with at most `concurrency` trials training at the same time. All of
+them read the same shared dataset arrays.
+
+Weak trials are cut early with successive halving: The trials are trained on rungs of
+increasing epochs, and after each rung only the best `1 / reduction_factor` of them
+are promoted to the next one. Only the trials that reach the last rung are trained for
+all their epochs.
+
+Trials continue from where they left on the previous rung, as each one saves its
+training state on its own session directory (See `TrainingSession`).
+
+The trials are ranked by a monitored metric (`val_accuracy` by default). Losses aren't
+comparable between trials with different loss functions, so sweeps over the loss
+function can't be ranked by a loss.
+"""
+
+import math
+import shutil
+import tempfile
+from collections import deque
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from dial_core.utils import log
+from PySide2.QtCore import QObject, Signal
+
+from dial_basic_nodes.model_checkpoint.async_model_checkpoint import MonitorMode
+
+from .distribution import Distribution
+from .process_fit_worker import ProcessFitWorker
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+    from dial_basic_nodes.utils.shared_arrays import SharedArrays
+
+LOGGER = log.get_logger(__name__)
+
+
+class Trial:
+    """A single configuration of hyperparameters tried on a sweep."""
+
+    class Status(Enum):
+        Pending = "Pending"
+        Running = "Running"
+        Finished = "Finished"
+        Cut = "Cut early"
+        Failed = "Failed"
+        Stopped = "Stopped"
+
+    def __init__(
+        self, index: int, hyperparameters: Dict[str, Any], monitor: str = "val_accuracy"
+    ):
+        self.index = index
+        self.hyperparameters = hyperparameters
+        self.monitor = monitor
+
+        self.status = self.Status.Pending
+        self.epochs_done = 0
+        self.logs: Dict[str, float] = {}
+
+        self.session_directory = tempfile.mkdtemp(prefix="dial_sweep_")
+
+    @property
+    def max_epochs(self) -> int:
+        return self.hyperparameters["epochs"]
+
+    @property
+    def score(self) -> Optional[float]:
+        """Value of the monitored metric used for ranking the trials.
+
+        Without validation data, the training value of the metric is used instead (e.g.
+        `accuracy` for `val_accuracy`). None if the metric wasn't logged.
+        """
+        training_monitor = self.monitor[len("val_") :]
+
+        if self.monitor.startswith("val_") and self.monitor not in self.logs:
+            return self.logs.get(training_monitor)
+
+        return self.logs.get(self.monitor)
+
+
+class SweepScheduler(QObject):
+    """The SweepScheduler class trains the trials of a hyperparameters sweep.
+
+    Signals:
+        trial_updated: Emitted (with the trial index) when a trial changes its status
+            or finishes an epoch.
+        finished: Emitted when all the trials have finished (or were stopped).
+    """
+
+    trial_updated = Signal(int)
+    finished = Signal()
+
+    def __init__(
+        self,
+        model: "Model",
+        shared_data: "SharedArrays",
+        trials_hyperparameters: List[Dict[str, Any]],
+        compile_kwargs: Callable[[Dict[str, Any]], Dict],
+        training_options: Dict,
+        concurrency: int = 2,
+        reduction_factor: int = 2,
+        monitor: str = "val_accuracy",
+        mode: "MonitorMode" = MonitorMode.Max,
+        parent: "QObject" = None,
+    ):
+        """
+        Args:
+            model: The model trained on every trial (Each trial trains its own copy).
+            shared_data: The train (and validation) arrays, as in `ProcessFitWorker`.
+            trials_hyperparameters: The hyperparameters of each trial.
+            compile_kwargs: Function returning the arguments passed to `compile` for
+                the hyperparameters of a trial.
+            training_options: The Training Console options used by all the trials.
+            concurrency: Maximum number of trials trained at the same time.
+            reduction_factor: Fraction of trials (1 / reduction_factor) promoted to
+                the next rung.
+            monitor: Metric used for ranking the trials.
+            mode: Whether the best trials have the lowest (Min) or highest (Max) value
+                of `monitor`.
+
+        Raises:
+            ValueError: If the trials are ranked by a loss, but don't use the same loss
+                function.
+        """
+        super().__init__(parent)
+
+        loss_functions = {
+            str(hyperparameters.get("loss_function"))
+            for hyperparameters in trials_hyperparameters
+        }
+
+        if monitor.endswith("loss") and len(loss_functions) > 1:
+            raise ValueError(
+                f"Trials with different loss functions can't be ranked by {monitor}"
+            )
+
+        self._model = model
+        self._shared_data = shared_data
+        self._compile_kwargs = compile_kwargs
+        self._concurrency = max(1, concurrency)
+        self._reduction_factor = max(2, reduction_factor)
+        self._mode = mode
+
+        # Each trial is a single process, with its own session directory
+        self._training_options = {
+            **training_options,
+            "separate_process": True,
+            "distribution": Distribution.Default.value,
+            "replicas": 1,
+            "resume": True,
+        }
+
+        self.trials = [
+            Trial(index, hyperparameters, monitor)
+            for index, hyperparameters in enumerate(trials_hyperparameters)
+        ]
+
+        # With N trials, there are log(N) rungs after the first one
+        self._last_rung = 0
+        while self._reduction_factor ** (self._last_rung + 1) <= len(self.trials):
+            self._last_rung += 1
+
+        self._rung = 0
+        self._rung_trials: List[Trial] = []
+
+        self._queue: deque = deque()
+        self._workers: Dict[int, ProcessFitWorker] = {}
+        self._stopping = False
+
+    def start(self):
+        """Starts training the trials of the first rung."""
+        LOGGER.info(
+            "Starting sweep: %s trials, %s rungs", len(self.trials), self._last_rung + 1
+        )
+
+        self._start_rung(self.trials)
+
+    def stop(self):
+        """Stops all the running trials. Pending trials won't be trained."""
+        if self._stopping or not self.is_running():
+            return
+
+        self._stopping = True
+
+        for trial in self._queue:
+            trial.status = Trial.Status.Stopped
+            self.trial_updated.emit(trial.index)
+
+        self._queue.clear()
+
+        for worker in self._workers.values():
+            worker.stop_model()
+
+        if not self._workers:
+            self._finish()
+
+    def is_running(self) -> bool:
+        return bool(self._workers or self._queue)
+
+    def best_trial(self) -> Optional["Trial"]:
+        """Returns the trial with the best score (Among the ones with results)."""
+        scored_trials = [trial for trial in self.trials if trial.logs]
+
+        return min(scored_trials, key=self._rank, default=None)
+
+    def target_epochs(self, trial: "Trial", rung: int) -> int:
+        """Returns the number of epochs the trial is trained for on `rung`."""
+        rung_fraction = self._reduction_factor ** (self._last_rung - rung)
+
+        return max(1, math.ceil(trial.max_epochs / rung_fraction))
+
+    def _rank(self, trial: "Trial") -> float:
+        """Returns the key used for sorting the trials (Best trials first)."""
+        score = trial.score
+
+        # Trials without the monitored metric are ranked last
+        if score is None or math.isnan(score):
+            return math.inf
+
+        return -score if self._mode == MonitorMode.Max else score
+
+    def _start_rung(self, trials: List["Trial"]):
+        self._rung_trials = trials
+        self._queue = deque(trials)
+
+        LOGGER.info("Sweep rung %s: %s trials", self._rung, len(trials))
+
+        self._schedule()
+
+        if not self.is_running():
+            self._end_rung()
+
+    def _schedule(self):
+        """Starts trials from the queue until the concurrency limit is reached."""
+        while self._queue and len(self._workers) < self._concurrency:
+            trial = self._queue.popleft()
+            target_epochs = self.target_epochs(trial, self._rung)
+
+            # Already trained for these epochs on a previous rung
+            if target_epochs <= trial.epochs_done:
+                continue
+
+            self._start_trial(trial, target_epochs)
+
+    def _start_trial(self, trial: "Trial", target_epochs: int):
+        worker = ProcessFitWorker(
+            self._model,
+            self._shared_data,
+            self._compile_kwargs(trial.hyperparameters),
+            {
+                "epochs": target_epochs,
+                "batch_size": trial.hyperparameters["batch_size"],
+            },
+            {**self._training_options, "session_directory": trial.session_directory},
+            update_model=False,
+            parent=self,
+        )
+
+        def update_epoch(epoch: int, logs: Dict):
+            trial.epochs_done = epoch + 1
+            trial.logs = dict(logs)
+
+            self.trial_updated.emit(trial.index)
+
+        worker.epoch_end.connect(update_epoch)
+        worker.train_end.connect(
+            lambda logs: self._finish_trial(trial, target_epochs, logs)
+        )
+
+        self._workers[trial.index] = worker
+
+        trial.status = Trial.Status.Running
+        self.trial_updated.emit(trial.index)
+
+        worker.start()
+
+    def _finish_trial(self, trial: "Trial", target_epochs: int, logs: Dict):
+        self._workers.pop(trial.index).deleteLater()
+
+        if not logs:
+            trial.status = Trial.Status.Failed
+
+        elif self._stopping and trial.epochs_done < target_epochs:
+            trial.status = Trial.Status.Stopped
+
+        else:
+            trial.logs = dict(logs)
+            trial.epochs_done = target_epochs
+            trial.status = (
+                Trial.Status.Finished
+                if target_epochs >= trial.max_epochs
+                else Trial.Status.Pending
+            )
+
+        self.trial_updated.emit(trial.index)
+
+        if self._stopping:
+            if not self._workers:
+                self._finish()
+            return
+
+        self._schedule()
+
+        if not self.is_running():
+            self._end_rung()
+
+    def _end_rung(self):
+        """Promotes the best trials of the rung to the next one."""
+        candidates = sorted(
+            (
+                trial
+                for trial in self._rung_trials
+                if trial.status in (Trial.Status.Pending, Trial.Status.Finished)
+            ),
+            key=self._rank,
+        )
+
+        if self._rung >= self._last_rung or not candidates:
+            self._finish()
+            return
+
+        promoted_count = math.ceil(len(candidates) / self._reduction_factor)
+
+        for trial in candidates[promoted_count:]:
+            if trial.status == Trial.Status.Pending:
+                trial.status = Trial.Status.Cut
+                self.trial_updated.emit(trial.index)
+
+        self._rung += 1
+        self._start_rung(candidates[:promoted_count])
+
+    def _finish(self):
+        for trial in self.trials:
+            if trial.status == Trial.Status.Pending:
+                trial.status = Trial.Status.Finished
+                self.trial_updated.emit(trial.index)
+
+            shutil.rmtree(trial.session_directory, ignore_errors=True)
+
+        LOGGER.info("Sweep finished")
+
+        self.finished.emit()
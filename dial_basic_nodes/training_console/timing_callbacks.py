@@ -0,0 +1,258 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Keras callbacks that measure how long the training takes.
+
+The measurements are added to the epoch logs, so any callback placed after them on the
+callbacks list (Like `SignalsCallback`) receives them along the Keras metrics.
+
+`ProfilerTraceCallback` captures TensorFlow profiler traces instead, which are written
+to a log directory (Viewable on the TensorBoard Profile tab).
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from dial_core.utils import log
+from tensorflow import keras
+
+LOGGER = log.get_logger(__name__)
+
+
+class StepTimeCallback(keras.callbacks.Callback):
+    """Measures the mean time spent on each training step during an epoch.
+
+    The result (in milliseconds) is added to the epoch logs as `step_time_ms`.
+    """
+
+    LOGS_KEY = "step_time_ms"
+
+    def __init__(self):
+        super().__init__()
+
+        self._epoch_start_time = 0.0
+        self._last_batch_end_time = 0.0
+        self._steps = 0
+
+    def on_epoch_begin(self, epoch: int, logs=None):
+        self._steps = 0
+        self._epoch_start_time = time.perf_counter()
+
+    def on_train_batch_end(self, batch: int, logs=None):
+        # When running several steps per execution, this is only called once every
+        # `steps_per_execution` steps, but `batch` is still the index of the last step
+        self._steps = batch + 1
+        self._last_batch_end_time = time.perf_counter()
+
+    def on_epoch_end(self, epoch: int, logs=None):
+        if logs is None or not self._steps:
+            return
+
+        # Only the train steps are measured (The validation runs after them)
+        elapsed = self._last_batch_end_time - self._epoch_start_time
+        logs[self.LOGS_KEY] = elapsed * 1000 / self._steps
+
+
+class StepProfilerCallback(keras.callbacks.Callback):
+    """Splits the time of each training step into the time spent waiting for the input
+    batch, the time spent computing it, and the time spent on the callbacks.
+
+    The input pipeline must call `record_batch_ready` when a batch is taken from it (See
+    `build_input_pipeline`), and this callback must be the first one of the list:
+        * Input wait: From the batch begin until the batch is taken from the pipeline.
+        * Compute: From the batch is taken until the batch end.
+        * Callbacks: From the batch end until the next batch begin. Includes the rest of
+          callbacks (Like the Qt signals emission) and the Keras loop overhead.
+
+    When running several steps per execution, each "batch" spans all of them, and only
+    the wait for its first batch is counted as input wait.
+
+    The per-epoch means (in milliseconds per step), the p50/p95 step latencies and the
+    throughput (samples/s) are added to the epoch logs.
+    """
+
+    INPUT_WAIT_KEY = "input_wait_ms"
+    COMPUTE_KEY = "compute_ms"
+    CALLBACKS_KEY = "callbacks_ms"
+    STEP_P50_KEY = "step_p50_ms"
+    STEP_P95_KEY = "step_p95_ms"
+    SAMPLES_PER_SECOND_KEY = "samples_per_second"
+
+    def __init__(self):
+        super().__init__()
+
+        # Written from the tf.data threads, read from the training loop
+        self._ready_batches: deque = deque()
+
+        self._batch_begin_time: Optional[float] = None
+        self._batch_end_time: Optional[float] = None
+        self._is_first_step = True
+
+        self._input_waits: List[float] = []
+        self._computes: List[float] = []
+        self._callbacks: List[float] = []
+        self._samples = 0
+        self._steps = 0
+
+    def record_batch_ready(self, batch_size: int):
+        """Marks that a batch of `batch_size` items was taken from the pipeline."""
+        self._ready_batches.append((time.perf_counter(), batch_size))
+
+    def on_train_begin(self, logs=None):
+        self._is_first_step = True
+
+    def on_epoch_begin(self, epoch: int, logs=None):
+        self._input_waits = []
+        self._computes = []
+        self._callbacks = []
+        self._samples = 0
+        self._steps = 0
+        self._batch_end_time = None
+
+    def on_train_batch_begin(self, batch: int, logs=None):
+        self._batch_begin_time = time.perf_counter()
+
+        if self._batch_end_time is not None:
+            self._callbacks.append(self._batch_begin_time - self._batch_end_time)
+
+    def on_train_batch_end(self, batch: int, logs=None):
+        self._batch_end_time = time.perf_counter()
+
+        ready_batches = self._take_ready_batches()
+        if not ready_batches or self._batch_begin_time is None:
+            return
+
+        # The first step also traces the train function, which isn't representative
+        if self._is_first_step:
+            self._is_first_step = False
+            return
+
+        first_ready_time = ready_batches[0][0]
+
+        self._input_waits.append(max(0.0, first_ready_time - self._batch_begin_time))
+        self._computes.append(self._batch_end_time - first_ready_time)
+        self._samples += sum(batch_size for _, batch_size in ready_batches)
+        self._steps += len(ready_batches)
+
+    def on_epoch_end(self, epoch: int, logs=None):
+        if logs is None or not self._steps:
+            return
+
+        step_times = np.add(self._input_waits, self._computes)
+        steps_per_call = self._steps / len(step_times)
+
+        def mean_per_step(times: List[float]) -> float:
+            return float(np.mean(times)) * 1000 / steps_per_call if times else 0.0
+
+        logs[self.INPUT_WAIT_KEY] = mean_per_step(self._input_waits)
+        logs[self.COMPUTE_KEY] = mean_per_step(self._computes)
+        logs[self.CALLBACKS_KEY] = mean_per_step(self._callbacks)
+        logs[self.STEP_P50_KEY] = float(np.percentile(step_times, 50)) * 1000
+        logs[self.STEP_P95_KEY] = float(np.percentile(step_times, 95)) * 1000
+        logs[self.SAMPLES_PER_SECOND_KEY] = self._samples / (
+            float(np.sum(step_times)) + sum(self._callbacks)
+        )
+
+    def _take_ready_batches(self) -> List[Tuple[float, int]]:
+        """Returns (and forgets) the batches taken from the pipeline until now."""
+        ready_batches = []
+
+        while self._ready_batches:
+            ready_batches.append(self._ready_batches.popleft())
+
+        return ready_batches
+
+
+class ProfilerTraceCallback(keras.callbacks.Callback):
+    """Captures a TensorFlow profiler trace of a range of batches.
+
+    The trace can be requested at any moment (Even while the model is training, from
+    another thread). Batch indexes are relative to the epoch, so if the range was
+    already passed, the trace is captured on the next epoch.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self._requested_trace: Optional[Tuple[int, int, str]] = None
+        self._running_trace: Optional[Tuple[int, int, str]] = None
+
+    def request_trace(self, first_batch: int, last_batch: int, logdir: str):
+        """Traces the batches from `first_batch` to `last_batch` (both included) and
+        writes the trace to `logdir`."""
+        self._requested_trace = (first_batch, last_batch, logdir)
+
+    def on_train_batch_begin(self, batch: int, logs=None):
+        requested_trace = self._requested_trace
+
+        if self._running_trace or not requested_trace:
+            return
+
+        first_batch, last_batch, logdir = requested_trace
+
+        if not first_batch <= batch <= last_batch:
+            return
+
+        try:
+            tf.profiler.experimental.start(logdir)
+        except (tf.errors.AlreadyExistsError, tf.errors.UnavailableError) as err:
+            LOGGER.warning("Couldn't start the profiler: %s", err)
+            self._requested_trace = None
+            return
+
+        LOGGER.info("Profiling batches %s..%s", batch, last_batch)
+        self._running_trace = requested_trace
+
+    def on_train_batch_end(self, batch: int, logs=None):
+        if self._running_trace and batch >= self._running_trace[1]:
+            self._stop_trace()
+
+    def on_epoch_end(self, epoch: int, logs=None):
+        # The validation steps aren't traced
+        if self._running_trace:
+            self._stop_trace()
+
+    def on_train_end(self, logs=None):
+        if self._running_trace:
+            self._stop_trace()
+
+    def _stop_trace(self):
+        tf.profiler.experimental.stop()
+
+        LOGGER.info("Profiler trace written to %s", self._running_trace[2])
+
+        # A new trace could have been requested while tracing
+        if self._requested_trace is self._running_trace:
+            self._requested_trace = None
+
+        self._running_trace = None
+
+
+def make_timing_callbacks(options: Dict) -> List[keras.callbacks.Callback]:
+    """Returns the timing callbacks enabled on the training `options`.
+
+    They must be placed first on the callbacks list.
+    """
+    callbacks: List[keras.callbacks.Callback] = []
+
+    if options.get("profile_steps"):
+        callbacks.append(StepProfilerCallback())
+
+    if options.get("report_step_time"):
+        callbacks.append(StepTimeCallback())
+
+    return callbacks
+
+
+def batch_ready_hook(
+    callbacks: List[keras.callbacks.Callback],
+) -> Optional[Callable[[int], None]]:
+    """Returns the function the input pipeline must call when a batch is taken from it
+    (If any of the `callbacks` needs it)."""
+    for callback in callbacks:
+        if isinstance(callback, StepProfilerCallback):
+            return callback.record_batch_ready
+
+    return None
@@ -1,19 +1,30 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+import math
+import os
+import time
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 import dependency_injector.providers as providers
+import tensorflow as tf
 from dial_core.datasets import TTVSets
 from dial_core.utils import log
-from PySide2.QtCore import QObject, QSize, Qt, QThread, Signal
+from PySide2.QtCore import QObject, QSize, QSortFilterProxyModel, Qt, QThread, Signal
 from PySide2.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QFileDialog,
+    QFormLayout,
     QGroupBox,
     QHBoxLayout,
     QLabel,
+    QLineEdit,
     QPlainTextEdit,
     QProgressBar,
     QPushButton,
+    QSpinBox,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
@@ -22,6 +33,34 @@ from tensorflow.keras.callbacks import Callback
 from tensorflow.keras.layers import Input
 from tensorflow.keras.models import Model
 
+from dial_basic_nodes.hyperparameters_config.search_space import sweep_trials
+from dial_basic_nodes.model_checkpoint.async_model_checkpoint import MonitorMode
+from dial_basic_nodes.utils import shared_arrays
+from dial_basic_nodes.utils.input_pipeline import (
+    batches_count,
+    build_input_pipeline,
+    load_arrays,
+)
+from dial_basic_nodes.utils.lazy_weights import ensure_weights_loaded
+from dial_basic_nodes.utils.model_registry import ModelRegistrySingleton
+from dial_basic_nodes.utils.shared_arrays import SharedArrays
+
+from .compile_cache import CompileCache, compile_fingerprint
+from .console_log import ConsoleLog
+from .distribution import Distribution, clone_with_weights, create_strategy
+from .mixed_precision import clone_with_policy
+from .process_fit_worker import ProcessFitWorker
+from .sweep_results_model import SweepResultsModel
+from .sweep_scheduler import SweepScheduler
+from .timing_callbacks import (
+    ProfilerTraceCallback,
+    StepProfilerCallback,
+    StepTimeCallback,
+    batch_ready_hook,
+    make_timing_callbacks,
+)
+from .training_session import CheckpointMismatchError, TrainingSession
+
 LOGGER = log.get_logger(__name__)
 
 
@@ -31,14 +70,20 @@ class SignalsCallback(keras.callbacks.Callback, QObject):
     train_batch_end = Signal(int, dict)
     train_end = Signal(dict)
 
-    def __init__(self, batches_between_updates: int = 100):
+    def __init__(self, seconds_between_updates: float = 0.5):
         keras.callbacks.Callback.__init__(self)
         QObject.__init__(self)
 
-        self.batches_between_updates = batches_between_updates
+        # Batch updates are throttled by time, so the number of emitted signals doesn't
+        # depend on how fast the batches are processed
+        self.seconds_between_updates = seconds_between_updates
+        self._last_update_time = float("-inf")
 
     def on_train_batch_end(self, batch: int, logs=None):
-        if batch % self.batches_between_updates == 0:
+        now = time.monotonic()
+
+        if now - self._last_update_time >= self.seconds_between_updates:
+            self._last_update_time = now
             self.train_batch_end.emit(batch, logs)
 
     def on_train_end(self, logs=None):
@@ -55,18 +100,30 @@ class SignalsCallback(keras.callbacks.Callback, QObject):
 
 
 class FitWorker(QThread):
-    def __init__(self, model, train_dataset, hyperparameters, callbacks):
+    def __init__(
+        self,
+        model,
+        train_dataset,
+        hyperparameters,
+        callbacks,
+        validation_dataset=None,
+        initial_epoch=0,
+    ):
         super().__init__()
 
         self._model = model
         self._train_dataset = train_dataset
+        self._validation_dataset = validation_dataset
         self._hyperparameters = hyperparameters
         self._callbacks = callbacks
+        self._initial_epoch = initial_epoch
 
     def run(self):
         self._model.fit(
             self._train_dataset,
+            validation_data=self._validation_dataset,
             epochs=self._hyperparameters["epochs"],
+            initial_epoch=self._initial_epoch,
             callbacks=self._callbacks,
         )
 
@@ -101,18 +158,115 @@ class TrainingConsoleWidget(QWidget):
         # Widgets
         self._start_training_button = QPushButton("Start training")
         self._stop_training_button = QPushButton("Stop training")
+        self._start_sweep_button = QPushButton("Start sweep")
+        self._start_sweep_button.setEnabled(shared_arrays.is_available())
 
         self._buttons_layout = QHBoxLayout()
         self._buttons_layout.addWidget(self._start_training_button)
         self._buttons_layout.addWidget(self._stop_training_button)
+        self._buttons_layout.addWidget(self._start_sweep_button)
 
         self._status_label = QLabel()
 
+        self._separate_process_checkbox = QCheckBox("Train on a separate process")
+        self._separate_process_checkbox.setEnabled(shared_arrays.is_available())
+
+        self._mixed_precision_checkbox = QCheckBox("Mixed precision (mixed_bfloat16)")
+        self._jit_compile_checkbox = QCheckBox("XLA compilation (jit_compile)")
+
+        self._steps_per_execution_spinbox = QSpinBox()
+        self._steps_per_execution_spinbox.setMinimum(1)
+        self._steps_per_execution_spinbox.setMaximum(10000)
+
+        self._report_step_time_checkbox = QCheckBox("Report step time")
+        self._profile_steps_checkbox = QCheckBox(
+            "Profile steps (input wait / compute / callbacks)"
+        )
+
+        self._distribution_combobox = QComboBox()
+        self._distribution_combobox.addItem(
+            "No distribution", Distribution.Default.value
+        )
+        self._distribution_combobox.addItem(
+            "Mirrored (local CPU devices)", Distribution.Mirrored.value
+        )
+        self._distribution_combobox.addItem(
+            "Multi-worker (localhost processes)", Distribution.MultiWorker.value
+        )
+
+        self._replicas_spinbox = QSpinBox()
+        self._replicas_spinbox.setMinimum(1)
+        self._replicas_spinbox.setMaximum(os.cpu_count() or 1)
+        self._replicas_spinbox.setValue(min(2, self._replicas_spinbox.maximum()))
+
+        self._session_directory_textbox = QLineEdit()
+        self._session_directory_textbox.setPlaceholderText("No checkpoints")
+        self._session_directory_button = QPushButton("Select...")
+
+        session_directory_layout = QHBoxLayout()
+        session_directory_layout.addWidget(self._session_directory_textbox)
+        session_directory_layout.addWidget(self._session_directory_button)
+
+        self._resume_checkbox = QCheckBox("Resume from the last checkpoint")
+        self._resume_checkbox.setChecked(True)
+
+        self._profile_first_batch_spinbox = QSpinBox()
+        self._profile_first_batch_spinbox.setMaximum(1000000)
+        self._profile_first_batch_spinbox.setValue(10)
+        self._profile_last_batch_spinbox = QSpinBox()
+        self._profile_last_batch_spinbox.setMaximum(1000000)
+        self._profile_last_batch_spinbox.setValue(20)
+        self._profile_logdir_textbox = QLineEdit("logs/profile")
+        self._profile_button = QPushButton("Profile")
+        self._profile_button.setEnabled(False)
+
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(self._profile_first_batch_spinbox)
+        profile_layout.addWidget(QLabel(".."))
+        profile_layout.addWidget(self._profile_last_batch_spinbox)
+        profile_layout.addWidget(self._profile_logdir_textbox)
+        profile_layout.addWidget(self._profile_button)
+
+        self._options_layout = QFormLayout()
+        self._options_layout.addRow(self._separate_process_checkbox)
+        self._options_layout.addRow(self._mixed_precision_checkbox)
+        self._options_layout.addRow(self._jit_compile_checkbox)
+        self._options_layout.addRow(
+            "Steps per execution:", self._steps_per_execution_spinbox
+        )
+        self._options_layout.addRow(self._report_step_time_checkbox)
+        self._options_layout.addRow(self._profile_steps_checkbox)
+        self._options_layout.addRow("Distribution:", self._distribution_combobox)
+        self._options_layout.addRow("Replicas/Workers:", self._replicas_spinbox)
+        self._options_layout.addRow("Session directory:", session_directory_layout)
+        self._options_layout.addRow(self._resume_checkbox)
+        self._options_layout.addRow("Profile batches:", profile_layout)
+
+        options_group = QGroupBox("Training options")
+        options_group.setLayout(self._options_layout)
+
         self._batch_progress_bar = QProgressBar()
         self._epoch_progress_bar = QProgressBar()
 
         self.training_output_textbox = QPlainTextEdit()
         self.training_output_textbox.setReadOnly(True)
+        self._console_log = ConsoleLog(self.training_output_textbox, parent=self)
+
+        self._sweep_results_model = SweepResultsModel(parent=self)
+
+        self._sweep_results_proxy_model = QSortFilterProxyModel(self)
+        self._sweep_results_proxy_model.setSourceModel(self._sweep_results_model)
+        self._sweep_results_proxy_model.setSortRole(SweepResultsModel.SortRole)
+
+        self._sweep_results_table = QTableView()
+        self._sweep_results_table.setModel(self._sweep_results_proxy_model)
+        self._sweep_results_table.setSortingEnabled(True)
+
+        sweep_results_group = QGroupBox("Sweep results")
+        sweep_results_layout = QVBoxLayout()
+        sweep_results_layout.setContentsMargins(0, 0, 0, 0)
+        sweep_results_layout.addWidget(self._sweep_results_table)
+        sweep_results_group.setLayout(sweep_results_layout)
 
         console_output_group = QGroupBox("Console output")
         console_output_layout = QVBoxLayout()
@@ -123,7 +277,9 @@ class TrainingConsoleWidget(QWidget):
         self._main_layout = QVBoxLayout()
         self._main_layout.addLayout(self._buttons_layout)
         self._main_layout.addWidget(self._status_label, Qt.AlignRight)
+        self._main_layout.addWidget(options_group)
         self._main_layout.addWidget(console_output_group)
+        self._main_layout.addWidget(sweep_results_group)
         self._main_layout.addWidget(self._batch_progress_bar)
         self._main_layout.addWidget(self._epoch_progress_bar)
         self.setLayout(self._main_layout)
@@ -131,11 +287,40 @@ class TrainingConsoleWidget(QWidget):
         # Connections
         self._start_training_button.clicked.connect(self.start_training)
         self._stop_training_button.clicked.connect(self.stop_training)
+        self._start_sweep_button.clicked.connect(self.start_sweep)
+        self._session_directory_button.clicked.connect(self._select_session_directory)
+        self._profile_button.clicked.connect(self.profile_batches)
+
+        # Changing any of these options requires compiling the model again
+        self._mixed_precision_checkbox.toggled.connect(self._invalidate_compilation)
+        self._jit_compile_checkbox.toggled.connect(self._invalidate_compilation)
+        self._steps_per_execution_spinbox.valueChanged.connect(
+            self._invalidate_compilation
+        )
+        self._separate_process_checkbox.toggled.connect(self._invalidate_compilation)
+        self._distribution_combobox.currentIndexChanged.connect(
+            self._invalidate_compilation
+        )
+        self._distribution_combobox.currentIndexChanged.connect(
+            self._update_separate_process_checkbox
+        )
+        self._replicas_spinbox.valueChanged.connect(self._invalidate_compilation)
 
         # Inner workings
+        self._compile_cache = CompileCache()
+        self._sweep_scheduler: Optional[SweepScheduler] = None
+
         self.training_status = self.TrainingStatus.Not_Compiled
         self._training_thread = None
 
+        # Receives the profiler trace requests of the running training
+        self._trace_requester: Optional[
+            Union[ProfilerTraceCallback, ProcessFitWorker]
+        ] = None
+
+        # Mean step time (and the options used) of the last run that reported it
+        self._previous_step_time: Optional[Tuple[float, str]] = None
+
     @property
     def training_status(self):
         """Returns the current status of the training (Running, Stopped...)"""
@@ -151,19 +336,25 @@ class TrainingConsoleWidget(QWidget):
 
         if self._training_status == self.TrainingStatus.Running:
             self._start_training_button.setEnabled(False)
+            self._start_sweep_button.setEnabled(False)
             self._stop_training_button.setEnabled(True)
             self._status_label.setText("Running")
+            self._profile_button.setEnabled(True)
             self.start_training
 
         elif self._training_status == self.TrainingStatus.Stopped:
             self._start_training_button.setEnabled(True)
+            self._start_sweep_button.setEnabled(shared_arrays.is_available())
             self._stop_training_button.setEnabled(False)
             self._status_label.setText("Stopped")
+            self._profile_button.setEnabled(False)
 
         elif self._training_status == self.TrainingStatus.Not_Compiled:
             self._start_training_button.setEnabled(True)
+            self._start_sweep_button.setEnabled(shared_arrays.is_available())
             self._stop_training_button.setEnabled(False)
             self._status_label.setText("Not Compiled")
+            self._profile_button.setEnabled(False)
 
     def set_ttv(self, ttv: "TTVSets"):
         """Sets the Train/Test/Validation models used for training."""
@@ -196,25 +387,65 @@ class TrainingConsoleWidget(QWidget):
         if not self._is_input_ready():
             return False
 
-        # Create a new model based on the pretrained one, but with a new InputLayer
-        # compatible with the dataset
-        if self._pretrained_model.layers[0].__class__.__name__ != "InputLayer":
-            input_layer = Input(self._ttv.train.input_shape)
-
-            output = self._pretrained_model(input_layer)
-            self._trained_model = Model(input_layer, output)
-        else:
-            self._trained_model = self._pretrained_model
-
         try:
-            self._trained_model.compile(
-                optimizer=self._hyperparameters["optimizer"],
-                loss=self._hyperparameters["loss_function"],
-                metrics=["accuracy"],
+            # Models loaded with lazy weights need them from here on
+            ensure_weights_loaded(self._pretrained_model)
+
+            fingerprint = compile_fingerprint(
+                self._pretrained_model,
+                self._ttv.train.input_shape,
+                self._compile_kwargs(),
+                self._compile_options(),
+            )
+
+            cached_model = self._compile_cache.get(
+                fingerprint, self._pretrained_model
             )
 
+            if cached_model is not None:
+                self._trained_model = cached_model
+                self.training_status = self.TrainingStatus.Stopped
+
+                self._register_trained_model()
+
+                return True
+
+            # Create a new model based on the pretrained one, but with a new
+            # InputLayer compatible with the dataset
+            if self._pretrained_model.layers[0].__class__.__name__ != "InputLayer":
+                input_layer = Input(self._ttv.train.input_shape)
+
+                output = self._pretrained_model(input_layer)
+                self._trained_model = Model(input_layer, output)
+            else:
+                self._trained_model = self._pretrained_model
+
+            shares_variables = True
+
+            with self._distribution_strategy().scope():
+                if self._mixed_precision_checkbox.isChecked():
+                    self._trained_model = clone_with_policy(
+                        self._trained_model, "mixed_bfloat16"
+                    )
+                    shares_variables = False
+
+                elif tf.distribute.has_strategy():
+                    # Variables must be created again under the strategy scope
+                    self._trained_model = clone_with_weights(self._trained_model)
+                    shares_variables = False
+
+            self._trained_model.compile(**self._compile_kwargs())
+
             self._trained_model.summary()
 
+            self._compile_cache.put(
+                fingerprint,
+                self._pretrained_model,
+                self._trained_model,
+                shares_variables,
+            )
+            self._register_trained_model()
+
             LOGGER.info("Model compiled successfully!!")
 
             self.training_status = self.TrainingStatus.Stopped
@@ -224,9 +455,7 @@ class TrainingConsoleWidget(QWidget):
         except Exception as err:
             LOGGER.exception("Model Compiling error: ", err)
 
-            self.training_output_textbox.setPlainText(
-                "> Error while compiling the model:\n", str(err)
-            )
+            self._console_log.set_text(f"> Error while compiling the model:\n{err}")
 
         return False
 
@@ -239,19 +468,53 @@ class TrainingConsoleWidget(QWidget):
                 LOGGER.info("Couldn't compile model. Training not started.")
                 return
 
-        total_train_batches = len(self._ttv.train)
+        batch_size = self._hyperparameters.get("batch_size", self._ttv.train.batch_size)
+        train_on_process = self._trains_on_process()
+
+        training_options = self._training_options()
+
+        if train_on_process and not shared_arrays.is_available():
+            self._console_log.set_text(
+                "> Training on a separate process requires Python 3.8 or newer."
+            )
+            return
+
+        if train_on_process:
+            shared_data = self._share_ttv_arrays(self._ttv)
+
+            train_samples = shared_data.specs[0]["shape"][0]
+            total_train_batches = math.ceil(train_samples / batch_size)
+
+        else:
+            timing_callbacks = make_timing_callbacks(training_options)
+
+            # Build the tf.data pipelines that will feed the model while training
+            train_pipeline = build_input_pipeline(
+                self._ttv.train,
+                batch_size,
+                on_batch_ready=batch_ready_hook(timing_callbacks),
+                shuffle=True,
+            )
+            validation_pipeline = (
+                build_input_pipeline(self._ttv.validation, batch_size)
+                if self._ttv.validation
+                else None
+            )
+
+            total_train_batches = batches_count(train_pipeline) or 0
+
         total_train_epochs = self._hyperparameters["epochs"]
 
         self._batch_progress_bar.setMaximum(total_train_batches)
         self._epoch_progress_bar.setMaximum(total_train_epochs)
         self._epoch_progress_bar.setValue(0)
-        self.training_output_textbox.clear()
+        self._console_log.clear()
 
         def epoch_begin_update(epoch: int, logs):
             message = f"==== Epoch {epoch + 1}/{total_train_epochs} ===="
 
             LOGGER.info(message)
-            self.training_output_textbox.appendPlainText(message)
+            self._console_log.append(message)
             self._epoch_progress_bar.setValue(epoch)
 
         def batch_end_update(batch: int, logs):
@@ -264,55 +527,427 @@ class TrainingConsoleWidget(QWidget):
             for (k, v) in list(logs.items()):
                 message += f" - {k}: {v:.4f}"
 
-            LOGGER.info(message)
-            self.training_output_textbox.appendPlainText(message)
+            LOGGER.debug(message)
+            self._console_log.append(message)
+
+        epoch_step_times: List[float] = []
+
+        def epoch_end_update(epoch: int, logs):
+            if StepTimeCallback.LOGS_KEY in logs:
+                step_time = logs[StepTimeCallback.LOGS_KEY]
+                epoch_step_times.append(step_time)
+
+                self._console_log.append(f"Step time: {step_time:.2f} ms")
+
+            if StepProfilerCallback.INPUT_WAIT_KEY in logs:
+                message = (
+                    "Step breakdown: "
+                    f"input wait {logs[StepProfilerCallback.INPUT_WAIT_KEY]:.2f} ms"
+                    f" - compute {logs[StepProfilerCallback.COMPUTE_KEY]:.2f} ms"
+                    f" - callbacks {logs[StepProfilerCallback.CALLBACKS_KEY]:.2f} ms"
+                    f" | p50 {logs[StepProfilerCallback.STEP_P50_KEY]:.2f} ms"
+                    f" - p95 {logs[StepProfilerCallback.STEP_P95_KEY]:.2f} ms"
+                    " | "
+                    f"{logs[StepProfilerCallback.SAMPLES_PER_SECOND_KEY]:.1f} samples/s"
+                )
+
+                LOGGER.info(message)
+                self._console_log.append(message)
 
         def train_end_update(logs):
             # Put the progress bar at 100% when the training ends
             self._batch_progress_bar.setValue(self._batch_progress_bar.maximum())
             self._epoch_progress_bar.setValue(self._epoch_progress_bar.maximum())
 
+            if epoch_step_times:
+                self._report_step_time(epoch_step_times)
+
+            if train_on_process:
+                shared_data.release()
+
+            ModelRegistrySingleton().set_in_use(trained_model, False)
+            self._console_log.append(
+                f"> Memory: {ModelRegistrySingleton().memory_summary()}"
+            )
+
             # Stop the training
             self.stop_training()
 
-        # Connect callbacks
-        signals_callback = SignalsCallback()
-        signals_callback.epoch_begin.connect(epoch_begin_update)
-        signals_callback.train_batch_end.connect(batch_end_update)
-        signals_callback.train_end.connect(train_end_update)
+        print(self._callbacks)
 
-        self.training_stopped.connect(signals_callback.stop_model)
+        # Start training
+        if train_on_process:
+            if self._callbacks:
+                LOGGER.warning(
+                    "Keras callbacks can't run on the training process. Ignored: %s",
+                    self._callbacks,
+                )
+
+            self._fit_worker = ProcessFitWorker(
+                self._trained_model,
+                shared_data,
+                self._compile_kwargs(),
+                {"epochs": total_train_epochs, "batch_size": batch_size},
+                training_options,
+                parent=self,
+            )
 
-        print(self._callbacks)
-        # log_dir = "logs/fit/" + datetime.datetime.now().strftime("%Y_%m_%d-%H_%M_%S")
+            # The worker re-emits the events sent by the training process
+            signals_emitter = self._fit_worker
+            self._trace_requester = self._fit_worker
 
-        # tb = program.TensorBoard()
-        # tb.configure(argv=[None, "--logdir", log_dir])
-        # url = tb.launch()
-        # print("Launched Tensorboard instance in:", url)
+        else:
+            try:
+                (
+                    self._fit_worker,
+                    signals_emitter,
+                    self._trace_requester,
+                ) = self._create_fit_worker(
+                    train_pipeline,
+                    validation_pipeline,
+                    timing_callbacks,
+                    training_options,
+                )
+            except CheckpointMismatchError as err:
+                LOGGER.warning("Training not started: %s", err)
+                self._console_log.append(f"> Can't resume the training: {err}")
+                return
 
-        # tf_callback=tf.keras.callbacks.TensorBoard(log_dir=log_dir, histogram_freq=1)
-        # tf_callback.set_model(self._trained_model)
+        # Connect callbacks
+        signals_emitter.epoch_begin.connect(epoch_begin_update)
+        signals_emitter.epoch_end.connect(epoch_end_update)
+        signals_emitter.train_batch_end.connect(batch_end_update)
+        signals_emitter.train_end.connect(train_end_update)
 
-        # Start training
-        self._fit_worker = FitWorker(
-            self._trained_model,
-            self._ttv.train,
-            self._hyperparameters,
-            callbacks=[signals_callback] + self._callbacks,
-        )
+        self.training_stopped.connect(signals_emitter.stop_model)
+
+        trained_model = self._trained_model
+        ModelRegistrySingleton().set_in_use(trained_model, True)
 
         self.training_status = self.TrainingStatus.Running
         self._fit_worker.start()
 
         self.training_started.emit()
 
+    def _create_fit_worker(
+        self,
+        train_pipeline: "tf.data.Dataset",
+        validation_pipeline: Optional["tf.data.Dataset"],
+        timing_callbacks: List[Callback],
+        training_options: Dict,
+    ) -> Tuple["FitWorker", "SignalsCallback", "ProfilerTraceCallback"]:
+        """Creates the worker that trains the model on a thread of this process.
+
+        Returns:
+            The worker, the callback that emits its training events, and the callback
+            that captures its profiler traces.
+
+        Raises:
+            CheckpointMismatchError: If the training is resumed, but the last
+                checkpoint of the session doesn't match the model.
+        """
+        signals_callback = SignalsCallback()
+        profiler_callback = ProfilerTraceCallback()
+        session_callbacks, initial_epoch = self._open_session(training_options)
+
+        if initial_epoch:
+            self._console_log.append(f"> Resuming after epoch {initial_epoch}")
+            self._epoch_progress_bar.setValue(initial_epoch)
+
+        fit_worker = FitWorker(
+            self._trained_model,
+            train_pipeline,
+            self._hyperparameters,
+            callbacks=timing_callbacks
+            + session_callbacks
+            + [profiler_callback, signals_callback]
+            + self._callbacks,
+            validation_dataset=validation_pipeline,
+            initial_epoch=initial_epoch,
+        )
+
+        return fit_worker, signals_callback, profiler_callback
+
     def stop_training(self):
         """Stops the training."""
         self.training_status = self.TrainingStatus.Stopped
 
         self.training_stopped.emit()
 
+    def profile_batches(self):
+        """Captures a TensorFlow profiler trace of the batches selected on the
+        "Profile batches" controls, on the running training."""
+        if (
+            self.training_status != self.TrainingStatus.Running
+            or self._trace_requester is None
+        ):
+            return
+
+        first_batch = self._profile_first_batch_spinbox.value()
+        last_batch = max(first_batch, self._profile_last_batch_spinbox.value())
+        logdir = self._profile_logdir_textbox.text().strip() or "logs/profile"
+
+        self._trace_requester.request_trace(first_batch, last_batch, logdir)
+
+        self._console_log.append(
+            f"> Profiling batches {first_batch}..{last_batch} (Trace saved on {logdir})"
+        )
+
+    def start_sweep(self):
+        """Trains the trials of the hyperparameters sweep on child processes."""
+        if self.training_status == self.TrainingStatus.Not_Compiled:
+            if not self.compile_model():
+                LOGGER.info("Couldn't compile model. Sweep not started.")
+                return
+
+        trials = sweep_trials(self._hyperparameters)
+
+        if not trials:
+            self._console_log.set_text(
+                "> No sweep configured on the Hyperparameters node."
+            )
+            return
+
+        sweep = self._hyperparameters["sweep"]
+        shared_data = self._share_ttv_arrays(self._ttv)
+
+        if self._sweep_scheduler:
+            self._sweep_scheduler.deleteLater()
+
+        # The trials can't be profiled
+        self._trace_requester = None
+
+        try:
+            self._sweep_scheduler = SweepScheduler(
+                self._trained_model,
+                shared_data,
+                trials,
+                self._compile_kwargs,
+                self._training_options(),
+                concurrency=sweep.get("concurrency", 2),
+                monitor=sweep.get("monitor", "val_accuracy"),
+                mode=MonitorMode(sweep.get("monitor_mode", MonitorMode.Max.value)),
+                parent=self,
+            )
+        except ValueError as err:
+            shared_data.release()
+            self._sweep_scheduler = None
+
+            self._console_log.set_text(f"> {err}")
+            return
+
+        self._sweep_results_model.set_trials(self._sweep_scheduler.trials)
+        self._sweep_scheduler.trial_updated.connect(
+            self._sweep_results_model.update_trial
+        )
+
+        def sweep_finished():
+            shared_data.release()
+
+            best_trial = self._sweep_scheduler.best_trial()
+
+            if best_trial:
+                message = (
+                    f"> Best trial: {best_trial.index}"
+                    f" ({best_trial.monitor} {best_trial.score})"
+                    f" - {best_trial.hyperparameters}"
+                )
+
+                LOGGER.info(message)
+                self._console_log.append(message)
+
+            self.stop_training()
+
+        self._sweep_scheduler.finished.connect(sweep_finished)
+        self.training_stopped.connect(self._sweep_scheduler.stop)
+
+        self._console_log.clear()
+        self._console_log.append(f"> Starting sweep of {len(trials)} trials")
+
+        self.training_status = self.TrainingStatus.Running
+        self._sweep_scheduler.start()
+
+        self.training_started.emit()
+
+    def _compile_kwargs(self, hyperparameters: Optional[Dict] = None) -> Dict:
+        """Returns the arguments passed to `Model.compile`.
+
+        Args:
+            hyperparameters: The hyperparameters used. By default, the ones set on the
+                widget.
+
+        Raises:
+            ValueError: If no hyperparameters are passed and the widget has none set.
+        """
+        hyperparameters = hyperparameters or self._hyperparameters
+
+        if hyperparameters is None:
+            raise ValueError("Hyperparameters not specified")
+
+        compile_kwargs = {
+            "optimizer": hyperparameters["optimizer"],
+            "loss": hyperparameters["loss_function"],
+            "metrics": ["accuracy"],
+        }
+
+        # Only passed when used, as older TensorFlow versions don't accept them
+        steps_per_execution = self._steps_per_execution_spinbox.value()
+        if steps_per_execution > 1:
+            compile_kwargs["steps_per_execution"] = steps_per_execution
+
+        if self._jit_compile_checkbox.isChecked():
+            compile_kwargs["jit_compile"] = True
+
+        return compile_kwargs
+
+    def _share_ttv_arrays(self, ttv: "TTVSets") -> "SharedArrays":
+        """Returns the train (and validation) items of `ttv` placed on shared memory,
+        so they can be read by the training processes.
+
+        The items are loaded and processed here, so the children receive them ready to
+        be used.
+        """
+        arrays = list(load_arrays(ttv.train))
+
+        if ttv.validation:
+            arrays += list(load_arrays(ttv.validation))
+
+        return SharedArrays(arrays)
+
+    def _register_trained_model(self):
+        """Registers the compiled model (releasing the previous one) and reports the
+        memory used by the live models."""
+        ModelRegistrySingleton().register(self, self._trained_model, "trained_model")
+
+        message = f"Memory: {ModelRegistrySingleton().memory_summary()}"
+
+        LOGGER.info(message)
+        self._console_log.append(f"> {message}")
+
+    def _compile_options(self) -> Dict:
+        """Returns the training options that change how the model is compiled."""
+        training_options = self._training_options()
+        compile_keys = [
+            "separate_process",
+            "mixed_precision",
+            "distribution",
+            "replicas",
+        ]
+
+        return {key: training_options[key] for key in compile_keys}
+
+    def _training_options(self) -> Dict:
+        """Returns the options selected on the "Training options" group."""
+        return {
+            "separate_process": self._separate_process_checkbox.isChecked(),
+            "mixed_precision": self._mixed_precision_checkbox.isChecked(),
+            "jit_compile": self._jit_compile_checkbox.isChecked(),
+            "steps_per_execution": self._steps_per_execution_spinbox.value(),
+            "report_step_time": self._report_step_time_checkbox.isChecked(),
+            "profile_steps": self._profile_steps_checkbox.isChecked(),
+            "distribution": self._distribution_combobox.currentData(),
+            "replicas": self._replicas_spinbox.value(),
+            "session_directory": self._session_directory_textbox.text().strip(),
+            "resume": self._resume_checkbox.isChecked(),
+        }
+
+    def _trains_on_process(self) -> bool:
+        """Checks if the model will be trained on child processes.
+
+        Distributed trainings always run on child processes: MultiWorker needs a
+        process for each worker, and Mirrored can only split the CPU in devices before
+        the TensorFlow runtime is initialized (It always is on this process).
+        """
+        return (
+            self._separate_process_checkbox.isChecked()
+            or self._distribution_combobox.currentData() != Distribution.Default.value
+        )
+
+    def _update_separate_process_checkbox(self):
+        """Shows that distributed trainings always run on a separate process."""
+        distributed = (
+            self._distribution_combobox.currentData() != Distribution.Default.value
+        )
+
+        if distributed:
+            self._separate_process_checkbox.setChecked(True)
+
+        self._separate_process_checkbox.setEnabled(
+            shared_arrays.is_available() and not distributed
+        )
+
+    def _distribution_strategy(self) -> "tf.distribute.Strategy":
+        """Returns the strategy used for training the model on this process.
+
+        Models trained on child processes use the default strategy here, as each child
+        creates its own strategy.
+        """
+        if self._trains_on_process():
+            return tf.distribute.get_strategy()
+
+        return create_strategy(self._training_options())
+
+    def _open_session(self, training_options: Dict) -> Tuple[List[Callback], int]:
+        """Opens the training session selected on the options, restoring its last
+        checkpoint if the training should be resumed.
+
+        Returns:
+            The callbacks that save the session after each epoch, and the epoch the
+            training starts from.
+        """
+        directory = training_options["session_directory"]
+
+        if not directory:
+            return [], 0
+
+        session = TrainingSession(directory, self._trained_model)
+        initial_epoch = session.restore() if training_options["resume"] else 0
+
+        return [session.callback()], initial_epoch
+
+    def _select_session_directory(self):
+        """Opens a dialog for selecting the directory where the session is saved."""
+        directory = QFileDialog.getExistingDirectory(
+            self, "Select the session directory", self._session_directory_textbox.text()
+        )
+
+        if directory:
+            self._session_directory_textbox.setText(directory)
+
+    def _invalidate_compilation(self):
+        """Marks the model as not compiled, so it's compiled again before training."""
+        if self.training_status != self.TrainingStatus.Running:
+            self.training_status = self.TrainingStatus.Not_Compiled
+
+    def _report_step_time(self, epoch_step_times: List[float]):
+        """Shows the mean step time of the last run, compared with the previous one."""
+        # The first epoch also includes tracing (and XLA compilation) time
+        measured_times = epoch_step_times[1:] or epoch_step_times
+        step_time = sum(measured_times) / len(measured_times)
+
+        options = self._training_options()
+        description = ", ".join(
+            [
+                "mixed_bfloat16" if options["mixed_precision"] else "float32",
+                "XLA" if options["jit_compile"] else "no XLA",
+                f"{options['steps_per_execution']} steps/execution",
+            ]
+        )
+
+        message = f"Mean step time: {step_time:.2f} ms ({description})"
+
+        if self._previous_step_time:
+            previous_time, previous_description = self._previous_step_time
+            message += (
+                f"\nPrevious run: {previous_time:.2f} ms ({previous_description})"
+                f" -> x{previous_time / step_time:.2f} speedup"
+            )
+
+        LOGGER.info(message)
+        self._console_log.append(message)
+
+        self._previous_step_time = (step_time, description)
+
     def _is_input_ready(self) -> bool:
         """Checks if the input values used for training (model, dataset,
         hyperparameters...) are valid."""
@@ -328,7 +963,7 @@ class TrainingConsoleWidget(QWidget):
             message += "> Hyperparameters not specified.\n"
 
         if message:
-            self.training_output_textbox.setPlainText(message)
+            self._console_log.set_text(message)
             LOGGER.info(message)
             return False
 
@@ -0,0 +1,118 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+from typing import TYPE_CHECKING, Optional
+
+import tensorflow as tf
+from dial_core.utils import log
+from tensorflow import keras
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+
+class CheckpointMismatchError(ValueError):
+    """Raised when the last checkpoint of a session doesn't match the model."""
+
+
+class TrainingSession:
+    """The TrainingSession class persists the state of a training (model weights,
+    optimizer state and number of completed epochs) on a checkpoint directory, so a
+    stopped or crashed training can be resumed from its last completed epoch.
+
+    The model must be compiled before creating the session, as its optimizer is also
+    saved.
+    """
+
+    def __init__(self, directory: str, model: "Model", max_to_keep: int = 2):
+        self.directory = directory
+
+        self._model = model
+        self._completed_epochs = tf.Variable(0, trainable=False, dtype=tf.int64)
+
+        self._checkpoint = tf.train.Checkpoint(
+            model=model,
+            optimizer=model.optimizer,
+            completed_epochs=self._completed_epochs,
+        )
+        self._manager = tf.train.CheckpointManager(
+            self._checkpoint, directory, max_to_keep=max_to_keep
+        )
+
+    def restore(self, directory: Optional[str] = None) -> int:
+        """Restores the last saved state, if any.
+
+        The optimizer slots are restored as soon as they're created (On the first
+        training step).
+
+        Args:
+            directory: Directory to restore the state from. By default, the session
+                directory.
+
+        Returns:
+            The number of completed epochs, to be used as the `initial_epoch` of `fit`.
+
+        Raises:
+            CheckpointMismatchError: If the checkpoint doesn't match the model (The
+                model is left untouched).
+        """
+        directory = directory or self.directory
+        last_checkpoint = tf.train.latest_checkpoint(directory)
+
+        if not last_checkpoint:
+            LOGGER.info("No checkpoints found on %s", directory)
+            return 0
+
+        # A checkpoint that doesn't match could restore only some of the variables, so
+        # it's checked on a copy of the model before restoring it
+        self._check_matches(last_checkpoint)
+
+        self._checkpoint.restore(last_checkpoint).assert_existing_objects_matched()
+
+        completed_epochs = int(self._completed_epochs.numpy())
+        LOGGER.info(
+            "Restored %s. Resuming after epoch %s", last_checkpoint, completed_epochs
+        )
+
+        return completed_epochs
+
+    def _check_matches(self, checkpoint_path: str):
+        """Restores a checkpoint on a copy of the model and its optimizer.
+
+        Raises:
+            CheckpointMismatchError: If the checkpoint doesn't match the copy.
+        """
+        optimizer = self._model.optimizer
+
+        try:
+            checkpoint = tf.train.Checkpoint(
+                model=keras.models.clone_model(self._model),
+                optimizer=type(optimizer).from_config(optimizer.get_config()),
+                completed_epochs=tf.Variable(0, trainable=False, dtype=tf.int64),
+            )
+            checkpoint.restore(checkpoint_path).assert_existing_objects_matched()
+
+        except (AssertionError, ValueError) as err:
+            raise CheckpointMismatchError(
+                f"Checkpoint {checkpoint_path} doesn't match the model: {err}"
+            ) from err
+
+    def save(self, completed_epochs: int):
+        """Saves the current training state."""
+        self._completed_epochs.assign(completed_epochs)
+        self._manager.save(checkpoint_number=completed_epochs)
+
+    def callback(self) -> "keras.callbacks.Callback":
+        """Returns a Keras callback that saves the session after each epoch."""
+        return TrainingSessionCallback(self)
+
+
+class TrainingSessionCallback(keras.callbacks.Callback):
+    def __init__(self, session: "TrainingSession"):
+        super().__init__()
+
+        self._session = session
+
+    def on_epoch_end(self, epoch: int, logs=None):
+        self._session.save(completed_epochs=epoch + 1)
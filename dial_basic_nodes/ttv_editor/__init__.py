@@ -1,9 +1,15 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .ttv_sets_editor_node import TTVSetsEditorNode, TTVSetsEditorNodeFactory
 from .ttv_sets_editor_node_cells import TTVSetsEditorNodeCells
 from .ttv_sets_editor_widget import TTVSetsEditorWidget, TTVSetsEditorWidgetFactory
 
+NodeCellsRegistrySingleton().register_transformer(
+    TTVSetsEditorNode, TTVSetsEditorNodeCells
+)
+
 __all__ = [
     "TTVSetsEditorNode",
     "TTVSetsEditorNodeFactory",
@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .ttv_sets_exporter_node import TTVSetsExporterNode, TTVSetsExporterNodeFactory
 from .ttv_sets_exporter_node_cells import TTVSetsExporterNodeCells
 from .ttv_sets_exporter_widget import (
@@ -7,6 +9,10 @@ from .ttv_sets_exporter_widget import (
     TTVSetsExporterWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    TTVSetsExporterNode, TTVSetsExporterNodeCells
+)
+
 __all__ = [
     "TTVSetsExporterNode",
     "TTVSetsExporterNodeFactory",
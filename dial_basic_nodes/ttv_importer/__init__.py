@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .ttv_sets_importer_node import TTVSetsImporterNode, TTVSetsImporterNodeFactory
 from .ttv_sets_importer_node_cells import TTVSetsImporterNodeCells
 from .ttv_sets_importer_widget import (
@@ -7,6 +9,10 @@ from .ttv_sets_importer_widget import (
     TTVSetsImporterWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    TTVSetsImporterNode, TTVSetsImporterNodeCells
+)
+
 __all__ = [
     "TTVSetsImporterNode",
     "TTVSetsImporterNodeFactory",
@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .ttv_sets_merger_node import TTVSetsMergerNode, TTVSetsMergerNodeFactory
 from .ttv_sets_merger_node_cells import TTVSetsMergerNodeCells
 from .ttv_sets_merger_widget import (
@@ -7,6 +9,10 @@ from .ttv_sets_merger_widget import (
     TTVSetsMergerWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    TTVSetsMergerNode, TTVSetsMergerNodeCells
+)
+
 __all__ = [
     "TTVSetsMergerNode",
     "TTVSetsMergerNodeFactory",
@@ -1,5 +1,7 @@
 # vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
 
+from dial_core.notebook import NodeCellsRegistrySingleton
+
 from .ttv_sets_splitter_node import TTVSetsSplitterNode, TTVSetsSplitterNodeFactory
 from .ttv_sets_splitter_node_cells import TTVSetsSplitterNodeCells
 from .ttv_sets_splitter_widget import (
@@ -7,6 +9,10 @@ from .ttv_sets_splitter_widget import (
     TTVSetsSplitterWidgetFactory,
 )
 
+NodeCellsRegistrySingleton().register_transformer(
+    TTVSetsSplitterNode, TTVSetsSplitterNodeCells
+)
+
 __all__ = [
     "TTVSetsSplitterNode",
     "TTVSetsSplitterNodeFactory",
@@ -0,0 +1,210 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Interrupt-safe writing of checkpoint files.
+
+Files are written to a temporary file on the same directory, flushed to disk and then
+renamed to their final name, which is atomic: A reader sees either the previous file
+or the new one, but never a truncated one.
+
+Each directory keeps a manifest (`MANIFEST_NAME`) with the size and SHA-256 checksum
+of the files written on it, so they can be verified before loading them. A listed file
+is renamed and added to the manifest while holding a lock, so the threads of the process
+never see a file with the manifest entry of its previous version.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+from dial_core.utils import log
+
+LOGGER = log.get_logger(__name__)
+
+MANIFEST_NAME = "checkpoints_manifest.json"
+
+SINGLE_FILE_EXTENSIONS = (".h5", ".hdf5")
+
+# Held while a manifest is read and updated (Or a listed file renamed)
+_manifest_lock = threading.RLock()
+
+
+class FileStatus(Enum):
+    Verified = "verified"
+    Unlisted = "unlisted"
+    SizeMismatch = "size_mismatch"
+    ChecksumMismatch = "checksum_mismatch"
+    Missing = "missing"
+
+
+def is_single_file_format(path: str) -> bool:
+    """Returns True if Keras saves `path` as a single (HDF5) file, chosen by its
+    extension."""
+    return os.path.splitext(path)[1].lower() in SINGLE_FILE_EXTENSIONS
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, listed: bool = False) -> Iterator[str]:
+    """Context manager that returns a temporary path to write `path` on.
+
+    When the context exits without errors, the temporary file is synced to disk and
+    renamed to `path`. Otherwise, it's removed and `path` is left untouched.
+
+    The temporary path keeps the extension of `path`, as some writers (like Keras)
+    choose the file format from it.
+
+    Args:
+        path: The final path of the file.
+        listed: If True, the file is added to the manifest of its directory at the
+            same time it's renamed.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    _, extension = os.path.splitext(filename)
+
+    temp_path = os.path.join(
+        directory, f".{filename}.{uuid.uuid4().hex[:8]}.tmp{extension}"
+    )
+
+    try:
+        yield temp_path
+
+        _fsync_file(temp_path)
+
+        if listed:
+            # Checksummed before taking the lock, as it reads the whole file
+            entry = _manifest_entry(temp_path)
+
+            with _manifest_lock:
+                os.replace(temp_path, path)
+                _update_manifest(directory, {filename: entry})
+        else:
+            os.replace(temp_path, path)
+
+        _fsync_directory(directory)
+
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def file_checksum(path: str, chunk_size: int = 2 ** 20) -> str:
+    """Returns the SHA-256 checksum of a file."""
+    checksum = hashlib.sha256()
+
+    with open(path, "rb") as checked_file:
+        for chunk in iter(lambda: checked_file.read(chunk_size), b""):
+            checksum.update(chunk)
+
+    return checksum.hexdigest()
+
+
+def read_manifest(directory: str) -> Dict[str, Dict]:
+    """Returns the manifest entries of the files of `directory` (by file name)."""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as manifest_file:
+            return json.load(manifest_file).get("files", {})
+
+    except FileNotFoundError:
+        return {}
+
+    except (OSError, ValueError) as err:
+        LOGGER.warning("Couldn't read the manifest of %s: %s", directory, err)
+        return {}
+
+
+def add_to_manifest(path: str):
+    """Adds (or updates) the size and checksum of `path` on its directory manifest."""
+    directory, filename = os.path.split(os.path.abspath(path))
+    entry = _manifest_entry(path)
+
+    with _manifest_lock:
+        _update_manifest(directory, {filename: entry})
+
+
+def remove_from_manifest(path: str):
+    """Removes `path` from its directory manifest."""
+    directory, filename = os.path.split(os.path.abspath(path))
+
+    with _manifest_lock:
+        _update_manifest(directory, {filename: None})
+
+
+def verify_file(path: str, check_contents: bool = True) -> "FileStatus":
+    """Checks `path` against its directory manifest.
+
+    The size is checked first, as it's cheap and detects truncated files. The checksum
+    (which reads the whole file) is only checked if `check_contents` is True.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+
+    with _manifest_lock:
+        if not os.path.isfile(path):
+            return FileStatus.Missing
+
+        entry = read_manifest(directory).get(filename)
+        size = os.path.getsize(path)
+
+    if entry is None:
+        return FileStatus.Unlisted
+
+    if size != entry["size"]:
+        return FileStatus.SizeMismatch
+
+    if check_contents and file_checksum(path) != entry["sha256"]:
+        return FileStatus.ChecksumMismatch
+
+    return FileStatus.Verified
+
+
+def _manifest_entry(path: str) -> Dict:
+    return {
+        "size": os.path.getsize(path),
+        "sha256": file_checksum(path),
+        "written_at": time.time(),
+    }
+
+
+def _update_manifest(directory: str, entries: Dict[str, Optional[Dict]]):
+    """Sets (Or removes, if None) entries of the manifest of `directory`. Must be
+    called while holding `_manifest_lock`."""
+    files = read_manifest(directory)
+    previous_files = dict(files)
+
+    for filename, entry in entries.items():
+        if entry is not None:
+            files[filename] = entry
+        else:
+            files.pop(filename, None)
+
+    if files == previous_files:
+        return
+
+    with atomic_write(os.path.join(directory, MANIFEST_NAME)) as temp_path:
+        with open(temp_path, "w") as manifest_file:
+            json.dump({"files": files}, manifest_file, indent=2, sort_keys=True)
+
+
+def _fsync_file(path: str):
+    with open(path, "rb+") as written_file:
+        os.fsync(written_file.fileno())
+
+
+def _fsync_directory(directory: str):
+    """Syncs the directory entry, so the rename itself survives a crash. Not supported
+    on every platform (e.g. Windows)."""
+    try:
+        directory_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(directory_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_fd)
@@ -0,0 +1,222 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Helpers for feeding a `Dataset` to Keras through a `tf.data` input pipeline.
+
+The item indexes are shuffled (For training), batched with the configured batch size,
+and the items of each batch are loaded and processed (including the transformations of
+its `x_type`) on a single map call. Batches are prefetched while the model is still
+training on the previous one.
+
+Loading runs Python code (`Dataset.items`), so the parallel map calls are bound by the
+GIL: Loading whole batches keeps the overhead of each call low, but they don't load
+items in parallel.
+
+Optionally, a function can be called every time the training loop takes a batch from
+the prefetch buffer (For measuring how long it waited for it).
+"""
+
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from dial_core.utils import log
+
+if TYPE_CHECKING:
+    from dial_core.datasets import Dataset
+
+
+LOGGER = log.get_logger(__name__)
+
+AUTOTUNE = tf.data.experimental.AUTOTUNE
+
+
+def count_samples(dataset: "Dataset") -> int:
+    """Returns the number of items on `dataset`.
+
+    `Dataset` only exposes its length in batches, so only the last batch is read to
+    know how many items it has.
+    """
+    total_batches = len(dataset)
+
+    if total_batches == 0:
+        return 0
+
+    last_batch_start = (total_batches - 1) * dataset.batch_size
+    last_batch_x, _ = dataset.items(
+        last_batch_start, last_batch_start + dataset.batch_size, op="display"
+    )
+
+    return last_batch_start + len(last_batch_x)
+
+
+def label_dtype(dataset: "Dataset") -> "np.dtype":
+    """Returns the type used for the labels of `dataset`: Integer labels (e.g. for
+    sparse categorical losses) are kept as int64, the rest are float32."""
+    if len(dataset) == 0:
+        return np.dtype(np.float32)
+
+    _, y_set = dataset.items(0, 1)
+
+    if np.asarray(y_set[0]).dtype.kind in "iu":
+        return np.dtype(np.int64)
+
+    return np.dtype(np.float32)
+
+
+def build_input_pipeline(
+    dataset: "Dataset",
+    batch_size: int,
+    on_batch_ready: Optional[Callable[[int], None]] = None,
+    shuffle: bool = False,
+) -> "tf.data.Dataset":
+    """Returns a `tf.data.Dataset` that yields `(x, y)` batches of `batch_size` items.
+
+    Args:
+        dataset: The dataset to read the items from.
+        batch_size: Number of items on each batch.
+        on_batch_ready: Function called with the size of each batch, right after the
+            training loop takes it from the prefetch buffer.
+        shuffle: If True, the items are shuffled again on each epoch (As `fit` does
+            with a `Sequence`). Only used for training.
+    """
+    samples_count = count_samples(dataset)
+    input_shape: Tuple = tuple(dataset.input_shape)
+    output_shape: Tuple = tuple(dataset.output_shape)
+    y_dtype = label_dtype(dataset)
+
+    LOGGER.debug(
+        "Building input pipeline: %s items, batch size %s, shapes %s -> %s",
+        samples_count,
+        batch_size,
+        input_shape,
+        output_shape,
+    )
+
+    def load_batch(indexes: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        if _are_consecutive(indexes):
+            x_set, y_set = dataset.items(indexes[0], indexes[-1] + 1)
+        else:
+            x_set, y_set = [], []
+
+            for index in indexes:
+                x_item, y_item = dataset.items(index, index + 1)
+                x_set.append(x_item[0])
+                y_set.append(y_item[0])
+
+        return np.asarray(x_set, dtype=np.float32), np.asarray(y_set, dtype=y_dtype)
+
+    def tf_load_batch(indexes: "tf.Tensor") -> Tuple["tf.Tensor", "tf.Tensor"]:
+        x, y = tf.numpy_function(
+            load_batch, [indexes], (tf.float32, tf.as_dtype(y_dtype))
+        )
+        x.set_shape((None,) + input_shape)
+        y.set_shape((None,) + output_shape)
+
+        return x, y
+
+    indexes = tf.data.Dataset.range(samples_count)
+
+    if shuffle:
+        indexes = indexes.shuffle(max(samples_count, 1), reshuffle_each_iteration=True)
+
+    pipeline = (
+        indexes.batch(batch_size)
+        .map(tf_load_batch, num_parallel_calls=AUTOTUNE)
+        .prefetch(AUTOTUNE)
+    )
+
+    return _notify_batch_ready(pipeline, on_batch_ready)
+
+
+def _notify_batch_ready(
+    pipeline: "tf.data.Dataset", on_batch_ready: Optional[Callable[[int], None]]
+) -> "tf.data.Dataset":
+    """Calls `on_batch_ready` with the size of each batch yielded by `pipeline`.
+
+    The call is made on a (non parallel) map placed after the prefetch, so it runs
+    synchronously when the consumer gets the batch, not when the batch is produced.
+    """
+    if on_batch_ready is None:
+        return pipeline
+
+    def notify(batch_size: "np.int32") -> "np.int32":
+        on_batch_ready(int(batch_size))
+        return batch_size
+
+    def tf_notify(x: "tf.Tensor", y: "tf.Tensor") -> Tuple["tf.Tensor", "tf.Tensor"]:
+        notified = tf.numpy_function(notify, [tf.shape(x)[0]], tf.int32)
+
+        with tf.control_dependencies([notified]):
+            return tf.identity(x), tf.identity(y)
+
+    return pipeline.map(tf_notify)
+
+
+def _are_consecutive(indexes: "np.ndarray") -> bool:
+    return bool(np.all(np.diff(indexes) == 1))
+
+
+def batches_count(pipeline: "tf.data.Dataset") -> Optional[int]:
+    """Returns the number of batches of the pipeline, or None if it's not known."""
+    cardinality = int(tf.data.experimental.cardinality(pipeline))
+
+    if cardinality < 0:
+        return None
+
+    return cardinality
+
+
+def load_arrays(dataset: "Dataset") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Returns all the processed items of `dataset` as two arrays (x, y). Inputs are
+    float32, and labels use the type returned by `label_dtype`."""
+    x_set, y_set = dataset.items(0, count_samples(dataset))
+
+    return (
+        np.asarray(x_set, dtype=np.float32),
+        np.asarray(y_set, dtype=label_dtype(dataset)),
+    )
+
+
+def build_array_pipeline(
+    x: "np.ndarray",
+    y: "np.ndarray",
+    batch_size: int,
+    on_batch_ready: Optional[Callable[[int], None]] = None,
+    shuffle: bool = False,
+) -> "tf.data.Dataset":
+    """Returns a `tf.data.Dataset` that yields `(x, y)` batches from in-memory arrays.
+
+    Batches are taken from the arrays on demand instead of embedding them on the
+    graph, so the arrays can be backed by shared memory without being copied.
+
+    `on_batch_ready` and `shuffle` are used the same way as on `build_input_pipeline`.
+    """
+
+    def take_batch(indexes: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        if _are_consecutive(indexes):
+            start, end = indexes[0], indexes[-1] + 1
+            return x[start:end], y[start:end]
+
+        return x[indexes], y[indexes]
+
+    def tf_take_batch(indexes: "tf.Tensor") -> Tuple["tf.Tensor", "tf.Tensor"]:
+        x_batch, y_batch = tf.numpy_function(
+            take_batch, [indexes], (tf.as_dtype(x.dtype), tf.as_dtype(y.dtype))
+        )
+        x_batch.set_shape((None,) + x.shape[1:])
+        y_batch.set_shape((None,) + y.shape[1:])
+
+        return x_batch, y_batch
+
+    indexes = tf.data.Dataset.range(len(x))
+
+    if shuffle:
+        indexes = indexes.shuffle(max(len(x), 1), reshuffle_each_iteration=True)
+
+    pipeline = (
+        indexes.batch(batch_size)
+        .map(tf_take_batch, num_parallel_calls=AUTOTUNE)
+        .prefetch(AUTOTUNE)
+    )
+
+    return _notify_batch_ready(pipeline, on_batch_ready)
@@ -0,0 +1,60 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Factories of nodes whose modules are imported when the first node is created.
+
+Most node modules import TensorFlow, Qt widgets and `.ui` files, so importing all of
+them when the plugin is loaded takes several seconds. A `LazyNodeFactory` only keeps the
+names of the module and factory of a node, and imports them on its first call.
+"""
+
+import importlib
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from dial_core.node_editor import Node
+
+
+class LazyNodeFactory:
+    """Callable that creates nodes with a factory imported on its first call.
+
+    Attributes:
+        module_name: The absolute name of the module with the factory.
+        factory_name: The name of the factory on the module.
+    """
+
+    def __init__(self, module_name: str, factory_name: str):
+        """
+        Args:
+            module_name: The absolute name of the module with the factory.
+            factory_name: The name of the factory on the module.
+        """
+        self.module_name = module_name
+        self.factory_name = factory_name
+
+        self.__factory: Optional[Callable[..., "Node"]] = None
+        self.__lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """True if the module of the factory has been imported."""
+        return self.__factory is not None
+
+    def load(self) -> Callable[..., "Node"]:
+        """Imports the module (If it wasn't imported yet) and returns the factory."""
+        if self.__factory is not None:
+            return self.__factory
+
+        with self.__lock:
+            if self.__factory is None:
+                module = importlib.import_module(self.module_name)
+
+                self.__factory = getattr(module, self.factory_name)
+
+        return self.__factory
+
+    def __call__(self, *args: Any, **kwargs: Any) -> "Node":
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"LazyNodeFactory({self.module_name}.{self.factory_name})"
@@ -0,0 +1,95 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Models whose weights are loaded only when they are first needed.
+
+A HDF5 model file stores its architecture as a JSON attribute, which can be read
+without touching the (much bigger) weights. The weights file is remembered on the model
+and loaded by `ensure_weights_loaded`, which must be called before anything that reads
+or uses the weights (training, predicting, copying them...).
+"""
+
+import threading
+from typing import TYPE_CHECKING, Optional
+
+import h5py
+from dial_core.utils import log
+from tensorflow import keras
+
+from .partial_weights import load_weights_by_name
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+_PENDING_WEIGHTS_ATTRIBUTE = "_dial_pending_weights_path"
+_BY_NAME_ATTRIBUTE = "_dial_pending_weights_by_name"
+
+_load_lock = threading.Lock()
+
+
+def load_architecture(path: str) -> "Model":
+    """Creates the model stored on a HDF5 file, without loading its weights.
+
+    Raises:
+        ValueError: If the file doesn't contain a model architecture (e.g. it only has
+            weights).
+    """
+    with h5py.File(path, "r") as model_file:
+        model_config = model_file.attrs.get("model_config")
+
+    if model_config is None:
+        raise ValueError(f"{path} doesn't contain a model architecture")
+
+    if isinstance(model_config, bytes):
+        model_config = model_config.decode("utf-8")
+
+    model = keras.models.model_from_json(model_config)
+    defer_weights(model, path)
+
+    return model
+
+
+def defer_weights(model: "Model", weights_path: str, by_name: bool = False):
+    """Sets the file the weights of `model` are loaded from when they're needed.
+
+    If `by_name` is True, the weights are matched by layer name, skipping the layers
+    that don't match (See `load_weights_by_name`). Used when the model architecture
+    has been modified after loading it.
+    """
+    setattr(model, _PENDING_WEIGHTS_ATTRIBUTE, weights_path)
+    setattr(model, _BY_NAME_ATTRIBUTE, by_name)
+
+
+def pending_weights_path(model: Optional["Model"]) -> Optional[str]:
+    """Returns the file with the weights not loaded yet, or None if they're loaded."""
+    return getattr(model, _PENDING_WEIGHTS_ATTRIBUTE, None)
+
+
+def discard_pending_weights(model: "Model"):
+    """Forgets the pending weights (e.g. when other weights are loaded explicitly)."""
+    if pending_weights_path(model) is not None:
+        delattr(model, _PENDING_WEIGHTS_ATTRIBUTE)
+        delattr(model, _BY_NAME_ATTRIBUTE)
+
+
+def ensure_weights_loaded(model: Optional["Model"]):
+    """Loads the pending weights of `model`, if any. Does nothing for other models."""
+    if model is None or pending_weights_path(model) is None:
+        return
+
+    with _load_lock:
+        weights_path = pending_weights_path(model)
+
+        # Already loaded by another thread
+        if weights_path is None:
+            return
+
+        LOGGER.info("Loading the weights of %s from %s", model.name, weights_path)
+
+        if getattr(model, _BY_NAME_ATTRIBUTE):
+            load_weights_by_name(model, weights_path)
+        else:
+            model.load_weights(weights_path)
+
+        discard_pending_weights(model)
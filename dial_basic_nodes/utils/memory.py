@@ -0,0 +1,82 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Helpers for measuring the memory used by the process and by Keras models."""
+
+import os
+import sys
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+
+def current_rss() -> Optional[int]:
+    """Returns the current resident set size (in bytes) of the process, or None if it
+    can't be read (It's read from /proc)."""
+    try:
+        with open("/proc/self/statm") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+    except (AttributeError, OSError, ValueError, IndexError):
+        return None
+
+
+def process_rss() -> int:
+    """Returns the resident set size (in bytes) of the current process.
+
+    Read from /proc when available. Otherwise, the peak resident size is returned.
+    """
+    rss = current_rss()
+
+    if rss is not None:
+        return rss
+
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return 0
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Reported in bytes on macOS, and in kilobytes on Linux
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def model_weights_bytes(model: "Model") -> int:
+    """Returns the memory (in bytes) taken by the variables of `model`."""
+    return _variables_bytes(model.weights)
+
+
+def optimizer_weights_bytes(model: "Model") -> int:
+    """Returns the memory (in bytes) taken by the optimizer variables of `model`."""
+    optimizer = getattr(model, "optimizer", None)
+
+    if optimizer is None or isinstance(optimizer, str):
+        return 0
+
+    variables = optimizer.variables
+    if callable(variables):
+        variables = variables()
+
+    return _variables_bytes(variables)
+
+
+def format_bytes(size: float) -> str:
+    """Returns a human readable representation of `size` (e.g. "1.5 GB")."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+
+        size /= 1024
+
+    return f"{size:.1f} TB"
+
+
+def _variables_bytes(variables: Iterable) -> int:
+    return sum(
+        int(np.prod(variable.shape)) * variable.dtype.size for variable in variables
+    )
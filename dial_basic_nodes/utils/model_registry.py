@@ -0,0 +1,170 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import gc
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+import dependency_injector.providers as providers
+from dial_core.utils import log
+from tensorflow import keras
+
+from .memory import (
+    format_bytes,
+    model_weights_bytes,
+    optimizer_weights_bytes,
+    process_rss,
+)
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+
+class ModelRegistry:
+    """The ModelRegistry class keeps track of the Keras models created by each node, so
+    the models superseded by newer ones can be released.
+
+    Each owner (Usually a node widget) registers its models on named slots. When a new
+    model is registered on a slot, the previous one is considered superseded: The
+    registry forgets it and runs the garbage collector, so it's freed as soon as nobody
+    else is using it. Caches holding models can be notified of the superseded models
+    (See `add_superseded_callback`), so they don't keep them alive.
+
+    The Keras global state (Graphs, layer names...) is only cleared when it's safe, that
+    is, when the last registered model is unregistered and no model is in use (e.g.
+    being trained). A newly registered model is always alive, so registering a model
+    never clears it.
+
+    Only weak references are kept, so the registry never keeps a model alive.
+    """
+
+    def __init__(self):
+        self._models: "weakref.WeakKeyDictionary[Any, Dict[str, weakref.ref]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._models_in_use: "weakref.WeakSet[Model]" = weakref.WeakSet()
+        self._superseded_callbacks: List[weakref.WeakMethod] = []
+
+    def register(self, owner: Any, model: "Model", slot: str = "model"):
+        """Registers `model` as the current model of `owner` on `slot`.
+
+        The model previously registered on the same slot (if any) is released, after
+        calling the superseded callbacks with it.
+        """
+        owner_models = self._models.setdefault(owner, {})
+
+        previous_model_ref = owner_models.get(slot)
+        owner_models[slot] = weakref.ref(model)
+
+        if previous_model_ref is None:
+            return
+
+        previous_model = previous_model_ref()
+        del previous_model_ref
+
+        if previous_model is model:
+            return
+
+        if previous_model is not None:
+            self._notify_superseded(previous_model)
+
+        del previous_model
+        gc.collect()
+
+    def add_superseded_callback(self, callback: Callable[["Model"], None]):
+        """Calls `callback` (A bound method) with the models superseded from now on, so
+        the references kept to them can be dropped.
+
+        Only a weak reference to the callback is kept, so the registry never keeps its
+        object alive.
+        """
+        self._superseded_callbacks.append(weakref.WeakMethod(callback))
+
+    def unregister(self, owner: Any, slot: str = "model"):
+        """Forgets the model of `owner` on `slot`."""
+        owner_models = self._models.get(owner, {})
+
+        if owner_models.pop(slot, None) is not None:
+            self.release_superseded()
+
+    def is_registered(self, model: "Model", ignored_owner: Any = None) -> bool:
+        """Checks if `model` is registered on any slot (Ignoring the slots of
+        `ignored_owner`)."""
+        return any(
+            model_ref() is model
+            for owner, owner_models in list(self._models.items())
+            if owner is not ignored_owner
+            for model_ref in owner_models.values()
+        )
+
+    def set_in_use(self, model: "Model", in_use: bool):
+        """Marks a model as being used (e.g. while training). The Keras global state is
+        never cleared while there are models in use."""
+        if in_use:
+            self._models_in_use.add(model)
+        else:
+            self._models_in_use.discard(model)
+
+    def live_models(self) -> List["Model"]:
+        """Returns the registered models that are still alive."""
+        models: List["Model"] = []
+
+        for owner_models in list(self._models.values()):
+            for model_ref in owner_models.values():
+                model = model_ref()
+
+                if model is not None and all(model is not m for m in models):
+                    models.append(model)
+
+        return models
+
+    def release_superseded(self):
+        """Frees the models that aren't referenced anymore, and clears the Keras global
+        state if it's safe."""
+        gc.collect()
+
+        if not self._models_in_use and not self.live_models():
+            LOGGER.debug("No live models. Clearing the Keras session...")
+            keras.backend.clear_session()
+            gc.collect()
+
+    def _notify_superseded(self, model: "Model"):
+        # Callbacks of dead objects are dropped
+        self._superseded_callbacks = [
+            callback_ref
+            for callback_ref in self._superseded_callbacks
+            if callback_ref() is not None
+        ]
+
+        for callback_ref in list(self._superseded_callbacks):
+            callback = callback_ref()
+
+            if callback is not None:
+                callback(model)
+
+    def memory_report(self) -> Dict[str, int]:
+        """Returns the number of live models, the memory taken by their variables (and
+        optimizer variables) and the resident memory of the process, in bytes."""
+        live_models = self.live_models()
+
+        return {
+            "live_models": len(live_models),
+            "weights_bytes": sum(model_weights_bytes(m) for m in live_models),
+            "optimizer_bytes": sum(optimizer_weights_bytes(m) for m in live_models),
+            "rss_bytes": process_rss(),
+        }
+
+    def memory_summary(self) -> str:
+        """Returns the memory report as a single human readable line."""
+        report = self.memory_report()
+
+        return (
+            f"{report['live_models']} live models"
+            f" - weights {format_bytes(report['weights_bytes'])}"
+            f" - optimizer {format_bytes(report['optimizer_bytes'])}"
+            f" - process RSS {format_bytes(report['rss_bytes'])}"
+        )
+
+
+ModelRegistrySingleton = providers.Singleton(ModelRegistry)
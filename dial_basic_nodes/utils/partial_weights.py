@@ -0,0 +1,133 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Loading of the weights of a HDF5 file into a model with a different architecture.
+
+Layers are matched by name, and their weights are only loaded if they have the same
+number of weights with the same shapes. Everything else is skipped and listed on a
+`WeightsLoadReport`, so a model with a few edited layers keeps the weights of the rest.
+"""
+
+from typing import TYPE_CHECKING, List, Tuple
+
+import h5py
+import numpy as np
+from dial_core.utils import log
+from tensorflow import keras
+
+if TYPE_CHECKING:
+    import tensorflow as tf
+    from tensorflow.keras.models import Model
+
+LOGGER = log.get_logger(__name__)
+
+Shapes = List[Tuple[int, ...]]
+
+
+class WeightsLoadReport:
+    """Layers whose weights were loaded or skipped by `load_weights_by_name`.
+
+    Attributes:
+        loaded: Names of the layers with their weights loaded.
+        mismatched: Layers skipped because their weights have different shapes, as
+            (name, shapes on the model, shapes on the file).
+        missing: Names of the model layers (with weights) not found on the file.
+        unused: Names of the file layers not found on the model. They don't make the
+            load incomplete, as the model doesn't need them (e.g. removed layers).
+    """
+
+    def __init__(self):
+        self.loaded: List[str] = []
+        self.mismatched: List[Tuple[str, Shapes, Shapes]] = []
+        self.missing: List[str] = []
+        self.unused: List[str] = []
+
+    @property
+    def is_complete(self) -> bool:
+        """True if the weights of every layer of the model were loaded."""
+        return not (self.mismatched or self.missing)
+
+    def summary(self) -> str:
+        """Returns a text description of the report."""
+        lines = [f"Loaded weights of {len(self.loaded)} layers."]
+
+        if self.mismatched:
+            lines.append("Skipped (different shapes):")
+            lines.extend(
+                f"  {name}: {model_shapes} on the model, {file_shapes} on the file"
+                for name, model_shapes, file_shapes in self.mismatched
+            )
+
+        if self.missing:
+            lines.append("Not found on the file: " + ", ".join(self.missing))
+
+        if self.unused:
+            lines.append("Unused (not found on the model): " + ", ".join(self.unused))
+
+        return "\n".join(lines)
+
+
+def load_weights_by_name(model: "Model", path: str) -> "WeightsLoadReport":
+    """Loads the weights of each layer of `model` from the layer with the same name on
+    a HDF5 file (Saved with `save_weights` or `save`).
+
+    Raises:
+        ValueError: If the file doesn't contain Keras weights.
+    """
+    report = WeightsLoadReport()
+    assignments: List[Tuple["tf.Variable", np.ndarray]] = []
+
+    with h5py.File(path, "r") as weights_file:
+        # Files saved with `Model.save` keep the weights on their own group
+        if "layer_names" not in weights_file.attrs and "model_weights" in weights_file:
+            weights_file = weights_file["model_weights"]
+
+        if "layer_names" not in weights_file.attrs:
+            raise ValueError(f"{path} doesn't contain Keras weights")
+
+        file_layer_names = _decode(weights_file.attrs["layer_names"])
+
+        for layer in model.layers:
+            # Same order used when saving (See `Model.save_weights`)
+            layer_weights = layer.trainable_weights + layer.non_trainable_weights
+
+            if layer.name not in file_layer_names:
+                if layer_weights:
+                    report.missing.append(layer.name)
+                continue
+
+            layer_group = weights_file[layer.name]
+            values = [
+                np.asarray(layer_group[weight_name])
+                for weight_name in _decode(layer_group.attrs["weight_names"])
+            ]
+
+            model_shapes = [tuple(weight.shape) for weight in layer_weights]
+            file_shapes = [value.shape for value in values]
+
+            if model_shapes != file_shapes:
+                report.mismatched.append((layer.name, model_shapes, file_shapes))
+                continue
+
+            assignments.extend(zip(layer_weights, values))
+
+            if layer_weights:
+                report.loaded.append(layer.name)
+
+        model_layer_names = {layer.name for layer in model.layers}
+        report.unused = [
+            name
+            for name in file_layer_names
+            if name not in model_layer_names
+            and len(weights_file[name].attrs["weight_names"])
+        ]
+
+    # All the weights are assigned at once, and only if the file was read entirely
+    keras.backend.batch_set_value(assignments)
+
+    LOGGER.info("Weights loaded from %s:\n%s", path, report.summary())
+
+    return report
+
+
+def _decode(names: List) -> List[str]:
+    return [name.decode("utf-8") if isinstance(name, bytes) else name for name in names]
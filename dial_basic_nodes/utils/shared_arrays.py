@@ -0,0 +1,89 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+"""Numpy arrays backed by `multiprocessing.shared_memory` blocks.
+
+Used to hand big arrays (datasets, model weights...) to a child process without
+pickling them: the parent copies the array once into a shared block, and the child
+attaches to it by name and works over the same memory.
+
+Shared memory is only available on Python 3.8+. `is_available()` can be used to check
+it before trying to share anything.
+"""
+
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+if sys.version_info >= (3, 8):
+    from multiprocessing import shared_memory
+else:
+    shared_memory = None
+
+
+ArraySpec = Dict  # {"name": str, "shape": tuple, "dtype": str}
+
+
+def is_available() -> bool:
+    """Checks if arrays can be shared on this Python version."""
+    return shared_memory is not None
+
+
+class SharedArrays:
+    """The SharedArrays class owns a group of shared memory blocks, each one holding a
+    copy of a numpy array.
+
+    The owner must call `release()` when the blocks are no longer needed, as shared
+    memory isn't freed when the process that created it finishes.
+
+    Attributes:
+        specs: Description of each block. They can be pickled and sent to other
+            processes, where `attach_arrays` will return the arrays back.
+    """
+
+    def __init__(self, arrays: List["np.ndarray"]):
+        self._blocks = []
+        self.specs: List[ArraySpec] = []
+
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+            self._blocks.append(block)
+            self.specs.append(
+                {"name": block.name, "shape": array.shape, "dtype": array.dtype.str}
+            )
+
+    def arrays(self) -> List["np.ndarray"]:
+        """Returns the arrays stored on the blocks (Without copying them)."""
+        return [
+            np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=block.buf)
+            for block, spec in zip(self._blocks, self.specs)
+        ]
+
+    def release(self):
+        """Closes and frees all the blocks."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+        self._blocks = []
+        self.specs = []
+
+
+def attach_arrays(specs: List[ArraySpec]) -> Tuple[List, List["np.ndarray"]]:
+    """Attaches to blocks created by another process.
+
+    Returns:
+        The opened blocks (which must be closed with `close()` once the arrays aren't
+        used anymore) and the arrays stored on them.
+    """
+    blocks = [shared_memory.SharedMemory(name=spec["name"]) for spec in specs]
+    arrays = [
+        np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=block.buf)
+        for block, spec in zip(blocks, specs)
+    ]
+
+    return blocks, arrays
@@ -0,0 +1,92 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import math
+import os
+
+import pytest
+
+pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.model_checkpoint.async_model_checkpoint import (  # noqa: E402
+    AsyncModelCheckpoint,
+    MonitorMode,
+    format_checkpoint_filename,
+)
+
+
+@pytest.mark.parametrize(
+    "template, epoch, logs, expected",
+    [
+        ("model.{epoch:02d}.h5", 3, {}, "model.03.h5"),
+        ("model.{epoch:03d}-{loss:.2f}.h5", 12, {"loss": 0.1234}, "model.012-0.12.h5"),
+        ("model-{val_loss:.2f}.h5", 1, {"loss": 0.5}, "model-nan.h5"),
+        ("model-{val_loss:.2f}.h5", 1, None, "model-nan.h5"),
+    ],
+)
+def test_format_checkpoint_filename(template, epoch, logs, expected):
+    assert format_checkpoint_filename(template, epoch, logs) == expected
+
+
+@pytest.mark.parametrize(
+    "template, logs",
+    [
+        ("model-{val_loss:d}.h5", {"val_loss": 0.5}),
+        ("model-{val_loss:d}.h5", {}),
+        ("model-{0}.h5", {}),
+        ("model-{epoch.value}.h5", {}),
+        ("model-{epoch.h5", {}),
+    ],
+)
+def test_format_checkpoint_filename_falls_back_to_a_safe_name(template, logs):
+    assert format_checkpoint_filename(template, 7, logs) == "checkpoint.07.h5"
+
+
+def _checkpoint_with_files(directory, values, **kwargs):
+    checkpoint = AsyncModelCheckpoint(str(directory), "model.h5", **kwargs)
+
+    for index, value in enumerate(values):
+        path = os.path.join(str(directory), f"model.{index}.h5")
+        open(path, "w").close()
+
+        checkpoint._saved_files.append((path, value))
+        checkpoint._apply_retention()
+
+    return checkpoint
+
+
+def _kept_files(directory):
+    return sorted(name for name in os.listdir(str(directory)) if name.endswith(".h5"))
+
+
+def test_retention_keeps_all_files_by_default(tmp_path):
+    _checkpoint_with_files(tmp_path, [0.3, 0.2, 0.1])
+
+    assert _kept_files(tmp_path) == ["model.0.h5", "model.1.h5", "model.2.h5"]
+
+
+def test_retention_keeps_the_last_files(tmp_path):
+    _checkpoint_with_files(tmp_path, [0.3, 0.2, 0.1, 0.4], keep_last=2)
+
+    assert _kept_files(tmp_path) == ["model.2.h5", "model.3.h5"]
+
+
+def test_retention_keeps_the_best_and_last_files(tmp_path):
+    checkpoint = _checkpoint_with_files(
+        tmp_path, [0.3, 0.1, math.nan, 0.2, 0.4], keep_last=1, keep_best=2
+    )
+
+    assert _kept_files(tmp_path) == ["model.1.h5", "model.3.h5", "model.4.h5"]
+    assert [os.path.basename(path) for path, _ in checkpoint._saved_files] == [
+        "model.1.h5",
+        "model.3.h5",
+        "model.4.h5",
+    ]
+
+
+def test_retention_ranks_files_without_the_monitored_value_last(tmp_path):
+    _checkpoint_with_files(
+        tmp_path, [math.nan, 0.1, math.nan, 0.9], keep_best=2, mode=MonitorMode.Max
+    )
+
+    assert _kept_files(tmp_path) == ["model.1.h5", "model.3.h5"]
@@ -0,0 +1,84 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import itertools
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+pytest.importorskip("PySide2")
+
+from dial_basic_nodes.hyperparameters_config import batch_size_tuner  # noqa: E402
+from dial_basic_nodes.hyperparameters_config.batch_size_tuner import (  # noqa: E402
+    BatchSizeTuner,
+)
+
+MB = 2 ** 20
+
+
+class ArrayDataset:
+    """Minimal `Dataset` with the items on two arrays."""
+
+    def __init__(self, x, y, batch_size=32):
+        self.x, self.y = x, y
+        self.batch_size = batch_size
+        self.input_shape = x.shape[1:]
+        self.output_shape = y.shape[1:]
+
+    def items(self, start, end, op="train"):
+        return self.x[start:end], self.y[start:end]
+
+    def __len__(self):
+        return -(-len(self.x) // self.batch_size)
+
+
+def _tuner(memory_budget):
+    model = tf.keras.Sequential([tf.keras.layers.Dense(2, input_shape=(3,))])
+    dataset = ArrayDataset(np.ones((64, 3)), np.ones((64, 2)))
+
+    return BatchSizeTuner(
+        model,
+        dataset,
+        "sgd",
+        "mse",
+        memory_budget=memory_budget,
+        min_batch_size=8,
+        max_batch_size=32,
+        steps=2,
+    )
+
+
+@pytest.fixture(autouse=True)
+def cpu_only(monkeypatch):
+    monkeypatch.setattr(tf.config, "list_logical_devices", lambda device_type: [])
+
+
+def test_memory_in_use_before_the_bursts_doesnt_count(monkeypatch):
+    # The process is already way over the budget, but the bursts don't add memory
+    monkeypatch.setattr(batch_size_tuner, "current_rss", lambda: 4096 * MB)
+
+    best_batch_size, throughputs = _tuner(memory_budget=MB).tune()
+
+    assert sorted(throughputs) == [8, 16, 32]
+    assert best_batch_size in throughputs
+
+
+def test_bursts_over_the_budget_are_rejected(monkeypatch):
+    # Each reading of the memory is 1 MB higher than the previous one
+    rss_readings = itertools.count(1024 * MB, MB)
+    monkeypatch.setattr(batch_size_tuner, "current_rss", lambda: next(rss_readings))
+
+    # The second step of the first burst is already 2 MB over the baseline
+    best_batch_size, throughputs = _tuner(memory_budget=int(1.5 * MB)).tune()
+
+    assert best_batch_size is None
+    assert throughputs == {}
+
+
+def test_budget_is_ignored_if_memory_cant_be_measured(monkeypatch):
+    monkeypatch.setattr(batch_size_tuner, "current_rss", lambda: None)
+
+    _, throughputs = _tuner(memory_budget=1).tune()
+
+    assert sorted(throughputs) == [8, 16, 32]
@@ -0,0 +1,100 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import os
+
+import pytest
+
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.utils.checkpoint_files import (  # noqa: E402
+    MANIFEST_NAME,
+    FileStatus,
+    add_to_manifest,
+    atomic_write,
+    read_manifest,
+    remove_from_manifest,
+    verify_file,
+)
+
+
+def _write(path, contents):
+    with open(str(path), "w") as written_file:
+        written_file.write(contents)
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / "model.h5"
+    _write(path, "old")
+
+    with atomic_write(str(path)) as temp_path:
+        assert temp_path.endswith(".h5")
+        _write(temp_path, "new")
+
+        assert path.read_text() == "old"
+
+    assert path.read_text() == "new"
+    assert os.listdir(str(tmp_path)) == ["model.h5"]
+
+
+def test_atomic_write_keeps_the_file_on_errors(tmp_path):
+    path = tmp_path / "model.h5"
+    _write(path, "old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as temp_path:
+            _write(temp_path, "truncated")
+            raise RuntimeError("Interrupted")
+
+    assert path.read_text() == "old"
+    assert os.listdir(str(tmp_path)) == ["model.h5"]
+
+
+def test_listed_atomic_write_adds_the_file_to_the_manifest(tmp_path):
+    path = tmp_path / "model.h5"
+
+    with atomic_write(str(path), listed=True) as temp_path:
+        _write(temp_path, "weights")
+
+    assert read_manifest(str(tmp_path))["model.h5"]["size"] == len("weights")
+    assert verify_file(str(path)) == FileStatus.Verified
+
+
+def test_manifest_entries(tmp_path):
+    first_path, second_path = tmp_path / "first.h5", tmp_path / "second.h5"
+    _write(first_path, "first")
+    _write(second_path, "second")
+
+    add_to_manifest(str(first_path))
+    add_to_manifest(str(second_path))
+
+    assert sorted(read_manifest(str(tmp_path))) == ["first.h5", "second.h5"]
+
+    remove_from_manifest(str(first_path))
+    remove_from_manifest(str(tmp_path / "unlisted.h5"))
+
+    assert sorted(read_manifest(str(tmp_path))) == ["second.h5"]
+
+
+def test_unreadable_manifest_is_empty(tmp_path):
+    _write(tmp_path / MANIFEST_NAME, "{not json")
+
+    assert read_manifest(str(tmp_path)) == {}
+
+
+def test_verify_file(tmp_path):
+    path = tmp_path / "model.h5"
+
+    assert verify_file(str(path)) == FileStatus.Missing
+
+    _write(path, "weights")
+    assert verify_file(str(path)) == FileStatus.Unlisted
+
+    add_to_manifest(str(path))
+    assert verify_file(str(path)) == FileStatus.Verified
+
+    _write(path, "weigh")
+    assert verify_file(str(path)) == FileStatus.SizeMismatch
+
+    _write(path, "WEIGHTS")
+    assert verify_file(str(path)) == FileStatus.ChecksumMismatch
+    assert verify_file(str(path), check_contents=False) == FileStatus.Verified
@@ -0,0 +1,121 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import weakref
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.training_console.compile_cache import (  # noqa: E402
+    CompileCache,
+    _reset_optimizer,
+)
+from dial_basic_nodes.utils.model_registry import ModelRegistrySingleton  # noqa: E402
+
+
+def _trained_model():
+    model = tf.keras.Sequential([tf.keras.layers.Dense(2, input_shape=(3,))])
+    model.compile(optimizer="adam", loss="mse")
+    model.fit(np.ones((4, 3)), np.ones((4, 2)), verbose=0)
+
+    return model
+
+
+def _optimizer_variables(optimizer):
+    variables = optimizer.variables
+
+    return variables() if callable(variables) else variables
+
+
+def test_reset_optimizer_zeroes_all_variables():
+    optimizer = _trained_model().optimizer
+
+    assert int(optimizer.iterations) == 1
+    assert any(np.any(variable.numpy()) for variable in _optimizer_variables(optimizer))
+
+    _reset_optimizer(optimizer)
+
+    assert int(optimizer.iterations) == 0
+    assert all(
+        not np.any(variable.numpy()) for variable in _optimizer_variables(optimizer)
+    )
+
+
+def test_get_copies_the_weights_of_the_source_model():
+    source_model, compiled_model = _trained_model(), _trained_model()
+    cache = CompileCache()
+    cache.put("fingerprint", source_model, compiled_model, shares_variables=False)
+
+    other_model = _trained_model()
+
+    assert cache.get("fingerprint", other_model) is compiled_model
+    for expected, weights in zip(
+        other_model.get_weights(), compiled_model.get_weights()
+    ):
+        np.testing.assert_array_equal(expected, weights)
+
+
+def test_get_doesnt_reuse_models_sharing_variables_with_another_model():
+    source_model = _trained_model()
+    source_weights = source_model.get_weights()
+    cache = CompileCache()
+    cache.put("fingerprint", source_model, source_model, shares_variables=True)
+
+    assert cache.get("fingerprint", _trained_model()) is None
+    for expected, weights in zip(source_weights, source_model.get_weights()):
+        np.testing.assert_array_equal(expected, weights)
+
+    assert cache.get("fingerprint", source_model) is source_model
+
+
+def test_superseded_models_arent_kept_alive():
+    registry = ModelRegistrySingleton()
+    owner = type("Owner", (), {})()
+    cache = CompileCache()
+
+    # Compiled from a copy of the source model
+    source_model = _trained_model()
+    registry.register(owner, source_model, "output_model")
+    cache.put("copy", source_model, _trained_model(), shares_variables=False)
+
+    source_model_ref = weakref.ref(source_model)
+    del source_model
+
+    registry.register(owner, _trained_model(), "output_model")
+
+    assert source_model_ref() is None
+    assert len(cache) == 1
+
+    # Compiled on top of the source model
+    source_model = _trained_model()
+    registry.register(owner, source_model, "output_model")
+    cache.put("shared", source_model, source_model, shares_variables=True)
+
+    source_model_ref = weakref.ref(source_model)
+    del source_model
+
+    registry.register(owner, _trained_model(), "output_model")
+
+    assert source_model_ref() is None
+    assert len(cache) == 1
+
+
+def test_models_registered_by_other_owners_arent_released():
+    registry = ModelRegistrySingleton()
+    editor, console = type("Owner", (), {})(), type("Owner", (), {})()
+    cache = CompileCache()
+
+    source_model = _trained_model()
+    registry.register(editor, source_model, "output_model")
+    registry.register(console, source_model, "trained_model")
+    cache.put("shared", source_model, source_model, shares_variables=True)
+
+    registry.register(editor, _trained_model(), "output_model")
+
+    assert cache.get("shared", source_model) is source_model
+
+    registry.register(console, _trained_model(), "trained_model")
+
+    assert cache.get("shared", source_model) is None
@@ -0,0 +1,35 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import pytest
+
+pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.training_console.distribution import (  # noqa: E402
+    Distribution,
+    workers_addresses,
+    workers_count,
+)
+
+
+@pytest.mark.parametrize("replicas", [1, 3])
+def test_multi_worker_always_has_addresses(replicas):
+    training_options = {
+        "distribution": Distribution.MultiWorker.value,
+        "replicas": replicas,
+    }
+
+    addresses = workers_addresses(training_options)
+
+    assert workers_count(training_options) == replicas
+    assert len(addresses) == replicas
+    assert len(set(addresses)) == replicas
+    assert all(address.startswith("localhost:") for address in addresses)
+
+
+@pytest.mark.parametrize("distribution", [Distribution.Default, Distribution.Mirrored])
+def test_single_process_strategies_have_no_addresses(distribution):
+    training_options = {"distribution": distribution.value, "replicas": 2}
+
+    assert workers_count(training_options) == 1
+    assert workers_addresses(training_options) is None
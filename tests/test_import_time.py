@@ -0,0 +1,45 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("dial_core")
+
+# Runs on a new interpreter, so no module is already imported. The modules of dial_core
+# are imported first, as the app does before loading the plugins.
+BENCHMARK = """
+import sys
+import time
+
+import dial_core.node_editor
+import dial_core.notebook
+
+start = time.perf_counter()
+
+import dial_basic_nodes
+
+dial_basic_nodes.load_plugin()
+
+print(time.perf_counter() - start)
+print(" ".join(name for name in sys.modules if name.startswith("dial_basic_nodes.")))
+"""
+
+
+def test_load_plugin_imports_no_nodes():
+    output = subprocess.run(
+        [sys.executable, "-c", BENCHMARK],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.splitlines()
+
+    elapsed, modules = float(output[0]), output[1].split()
+
+    print(f"Plugin imported and loaded in {elapsed:.3f}s")
+
+    assert sorted(modules) == [
+        "dial_basic_nodes.utils",
+        "dial_basic_nodes.utils.lazy_nodes",
+    ]
@@ -0,0 +1,125 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import json
+
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.layers_editor.layer_mime import (  # noqa: E402
+    allowed_layers,
+    decode_layers,
+    encode_layers,
+    forget_weights_source,
+    weights_source,
+)
+
+keras = tf.keras
+
+
+def test_round_trip():
+    layers = [
+        keras.layers.Dense(10, activation="relu", name="dense"),
+        keras.layers.Conv2D(8, (3, 3), padding="same", name="conv"),
+    ]
+
+    decoded_layers = decode_layers(encode_layers(layers))
+
+    assert [type(layer) for layer in decoded_layers] == [
+        type(layer) for layer in layers
+    ]
+    assert [layer.get_config() for layer in decoded_layers] == [
+        layer.get_config() for layer in layers
+    ]
+    assert all(weights_source(layer) is None for layer in decoded_layers)
+
+
+def test_round_trip_with_weights_references():
+    layer = keras.layers.Dense(4, name="dense")
+
+    decoded_layer, = decode_layers(encode_layers([layer], with_weights_references=True))
+
+    assert decoded_layer is not layer
+    assert weights_source(decoded_layer) is layer
+
+    forget_weights_source(decoded_layer)
+
+    assert weights_source(decoded_layer) is None
+
+
+def test_references_from_other_processes_are_ignored():
+    payload = json.loads(
+        encode_layers([keras.layers.Dense(4)], with_weights_references=True)
+    )
+    payload["layers"][0]["weights"]["process"] = -1
+
+    decoded_layer, = decode_layers(json.dumps(payload).encode("utf-8"))
+
+    assert weights_source(decoded_layer) is None
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        b"",
+        b"\xff\xfe",
+        b"not json",
+        b"[]",
+        b'{"version": 1}',
+        b'{"version": 1, "layers": 5}',
+        b'{"version": 1, "layers": ["Dense"]}',
+        b'{"version": 1, "layers": [{"class_name": "Dense"}]}',
+        b'{"version": 1, "layers": [{"class_name": "NoLayer", "config": {}}]}',
+        b'{"version": 1, "layers": [{"class_name": ["Dense"], "config": {}}]}',
+        b'{"version": 1, "layers": [{"class_name": "Dense", "config": {"units": 1,'
+        b' "unknown_argument": 2}}]}',
+    ],
+)
+def test_bad_payloads_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        decode_layers(payload)
+
+
+def test_bad_references_are_ignored():
+    payload = encode_layers([keras.layers.Dense(4)])
+    entries = json.loads(payload)
+
+    for reference in ("layer", {"process": None}, {"layer": "1"}):
+        entries["layers"][0]["weights"] = reference
+
+        decoded_layer, = decode_layers(json.dumps(entries).encode("utf-8"))
+
+        assert weights_source(decoded_layer) is None
+
+
+def _lambda_layer():
+    return keras.layers.Lambda(lambda inputs: inputs * 2, name="lambda")
+
+
+@pytest.mark.parametrize(
+    "layer",
+    [_lambda_layer(), keras.layers.TimeDistributed(_lambda_layer())],
+    ids=["lambda", "nested_lambda"],
+)
+def test_layers_running_code_are_rejected(layer):
+    with pytest.raises(ValueError, match="Lambda"):
+        decode_layers(encode_layers([layer]))
+
+
+@pytest.mark.parametrize("class_name", ["TFOpLambda", "Model", "Sequential"])
+def test_layers_out_of_the_allowlist_are_rejected(class_name):
+    payload = json.dumps(
+        {"version": 1, "layers": [{"class_name": class_name, "config": {}}]}
+    ).encode("utf-8")
+
+    with pytest.raises(ValueError, match="not allowed"):
+        decode_layers(payload)
+
+
+def test_palette_layers_are_allowed():
+    from dial_basic_nodes.layers_editor.layers_tree.layer_palette import layer_palette
+
+    descriptors = layer_palette().descriptors
+
+    assert {descriptor.class_name for descriptor in descriptors} <= allowed_layers()
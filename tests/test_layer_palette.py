@@ -0,0 +1,80 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import pytest
+
+pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+pytest.importorskip("PySide2")
+
+from dial_basic_nodes.layers_editor.layers_tree.layer_palette import (  # noqa: E402
+    LayerDescriptor,
+    LayerPalette,
+    layer_palette,
+)
+
+
+@pytest.fixture
+def palette():
+    return LayerPalette(
+        [
+            LayerDescriptor("Dense", "Dense", "Core Layers", {"units": 10}),
+            LayerDescriptor("Conv2D", "Conv2D", "Convolutional Layers"),
+            LayerDescriptor("MaxPooling2D", "MaxPooling2D", "Pooling Layers"),
+            LayerDescriptor(
+                "Activation (relu)", "Activation", "Activation Layers", layer_name="re"
+            ),
+        ]
+    )
+
+
+def _names(descriptors):
+    return [descriptor.display_name for descriptor in descriptors]
+
+
+@pytest.mark.parametrize(
+    "text, expected_names",
+    [
+        ("", ["Dense", "Conv2D", "MaxPooling2D", "Activation (relu)"]),
+        ("  ", ["Dense", "Conv2D", "MaxPooling2D", "Activation (relu)"]),
+        ("de", ["Dense"]),
+        ("CONV", ["Conv2D"]),
+        ("2d", ["Conv2D", "MaxPooling2D"]),
+        ("pooling", ["MaxPooling2D"]),
+        ("layers", ["Dense", "Conv2D", "MaxPooling2D", "Activation (relu)"]),
+        ("relu", ["Activation (relu)"]),
+        ("conv layers", []),
+        ("convolutional layers", ["Conv2D"]),
+        ("xyz", []),
+    ],
+)
+def test_search(palette, text, expected_names):
+    assert _names(palette.search(text)) == expected_names
+
+
+def test_search_matches_a_linear_scan():
+    palette = layer_palette()
+
+    for text in ("conv", "pool", "2d", "normalization", "lstm", "ion lay", "zzz"):
+        assert palette.search(text) == [
+            descriptor
+            for descriptor in palette.descriptors
+            if text in descriptor.search_key
+        ]
+
+
+def test_categories(palette):
+    assert palette.categories() == [
+        "Core Layers",
+        "Convolutional Layers",
+        "Pooling Layers",
+        "Activation Layers",
+    ]
+
+
+def test_serialize():
+    descriptor = LayerDescriptor("Dense", "Dense", "Core Layers", {"units": 10})
+
+    assert descriptor.serialize() == {
+        "class_name": "Dense",
+        "config": {"name": "dense", "units": 10},
+    }
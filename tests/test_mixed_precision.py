@@ -0,0 +1,58 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.training_console.mixed_precision import (  # noqa: E402
+    clone_with_policy,
+)
+
+
+def _models():
+    sequential = tf.keras.Sequential(
+        [
+            tf.keras.layers.Dense(4, activation="relu", input_shape=(3,)),
+            tf.keras.layers.Dense(2),
+        ]
+    )
+
+    inputs = tf.keras.Input(shape=(3,))
+    functional = tf.keras.Model(inputs, tf.keras.layers.Dense(2)(inputs))
+
+    return [sequential, functional]
+
+
+@pytest.mark.parametrize("policy_name", ["mixed_bfloat16", "mixed_float16"])
+@pytest.mark.parametrize("model", _models(), ids=["sequential", "functional"])
+def test_clone_with_policy_sets_the_policy_on_the_layers(model, policy_name):
+    cloned_model = clone_with_policy(model, policy_name)
+
+    dense_layers = [
+        layer
+        for layer in cloned_model.layers
+        if isinstance(layer, tf.keras.layers.Dense)
+    ]
+
+    assert len(dense_layers) == len(
+        [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+    )
+    for layer in dense_layers:
+        assert layer.compute_dtype == policy_name.split("_")[1]
+        assert layer.variable_dtype == "float32"
+
+    assert cloned_model.layers[-1].compute_dtype == "float32"
+    assert cloned_model.output.dtype == tf.float32
+
+
+def test_clone_with_policy_copies_the_weights_and_keeps_the_global_policy():
+    model = _models()[0]
+    cloned_model = clone_with_policy(model)
+
+    for expected, weights in zip(model.get_weights(), cloned_model.get_weights()):
+        np.testing.assert_array_equal(expected, weights)
+
+    assert tf.keras.mixed_precision.global_policy().name == "float32"
+    assert all(layer.compute_dtype == "float32" for layer in model.layers)
@@ -0,0 +1,151 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.layers_editor.model_graph import ModelGraph  # noqa: E402
+from dial_basic_nodes.layers_editor.model_rebuilder import (  # noqa: E402
+    ModelBuildError,
+)
+
+keras = tf.keras
+
+
+@pytest.fixture
+def input_model():
+    """input -> first -> second -> add(first, second) -> output"""
+    inputs = keras.Input(shape=(4,), name="input")
+    first = keras.layers.Dense(4, name="first")(inputs)
+    second = keras.layers.Dense(4, name="second")(first)
+    added = keras.layers.Add(name="add")([first, second])
+    outputs = keras.layers.Dense(2, name="output")(added)
+
+    return keras.Model(inputs, outputs)
+
+
+@pytest.fixture
+def graph(input_model):
+    return ModelGraph.from_model(input_model)
+
+
+def _names(nodes):
+    return [node.layer.name for node in nodes]
+
+
+def test_chains_arent_graphs():
+    sequential_model = keras.Sequential([keras.layers.Dense(2, input_shape=(3,))])
+
+    inputs = keras.Input(shape=(3,))
+    chain_model = keras.Model(inputs, keras.layers.Dense(2)(inputs))
+
+    assert ModelGraph.from_model(sequential_model) is None
+    assert ModelGraph.from_model(chain_model) is None
+
+
+def test_from_model(graph, input_model):
+    assert _names(graph.nodes) == ["input", "first", "second", "add", "output"]
+    assert _names(graph.outputs) == ["output"]
+    assert graph.inbound_rows(input_model.layers) == [[], [0], [1], [1, 2], [3]]
+
+
+def test_removed_layers_are_bypassed(graph, input_model):
+    layers = list(input_model.layers)
+    del layers[2]
+
+    assert graph.inbound_rows(layers) == [[], [0], [1, 1], [2]]
+
+
+def test_new_layers_are_inserted_after_the_previous_row(graph, input_model):
+    layers = list(input_model.layers)
+    layers.insert(3, keras.layers.Dense(4, name="new"))
+
+    assert graph.inbound_rows(layers) == [[], [0], [1], [2], [1, 3], [4]]
+    assert _names(graph.topological_order()) == [
+        "input",
+        "first",
+        "second",
+        "new",
+        "add",
+        "output",
+    ]
+
+
+def test_new_layers_after_the_output_replace_it(graph, input_model):
+    layers = list(input_model.layers) + [keras.layers.Dense(1, name="new")]
+
+    graph.sync(layers)
+
+    assert _names(graph.outputs) == ["new"]
+
+
+def test_topological_order_keeps_the_order_of_independent_layers():
+    inputs = keras.Input(shape=(4,), name="input")
+    left = keras.layers.Dense(4, name="left")
+    right = keras.layers.Dense(4, name="right")
+    outputs = keras.layers.Add(name="add")([right(inputs), left(inputs)])
+
+    graph = ModelGraph.from_model(keras.Model(inputs, outputs))
+    input_layer, add = graph.nodes[0].layer, graph.nodes[-1].layer
+
+    for layers in ([input_layer, left, right, add], [input_layer, right, left, add]):
+        graph.sync(layers)
+
+        assert [node.layer for node in graph.topological_order()] == layers
+
+
+def test_cycles_are_detected(graph, input_model):
+    graph.nodes[1].inbound.append(graph.nodes[3])
+
+    with pytest.raises(ValueError):
+        graph.topological_order()
+
+    with pytest.raises(ModelBuildError):
+        graph.build(input_model.layers)
+
+
+def test_build_copies_the_weights_into_new_layers(graph, input_model):
+    inbound_nodes = [len(layer.inbound_nodes) for layer in input_model.layers]
+
+    model = graph.build(input_model.layers)
+
+    for name in ("first", "second", "output"):
+        assert model.get_layer(name) is not input_model.get_layer(name)
+
+        for weights, input_weights in zip(
+            model.get_layer(name).weights, input_model.get_layer(name).weights
+        ):
+            assert weights is not input_weights
+            np.testing.assert_array_equal(weights.numpy(), input_weights.numpy())
+
+    assert [len(layer.inbound_nodes) for layer in input_model.layers] == inbound_nodes
+
+
+def test_build_keeps_the_weights_of_unchanged_layers(graph, input_model):
+    first_model = graph.build(input_model.layers)
+    first_model.get_layer("output").set_weights(
+        [np.ones((4, 2)), np.ones((2,))]
+    )
+
+    # The new layer changes the input shape of the Add layer, but not of the output
+    layers = list(input_model.layers)
+    layers.insert(3, keras.layers.Dense(4, name="new"))
+
+    model = graph.build(layers)
+
+    np.testing.assert_array_equal(
+        model.get_layer("output").get_weights()[0], np.ones((4, 2))
+    )
+
+
+def test_failed_builds_dont_change_the_graph_weights(graph, input_model):
+    output_node = graph.nodes[-1]
+    built_layer = output_node.built_layer
+
+    # Without the input layer, the first layer has no inputs
+    with pytest.raises(ModelBuildError):
+        graph.build(input_model.layers[1:])
+
+    assert output_node.built_layer is built_layer
@@ -0,0 +1,73 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.layers_editor.model_rebuilder import (  # noqa: E402
+    ModelBuildError,
+    ModelRebuilder,
+)
+
+keras = tf.keras
+
+
+@pytest.fixture
+def input_model():
+    return keras.Sequential(
+        [
+            keras.layers.InputLayer(input_shape=(8, 8, 1)),
+            keras.layers.Conv2D(2, 3, name="conv"),
+            keras.layers.Flatten(name="flatten"),
+            keras.layers.Dense(4, name="dense"),
+        ]
+    )
+
+
+def test_rebuild_keeps_the_weights_of_unchanged_layers(input_model):
+    rebuilder = ModelRebuilder()
+    rebuilder.reset(input_model)
+
+    layers = list(input_model.layers)
+    layers[2] = keras.layers.Dense(4, name="dense", use_bias=False)
+
+    model = rebuilder.rebuild(layers)
+
+    np.testing.assert_array_equal(
+        model.get_layer("conv").get_weights()[0], input_model.layers[0].get_weights()[0]
+    )
+    assert model.get_layer("conv") is not input_model.layers[0]
+
+
+def test_rebuild_raises_model_build_error_on_unconnectable_layers(input_model):
+    rebuilder = ModelRebuilder()
+    rebuilder.reset(input_model)
+
+    # The Conv2D layer moved after the Flatten one, halfway through an edit
+    conv, flatten, dense = input_model.layers
+    layers = [flatten, conv, dense]
+
+    with pytest.raises(ModelBuildError):
+        rebuilder.rebuild(layers)
+
+    # The weights of the last build are still tracked
+    model = rebuilder.rebuild(list(input_model.layers))
+
+    np.testing.assert_array_equal(
+        model.get_layer("dense").get_weights()[0],
+        input_model.layers[-1].get_weights()[0],
+    )
+
+
+def test_rebuild_raises_model_build_error_on_layers_without_config(input_model):
+    class CustomLayer(keras.layers.Layer):
+        def get_config(self):
+            raise NotImplementedError
+
+    rebuilder = ModelRebuilder()
+    rebuilder.reset(input_model)
+
+    with pytest.raises(ModelBuildError):
+        rebuilder.rebuild(list(input_model.layers) + [CustomLayer()])
@@ -0,0 +1,81 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import pytest
+
+pytest.importorskip("dial_core")
+QtCore = pytest.importorskip("PySide2.QtCore")
+
+from dial_basic_nodes.layers_editor.model_table.model_table_model import (  # noqa: E402
+    ModelTableModel,
+)
+
+
+class FakeLayer:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture
+def model():
+    return ModelTableModel()
+
+
+@pytest.fixture
+def emitted(model):
+    emitted = []
+    model.layers_modified.connect(lambda layers: emitted.append(list(layers)))
+
+    return emitted
+
+
+def _insert(model, row, names):
+    layers = [FakeLayer(name) for name in names]
+    model.insertRows(row, len(layers), model.createIndex(row, 0, layers))
+
+
+def _remove(model, row):
+    model.removeRows(row, 1, model.index(row, 0, QtCore.QModelIndex()))
+
+
+def _names(layers):
+    return [layer.name for layer in layers]
+
+
+def test_edits_outside_transactions_are_notified_one_by_one(model, emitted):
+    _insert(model, 0, ["a", "b"])
+    _remove(model, 0)
+
+    assert [_names(layers) for layers in emitted] == [["a", "b"], ["b"]]
+
+
+def test_edit_transaction_notifies_once(model, emitted):
+    with model.edit_transaction():
+        _insert(model, 0, ["a", "b"])
+
+        with model.edit_transaction():
+            _insert(model, 2, ["c"])
+            _remove(model, 0)
+
+        assert emitted == []
+
+    assert [_names(layers) for layers in emitted] == [["b", "c"]]
+
+
+def test_edit_transaction_without_edits_isnt_notified(model, emitted):
+    with model.edit_transaction():
+        pass
+
+    assert emitted == []
+
+
+def test_edit_transaction_notifies_the_edits_before_an_error(model, emitted):
+    with pytest.raises(RuntimeError):
+        with model.edit_transaction():
+            _insert(model, 0, ["a"])
+            raise RuntimeError("Interrupted edit")
+
+    assert [_names(layers) for layers in emitted] == [["a"]]
+
+    _insert(model, 1, ["b"])
+
+    assert len(emitted) == 2
@@ -0,0 +1,60 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+h5py = pytest.importorskip("h5py")
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.utils.partial_weights import load_weights_by_name  # noqa: E402
+
+
+def _model(layers):
+    return tf.keras.Sequential(
+        [tf.keras.layers.InputLayer(input_shape=(3,))]
+        + [tf.keras.layers.Dense(units, name=name) for name, units in layers]
+    )
+
+
+@pytest.fixture
+def weights_path(tmp_path):
+    path = str(tmp_path / "weights.h5")
+    _model([("first", 4), ("second", 2), ("removed", 2)]).save_weights(path)
+
+    return path
+
+
+def test_load_weights_by_name_report(weights_path):
+    model = _model([("first", 4), ("second", 5), ("added", 2)])
+    second_weights = model.get_layer("second").get_weights()
+
+    report = load_weights_by_name(model, weights_path)
+
+    assert report.loaded == ["first"]
+    assert report.mismatched == [("second", [(4, 5), (5,)], [(4, 2), (2,)])]
+    assert report.missing == ["added"]
+    assert report.unused == ["removed"]
+    assert not report.is_complete
+
+    for expected, weights in zip(second_weights, model.get_layer("second").weights):
+        np.testing.assert_array_equal(expected, weights.numpy())
+
+
+def test_unused_file_layers_dont_make_the_load_incomplete(weights_path):
+    model = _model([("first", 4), ("second", 2)])
+
+    report = load_weights_by_name(model, weights_path)
+
+    assert report.loaded == ["first", "second"]
+    assert report.unused == ["removed"]
+    assert report.is_complete
+    assert "Unused (not found on the model): removed" in report.summary()
+
+
+def test_files_without_weights_raise_value_error(tmp_path):
+    path = str(tmp_path / "empty.h5")
+    h5py.File(path, "w").close()
+
+    with pytest.raises(ValueError):
+        load_weights_by_name(_model([("first", 4)]), path)
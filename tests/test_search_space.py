@@ -0,0 +1,61 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import pytest
+
+pytest.importorskip("dial_core")
+
+from dial_basic_nodes.hyperparameters_config.search_space import (  # noqa: E402
+    SearchMode,
+    expand_search_space,
+    parse_values,
+    sweep_trials,
+)
+
+
+def test_parse_values():
+    assert parse_values("16, 32,64 ,", int) == [16, 32, 64]
+    assert parse_values("") == []
+
+    with pytest.raises(ValueError):
+        parse_values("16, large", int)
+
+
+def test_grid_search_returns_every_combination():
+    combinations = expand_search_space({"batch_size": [16, 32], "lr": [0.1, 0.01]})
+
+    assert combinations == [
+        {"batch_size": 16, "lr": 0.1},
+        {"batch_size": 16, "lr": 0.01},
+        {"batch_size": 32, "lr": 0.1},
+        {"batch_size": 32, "lr": 0.01},
+    ]
+
+
+def test_random_search_returns_different_combinations():
+    search_space = {"batch_size": [16, 32, 64], "lr": [0.1, 0.01, 0.001]}
+
+    combinations = expand_search_space(
+        search_space, SearchMode.Random, max_trials=4, seed=0
+    )
+
+    assert len(combinations) == 4
+    assert len({tuple(c.items()) for c in combinations}) == 4
+    assert combinations == expand_search_space(
+        search_space, SearchMode.Random, max_trials=4, seed=0
+    )
+
+    assert len(expand_search_space(search_space, SearchMode.Random, 20)) == 9
+
+
+def test_sweep_trials_keep_the_other_hyperparameters():
+    hyperparameters = {
+        "epochs": 4,
+        "batch_size": 32,
+        "sweep": {"search_space": {"batch_size": [16, 64]}},
+    }
+
+    assert sweep_trials(hyperparameters) == [
+        {"epochs": 4, "batch_size": 16},
+        {"epochs": 4, "batch_size": 64},
+    ]
+    assert sweep_trials({"epochs": 4, "sweep": None}) == []
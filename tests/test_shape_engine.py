@@ -0,0 +1,159 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import pytest
+
+pytest.importorskip("dial_core")
+pytest.importorskip("PySide2")
+
+from dial_basic_nodes.layers_editor.model_table.shape_engine import (  # noqa: E402
+    format_count,
+    propagate_shapes,
+)
+
+
+class FakeLayer:
+    """Stands in for a Keras layer, only the class name and config are used."""
+
+    def __init__(self, **config):
+        self._config = config
+
+    def get_config(self):
+        return dict(self._config)
+
+
+def _layer(class_name, **config):
+    return type(class_name, (FakeLayer,), {})(**config)
+
+
+def _costs(layers, input_shape, inbound_rows=None):
+    return [
+        (cost.output_shape, cost.params, cost.flops) if cost is not None else None
+        for cost in propagate_shapes(layers, input_shape, inbound_rows)
+    ]
+
+
+def test_dense():
+    assert _costs([_layer("Dense", units=4)], (None, 3)) == [((None, 4), 16, 24)]
+    assert _costs([_layer("Dense", units=4, use_bias=False)], (None, 5, 3)) == [
+        ((None, 5, 4), 12, 120)
+    ]
+
+
+@pytest.mark.parametrize(
+    "config, expected_shape, expected_params, expected_flops",
+    [
+        ({"filters": 8, "kernel_size": 3}, (None, 30, 30, 8), 224, 2 * 27 * 8 * 900),
+        (
+            {"filters": 8, "kernel_size": [3, 3], "strides": 2, "padding": "same"},
+            (None, 16, 16, 8),
+            224,
+            2 * 27 * 8 * 256,
+        ),
+        (
+            {"filters": 8, "kernel_size": 3, "dilation_rate": 2},
+            (None, 28, 28, 8),
+            224,
+            2 * 27 * 8 * 784,
+        ),
+    ],
+)
+def test_conv2d(config, expected_shape, expected_params, expected_flops):
+    assert _costs([_layer("Conv2D", **config)], (None, 32, 32, 3)) == [
+        (expected_shape, expected_params, expected_flops)
+    ]
+
+
+def test_conv2d_channels_first():
+    layer = _layer("Conv2D", filters=8, kernel_size=3, data_format="channels_first")
+
+    assert _costs([layer], (None, 3, 32, 32))[0][0] == (None, 8, 30, 30)
+
+
+def test_pooling():
+    layers = [
+        _layer("MaxPooling2D", pool_size=2, strides=None),
+        _layer("AveragePooling2D", pool_size=3, strides=2, padding="same"),
+        _layer("GlobalAveragePooling2D"),
+    ]
+
+    assert _costs(layers, (None, 32, 32, 3)) == [
+        ((None, 16, 16, 3), 0, 4 * 256 * 3),
+        ((None, 8, 8, 3), 0, 9 * 64 * 3),
+        ((None, 3), 0, 64 * 3),
+    ]
+
+
+def test_flatten_reshape_and_batch_normalization():
+    layers = [
+        _layer("Flatten"),
+        _layer("Reshape", target_shape=[-1, 4]),
+        _layer("BatchNormalization", axis=-1),
+    ]
+
+    assert _costs(layers, (None, 2, 4, 3)) == [
+        ((None, 24), 0, 0),
+        ((None, 6, 4), 0, 0),
+        ((None, 6, 4), 16, 48),
+    ]
+
+
+def test_input_layers_set_their_own_shape():
+    layers = [
+        _layer("InputLayer", batch_input_shape=[None, 3]),
+        _layer("Dense", units=2),
+    ]
+
+    assert _costs(layers, None) == [((None, 3), 0, 0), ((None, 2), 8, 12)]
+
+
+def test_unknown_shapes_after_unsupported_layers():
+    layers = [_layer("Lambda"), _layer("Dense", units=2)]
+
+    assert _costs(layers, (None, 3)) == [None, None]
+    assert _costs([_layer("Dense", units=2)], None) == [None]
+    assert _costs([_layer("Dense", units=2)], (None, None)) == [None]
+
+
+@pytest.mark.parametrize(
+    "layer, input_shape",
+    [
+        (_layer("Conv2D", filters=8, kernel_size=3), (None, 16)),
+        (_layer("BatchNormalization", axis=[3]), (None, 16)),
+        (_layer("Dense"), (None, 16)),
+        (_layer("Reshape", target_shape=[-1, 0]), (None, 16)),
+    ],
+)
+def test_configs_that_dont_fit_the_input_have_an_unknown_cost(layer, input_shape):
+    assert _costs([layer], input_shape) == [None]
+
+
+def test_merge_layers():
+    layers = [
+        _layer("InputLayer", batch_input_shape=[None, 4]),
+        _layer("Dense", units=4),
+        _layer("Add"),
+        _layer("Concatenate", axis=-1),
+        _layer("Add"),
+    ]
+    inbound_rows = [[], [0], [0, 1], [1, 2], [0, 3]]
+
+    assert _costs(layers, None, inbound_rows) == [
+        ((None, 4), 0, 0),
+        ((None, 4), 20, 32),
+        ((None, 4), 0, 4),
+        ((None, 8), 0, 0),
+        None,
+    ]
+
+
+def test_layers_connected_to_later_rows_have_an_unknown_cost():
+    layers = [_layer("InputLayer", batch_input_shape=[None, 4]), _layer("Add")]
+
+    assert _costs(layers, None, [[], [0, 1]])[1] is None
+
+
+def test_format_count():
+    assert format_count(999) == "999"
+    assert format_count(1500) == "1.5K"
+    assert format_count(2500000) == "2.5M"
+    assert format_count(3 * 10 ** 12) == "3.0T"
@@ -0,0 +1,149 @@
+# vim: ft=python fileencoding=utf-8 sts=4 sw=4 et:
+
+import shutil
+
+import pytest
+
+pytest.importorskip("dial_core")
+pytest.importorskip("PySide2")
+
+from dial_basic_nodes.model_checkpoint.async_model_checkpoint import (  # noqa: E402
+    MonitorMode,
+)
+from dial_basic_nodes.training_console.sweep_scheduler import (  # noqa: E402
+    SweepScheduler,
+    Trial,
+)
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(trials_count, epochs, reduction_factor=2, loss_functions=None, **kwargs):
+        loss_functions = loss_functions or ["mean_squared_error"] * trials_count
+
+        scheduler = SweepScheduler(
+            model=None,
+            shared_data=None,
+            trials_hyperparameters=[
+                {"epochs": epochs, "batch_size": 32, "loss_function": loss_function}
+                for loss_function in loss_functions
+            ],
+            compile_kwargs=lambda hyperparameters: {},
+            training_options={},
+            reduction_factor=reduction_factor,
+            **kwargs,
+        )
+        schedulers.append(scheduler)
+
+        return scheduler
+
+    yield make
+
+    for scheduler in schedulers:
+        for trial in scheduler.trials:
+            shutil.rmtree(trial.session_directory, ignore_errors=True)
+
+
+@pytest.mark.parametrize(
+    "trials_count, epochs, reduction_factor, expected_epochs",
+    [
+        (1, 10, 2, [10]),
+        (2, 10, 2, [5, 10]),
+        (5, 10, 2, [3, 5, 10]),
+        (8, 8, 2, [1, 2, 4, 8]),
+        (9, 9, 3, [1, 3, 9]),
+        (8, 2, 2, [1, 1, 1, 2]),
+    ],
+)
+def test_rungs_epochs(
+    make_scheduler, trials_count, epochs, reduction_factor, expected_epochs
+):
+    scheduler = make_scheduler(trials_count, epochs, reduction_factor)
+    trial = scheduler.trials[0]
+
+    assert [
+        scheduler.target_epochs(trial, rung) for rung in range(len(expected_epochs))
+    ] == expected_epochs
+
+
+def test_end_rung_promotes_the_best_trials(make_scheduler):
+    scheduler = make_scheduler(4, 8)
+    started_rungs = []
+    scheduler._start_rung = started_rungs.append
+
+    for trial, val_accuracy in zip(scheduler.trials, [0.6, 0.9, 0.7, 0.8]):
+        trial.logs = {"accuracy": 0.5, "val_accuracy": val_accuracy}
+
+    scheduler.trials[0].status = Trial.Status.Failed
+    scheduler._rung_trials = scheduler.trials
+
+    scheduler._end_rung()
+
+    # The failed trial isn't a candidate, so 2 of the 3 others are promoted
+    assert started_rungs == [[scheduler.trials[1], scheduler.trials[3]]]
+    assert scheduler.trials[2].status == Trial.Status.Cut
+    assert scheduler.trials[0].status == Trial.Status.Failed
+
+
+def test_best_trial(make_scheduler):
+    scheduler = make_scheduler(3, 4)
+
+    assert scheduler.best_trial() is None
+
+    scheduler.trials[0].logs = {"accuracy": 0.5}
+    scheduler.trials[1].logs = {"loss": 0.1}
+    scheduler.trials[2].logs = {"accuracy": 0.9, "val_accuracy": 0.7}
+
+    # Without validation data, the training accuracy is used
+    assert scheduler.trials[0].score == 0.5
+    assert scheduler.trials[1].score is None
+    assert scheduler.best_trial() is scheduler.trials[2]
+
+
+def test_trials_with_different_loss_functions_are_ranked_by_accuracy(make_scheduler):
+    scheduler = make_scheduler(
+        4,
+        8,
+        loss_functions=[
+            "mean_squared_error",
+            "categorical_crossentropy",
+            "mean_squared_error",
+            "categorical_crossentropy",
+        ],
+    )
+    started_rungs = []
+    scheduler._start_rung = started_rungs.append
+
+    # The losses have different scales, so the MSE ones would always be the lowest
+    for trial, (val_loss, val_accuracy) in zip(
+        scheduler.trials, [(0.01, 0.5), (2.0, 0.9), (0.02, 0.4), (1.5, 0.8)]
+    ):
+        trial.logs = {"val_loss": val_loss, "val_accuracy": val_accuracy}
+
+    scheduler._rung_trials = scheduler.trials
+    scheduler._end_rung()
+
+    assert started_rungs == [[scheduler.trials[1], scheduler.trials[3]]]
+    assert scheduler.best_trial() is scheduler.trials[1]
+
+
+def test_trials_with_different_loss_functions_cant_be_ranked_by_loss(make_scheduler):
+    with pytest.raises(ValueError):
+        make_scheduler(
+            2,
+            4,
+            loss_functions=["mean_squared_error", "categorical_crossentropy"],
+            monitor="val_loss",
+            mode=MonitorMode.Min,
+        )
+
+
+def test_trials_ranked_by_loss(make_scheduler):
+    scheduler = make_scheduler(3, 4, monitor="val_loss", mode=MonitorMode.Min)
+
+    for trial, val_loss in zip(scheduler.trials, [0.4, 0.1, 0.3]):
+        trial.logs = {"val_loss": val_loss}
+
+    assert scheduler.best_trial() is scheduler.trials[1]